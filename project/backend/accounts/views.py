@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from .models import User
 from rest_framework import status
 from django.contrib.auth import authenticate
+from backend.pagination import paginated_response
 
 @api_view(["POST"])
 def google_login(request):
@@ -54,9 +55,16 @@ def create_guru(request):
 
 @api_view(["GET"])
 def list_gurus(request):
-    gurus = User.objects.filter(role="guru")
-    data = [{"id": u.id, "username": u.username, "email": u.email} for u in gurus]
-    return Response(data)
+    # ?search= filter username, ?page_size= / ?cursor= untuk pagination
+    gurus = User.objects.filter(role="guru").only("id", "username", "email").order_by("id")
+    search = request.query_params.get("search", "").strip()
+    if search:
+        gurus = gurus.filter(username__icontains=search)
+
+    def serialize(rows):
+        return [{"id": u.id, "username": u.username, "email": u.email} for u in rows]
+
+    return paginated_response(request, gurus, serialize)
 
 @api_view(["PUT"])
 def update_guru(request, pk):
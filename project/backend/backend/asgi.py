@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Menjalankan mode ASGI (chat async dengan AsyncOpenAI). Procfile memilih
+uvicorn otomatis jika CHAT_ASYNC=1, selain itu gunicorn WSGI:
+
+    CHAT_ASYNC=1 uvicorn backend.asgi:application --workers 2
 """
 
 import os
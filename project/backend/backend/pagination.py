@@ -0,0 +1,25 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class LearnHubCursorPagination(CursorPagination):
+    """Keyset pagination berdasarkan id (unik dan ter-index), biaya per halaman konstan."""
+    page_size = getattr(settings, "API_PAGE_SIZE", 20)
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+    ordering = "id"
+
+
+def paginated_response(request, queryset, serialize, pagination_class=LearnHubCursorPagination):
+    """
+    Pagination bersifat opt-in: aktif jika request membawa ?cursor atau ?page_size,
+    sehingga client lama tetap menerima list penuh.
+    `serialize` menerima iterable objek dan mengembalikan data siap-Response.
+    """
+    if "cursor" not in request.query_params and "page_size" not in request.query_params:
+        return Response(serialize(queryset))
+
+    paginator = pagination_class()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serialize(page))
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 from dotenv import load_dotenv
 
@@ -119,6 +120,42 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# CHAT_ASYNC=1 -> /api/chat/ memakai view async + AsyncOpenAI (hanya untuk deployment ASGI)
+CHAT_ASYNC = os.getenv("CHAT_ASYNC") == "1"
+CHAT_ASYNC_MAX_CONNECTIONS = int(os.getenv("CHAT_ASYNC_MAX_CONNECTIONS", 200))
+CHAT_ASYNC_MAX_KEEPALIVE = int(os.getenv("CHAT_ASYNC_MAX_KEEPALIVE", 50))
+
+# Backend model chat (materi/chat_backends.py). OPENAI_BASE_URL bisa diarahkan ke
+# server palsu lokal: manage.py fake_openai_server -> http://127.0.0.1:8001/v1
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "materi.chat_backends.OpenAIChatBackend")
+CHAT_BACKEND_OPTIONS = {
+    "base_url": os.getenv("OPENAI_BASE_URL") or None,
+    "timeout": float(os.getenv("CHAT_BACKEND_TIMEOUT", 60)),
+    "connect_timeout": float(os.getenv("CHAT_BACKEND_CONNECT_TIMEOUT", 5)),
+    "max_retries": int(os.getenv("CHAT_BACKEND_MAX_RETRIES", 2)),
+    "max_connections": CHAT_ASYNC_MAX_CONNECTIONS,
+    "max_keepalive_connections": CHAT_ASYNC_MAX_KEEPALIVE,
+}
+
+# Limiter /api/chat/ (materi/chat_limits.py). Untuk batas lintas worker arahkan
+# CHAT_LIMIT_CACHE_ALIAS ke cache bersama (Redis/Memcached); 0 = tanpa batas
+CHAT_LIMIT_CACHE_ALIAS = os.getenv("CHAT_LIMIT_CACHE_ALIAS", "default")
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", 16))
+CHAT_MAX_CONCURRENT_PER_CLIENT = int(os.getenv("CHAT_MAX_CONCURRENT_PER_CLIENT", 2))
+CHAT_RATE_PER_MINUTE = int(os.getenv("CHAT_RATE_PER_MINUTE", 10))
+CHAT_RATE_BURST = int(os.getenv("CHAT_RATE_BURST", 5))
+CHAT_GLOBAL_RATE_PER_MINUTE = int(os.getenv("CHAT_GLOBAL_RATE_PER_MINUTE", 600))
+CHAT_GLOBAL_RATE_BURST = int(os.getenv("CHAT_GLOBAL_RATE_BURST", 60))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", 0))
+# Jumlah reverse proxy di depan aplikasi yang menambahkan X-Forwarded-For
+# (Railway: 1). 0 = batas per client memakai REMOTE_ADDR
+CHAT_TRUSTED_PROXY_COUNT = int(os.getenv("CHAT_TRUSTED_PROXY_COUNT", 0))
+
+# Cache jawaban chat yang persis sama (materi/answer_cache.py)
+CHAT_ANSWER_CACHE_ALIAS = "chat_answers"
+CHAT_ANSWER_CACHE_TIMEOUT = int(os.getenv("CHAT_ANSWER_CACHE_TIMEOUT", 24 * 60 * 60))
 
 
 # Database
@@ -131,6 +168,59 @@ if os.getenv("DATABASE_URL"):
             ssl_require=True,
         )
     }
+else:
+    # Lokal tanpa DATABASE_URL (mis. seed_learnhub + benchmark_api). IMMEDIATE
+    # mengambil write lock di awal transaksi agar tidak "database is locked"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache membuang entri yang paling lama tidak dipakai (LRU) saat MAX_ENTRIES terlampaui.
+# Ganti BACKEND ke FileBasedCache / Redis agar cache dibagi antar worker gunicorn.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "learnhub-default",
+    },
+    # Cache jawaban chat (materi/answer_cache.py); LocMemCache membuang entri LRU
+    "chat_answers": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "learnhub-chat-answers",
+        "TIMEOUT": 24 * 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 2000,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    "materi_context": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "learnhub-materi-context",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 500,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+}
+
+# Response cache GET materi (materi/response_cache.py). Invalidasi harus sampai ke
+# semua worker dan management command, jadi cache ini hanya aktif dengan backend
+# bersama: RESPONSE_CACHE_URL=redis://... (butuh paket `redis`). Tanpa itu nonaktif.
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+if RESPONSE_CACHE_URL:
+    CACHES["responses"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": RESPONSE_CACHE_URL,
+    }
+MATERI_RESPONSE_CACHE_ALIAS = "responses" if RESPONSE_CACHE_URL else None
 
 
 # Password validation
@@ -210,9 +300,42 @@ AWS_S3_VERIFY = True
 
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "BACKEND": "materi.storage.CachedS3Storage",
     },
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
-}
\ No newline at end of file
+}
+
+# Cache disk lokal untuk file yang diunduh dari S3 (materi/storage.py)
+MATERI_BLOB_CACHE_DIR = os.getenv("MATERI_BLOB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "learnhub-blob-cache"))
+MATERI_BLOB_CACHE_MAX_BYTES = int(os.getenv("MATERI_BLOB_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+# Objek lebih besar dari ini dibaca langsung dari S3 tanpa disalin ke cache
+MATERI_BLOB_CACHE_MAX_OBJECT_BYTES = int(os.getenv("MATERI_BLOB_CACHE_MAX_OBJECT_BYTES", 100 * 1024 * 1024))
+
+# Batas total ukuran cache hasil ekstraksi file materi (byte)
+MATERI_EXTRACT_CACHE_MAX_BYTES = int(os.getenv("MATERI_EXTRACT_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# Ukuran halaman default dan maksimum untuk cursor pagination (backend/pagination.py)
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Ekstraksi file paralel (materi/extraction.py)
+MATERI_EXTRACT_THREADS = int(os.getenv("MATERI_EXTRACT_THREADS", 4))
+MATERI_EXTRACT_PROCESSES = int(os.getenv("MATERI_EXTRACT_PROCESSES", 0))
+MATERI_EXTRACT_TIMEOUT = int(os.getenv("MATERI_EXTRACT_TIMEOUT", 20))
+
+# Cache konteks chat per materi (lihat materi/context_cache.py)
+MATERI_CONTEXT_CACHE_ALIAS = "materi_context"
+
+# Upload langsung ke S3 lewat presigned URL (materi/direct_upload.py)
+MATERI_DIRECT_UPLOAD_EXPIRES = int(os.getenv("MATERI_DIRECT_UPLOAD_EXPIRES", 3600))
+MATERI_DIRECT_UPLOAD_MAX_BYTES = int(os.getenv("MATERI_DIRECT_UPLOAD_MAX_BYTES", 2 * 1024 ** 3))
+MATERI_DIRECT_UPLOAD_MULTIPART_THRESHOLD = int(os.getenv("MATERI_DIRECT_UPLOAD_MULTIPART_THRESHOLD", 64 * 1024 * 1024))
+MATERI_DIRECT_UPLOAD_PART_SIZE = int(os.getenv("MATERI_DIRECT_UPLOAD_PART_SIZE", 16 * 1024 * 1024))
+
+# Thread unduh/upload blob untuk export_materi / import_materi (materi/archive.py)
+MATERI_ARCHIVE_THREADS = int(os.getenv("MATERI_ARCHIVE_THREADS", 4))
+
+# Parser HTML untuk turunan SubMateri.isi: "stream" (default), "lxml" atau "html.parser"
+MATERI_HTML_PARSER = os.getenv("MATERI_HTML_PARSER", "stream")
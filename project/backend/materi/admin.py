@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import MateriUtama, SubMateri
 from django.utils.html import format_html
+from .images import smallest_variant_url
 
 
 class SubMateriInline(admin.TabularInline):
@@ -11,7 +12,8 @@ class SubMateriInline(admin.TabularInline):
 
     def preview_gambar(self, obj):
         if obj.gambar:
-            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', obj.gambar.url)
+            url = smallest_variant_url(obj.gambar_variants) or obj.gambar.url
+            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', url)
         return "—"
     preview_gambar.short_description = "Preview Gambar"
 
@@ -29,7 +31,8 @@ class MateriUtamaAdmin(admin.ModelAdmin):
 
     def preview_cover(self, obj):
         if obj.cover_image:
-            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', obj.cover_image.url)
+            url = smallest_variant_url(obj.cover_variants) or obj.cover_image.url
+            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', url)
         return "—"
     preview_cover.short_description = "Cover"
 
@@ -45,6 +48,7 @@ class SubMateriAdmin(admin.ModelAdmin):
 
     def preview_gambar(self, obj):
         if obj.gambar:
-            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', obj.gambar.url)
+            url = smallest_variant_url(obj.gambar_variants) or obj.gambar.url
+            return format_html('<img src="{}" width="100" style="border-radius:8px;"/>', url)
         return "—"
     preview_gambar.short_description = "Gambar"
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import re
+from django.conf import settings
+from django.core.cache import caches
+from .context_cache import context_version
+from .models import MateriUtama
+
+# Cache jawaban chat yang persis sama. Key memuat versi konten materi, jadi
+# perubahan materi otomatis membuat entri lama tidak terpakai (tergeser LRU).
+CHAT_ANSWER_CACHE_ALIAS = getattr(settings, "CHAT_ANSWER_CACHE_ALIAS", "default")
+CHAT_ANSWER_CACHE_TIMEOUT = getattr(settings, "CHAT_ANSWER_CACHE_TIMEOUT", 24 * 60 * 60)
+
+STAT_NAMES = ("hit", "miss", "bypass")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _cache():
+    return caches[CHAT_ANSWER_CACHE_ALIAS]
+
+
+def record_stat(name):
+    cache = _cache()
+    key = f"chat-answer:stats:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def answer_cache_stats():
+    values = _cache().get_many([f"chat-answer:stats:{name}" for name in STAT_NAMES])
+    stats = {name: values.get(f"chat-answer:stats:{name}", 0) for name in STAT_NAMES}
+    lookups = stats["hit"] + stats["miss"]
+    stats["hit_ratio"] = round(stats["hit"] / lookups, 4) if lookups else None
+    return stats
+
+
+def normalize_message(message):
+    return WHITESPACE_RE.sub(" ", message).strip().casefold()
+
+
+def history_hash(history):
+    normalized = [
+        [str(msg.get("role", "user")), normalize_message(str(msg.get("content", "")))]
+        for msg in history or []
+        if isinstance(msg, dict)
+    ]
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def wants_cached_answer(request, data):
+    """Bypass per request: body {"cache": false} atau header Cache-Control: no-cache."""
+    if data.get("cache") in (False, "false", "0", 0):
+        return False
+    return "no-cache" not in request.META.get("HTTP_CACHE_CONTROL", "")
+
+
+def answer_key(data, message, sampling, system_prompt):
+    """
+    Key = versi konten materi/submateri + pesan ternormalisasi + hash riwayat +
+    model/parameter sampling + prompt sistem.
+    """
+    materi_slug = data.get("materi_slug")
+    sub_slug = data.get("sub_slug")
+    version = "-"
+    if materi_slug:
+        materi = MateriUtama.objects.filter(slug=materi_slug).first()
+        version = context_version(materi, sub_slug) if materi else "missing"
+
+    raw = json.dumps(
+        [
+            materi_slug, sub_slug, version,
+            normalize_message(message),
+            history_hash(data.get("history")),
+            sampling,
+            hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+        ],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return "chat-answer:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_answer(key):
+    return _cache().get(key)
+
+
+def store_answer(key, reply):
+    if key and reply:
+        _cache().set(key, reply, CHAT_ANSWER_CACHE_TIMEOUT)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MateriConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'materi'
+
+    def ready(self):
+        from . import signals  # noqa: F401
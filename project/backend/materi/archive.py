@@ -0,0 +1,437 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from .models import MateriUtama, SubMateri, MateriFile
+
+# Arsip satu materi: manifest.json + blobs/<sha256><ext>. Blob dengan isi sama
+# hanya disimpan sekali, dan saat import blob yang sudah ada di storage dilewati.
+ARCHIVE_VERSION = 1
+ARCHIVE_THREADS = getattr(settings, "MATERI_ARCHIVE_THREADS", 4)
+COPY_BUFFER = 1024 * 1024
+
+
+def _bounded_map(fn, items, workers=ARCHIVE_THREADS):
+    """
+    Seperti executor.map, tapi paling banyak `workers * 2` tugas berjalan
+    sekaligus sehingga file sementara di disk tidak menumpuk.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="materi-archive") as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _hash_copy(src, dst):
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        block = src.read(COPY_BUFFER)
+        if not block:
+            break
+        digest.update(block)
+        dst.write(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+# ---------- Format arsip ----------
+
+class _TarWriter:
+    def __init__(self, path):
+        mode = "w:gz" if path.endswith((".tar.gz", ".tgz")) else "w"
+        self.archive = tarfile.open(path, mode)
+
+    def add_file(self, arcname, path):
+        self.archive.add(path, arcname=arcname, recursive=False)
+
+    def add_bytes(self, arcname, data):
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        self.archive.addfile(info, fileobj=io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+
+class _ZipWriter:
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add_file(self, arcname, path):
+        with open(path, "rb") as src, self.archive.open(arcname, "w", force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+    def add_bytes(self, arcname, data):
+        self.archive.writestr(arcname, data)
+
+    def close(self):
+        self.archive.close()
+
+
+def _open_writer(path):
+    return _ZipWriter(path) if path.endswith(".zip") else _TarWriter(path)
+
+
+class _ArchiveReader:
+    """
+    Baca manifest lalu member arsip sesuai urutan di dalam arsip. Tar (termasuk
+    .tar.gz) dibaca sebagai stream satu kali jalan karena manifest ditulis paling
+    awal; arsip lama dengan manifest di akhir dibaca dengan akses acak.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+            with self.archive.open("manifest.json") as f:
+                self.manifest = json.load(f)
+            self._members = lambda: (
+                (info.filename, lambda info=info: self.archive.open(info)) for info in self.archive.infolist()
+            )
+            return
+
+        self.archive = tarfile.open(path, "r|*")
+        first = self.archive.next()
+        if first is not None and first.name == "manifest.json":
+            self.manifest = json.load(self.archive.extractfile(first))
+            self._members = lambda: (
+                (m.name, lambda m=m: self.archive.extractfile(m)) for m in self.archive if m.isfile()
+            )
+            return
+
+        self.archive.close()
+        self.archive = tarfile.open(path, "r:*")
+        self.manifest = json.load(self.archive.extractfile("manifest.json"))
+        self._members = lambda: (
+            (m.name, lambda m=m: self.archive.extractfile(m)) for m in self.archive.getmembers() if m.isfile()
+        )
+
+    def members(self):
+        """Generator (nama, fungsi pembuka); untuk tar, buka dan baca sebelum lanjut ke member berikutnya."""
+        return self._members()
+
+    def close(self):
+        self.archive.close()
+
+
+# ---------- Export ----------
+
+def _blob_ref(name):
+    return {"name": name} if name else None
+
+
+def build_manifest(materi):
+    """Struktur materi -> dict JSON. Blob dirujuk lewat nama storage (diisi sha256 saat export)."""
+    manifest = {
+        "version": ARCHIVE_VERSION,
+        "materi": {
+            "judul": materi.judul,
+            "slug": materi.slug,
+            "deskripsi": materi.deskripsi,
+            "cover_image": _blob_ref(materi.cover_image.name),
+        },
+        "submateri": [],
+    }
+    for sub in materi.submateri.prefetch_related("files").order_by("urutan", "pk"):
+        manifest["submateri"].append({
+            "judul": sub.judul,
+            "slug": sub.slug,
+            "isi": sub.isi,
+            "urutan": sub.urutan,
+            "file": _blob_ref(sub.file.name),
+            "gambar": _blob_ref(sub.gambar.name),
+            "files": [
+                {
+                    "judul": f.judul,
+                    "deskripsi": f.deskripsi,
+                    "urutan": f.urutan,
+                    "file": _blob_ref(f.file.name),
+                }
+                for f in sub.files.all()
+            ],
+        })
+    return manifest
+
+
+def _iter_blob_refs(manifest):
+    yield manifest["materi"]["cover_image"]
+    for sub in manifest["submateri"]:
+        yield sub["file"]
+        yield sub["gambar"]
+        for f in sub["files"]:
+            yield f["file"]
+
+
+def _download(name, storage=default_storage):
+    ext = os.path.splitext(name)[1].lower()
+    fd, tmp_path = tempfile.mkstemp(prefix="materi-export-", suffix=ext)
+    try:
+        with os.fdopen(fd, "wb") as tmp, storage.open(name, "rb") as src:
+            sha256, size = _hash_copy(src, tmp)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return name, tmp_path, sha256, size
+
+
+def export_materi(materi, path, storage=default_storage, stdout=None):
+    """
+    Tulis materi beserta semua blob ke arsip .zip / .tar / .tar.gz di `path`.
+    Blob diunduh paralel ke file sementara lalu ditulis berurutan ke arsip,
+    sehingga memori tetap konstan berapa pun ukuran file.
+    Returns: jumlah blob unik yang ditulis.
+    """
+    manifest = build_manifest(materi)
+    refs = {}
+    for ref in _iter_blob_refs(manifest):
+        if ref:
+            refs.setdefault(ref["name"], []).append(ref)
+
+    # Semua blob diunduh dulu (sha256 harus ada di manifest) supaya manifest bisa
+    # ditulis paling awal dan import .tar.gz cukup satu kali dekompresi.
+    # Konsekuensinya ruang disk sementara = total ukuran blob unik.
+    blobs = {}
+    try:
+        for name, tmp_path, sha256, size in _bounded_map(lambda n: _download(n, storage), list(refs)):
+            blob_path = f"blobs/{sha256}{os.path.splitext(name)[1].lower()}"
+            for ref in refs[name]:
+                ref.update(sha256=sha256, size=size, path=blob_path)
+            if blob_path in blobs:
+                os.unlink(tmp_path)
+            else:
+                blobs[blob_path] = tmp_path
+            if stdout:
+                stdout.write(f"{name} ({size} byte)")
+
+        count = len(blobs)
+        writer = _open_writer(path)
+        try:
+            writer.add_bytes("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+            for blob_path in list(blobs):
+                writer.add_file(blob_path, blobs[blob_path])
+                os.unlink(blobs.pop(blob_path))
+        finally:
+            writer.close()
+    finally:
+        for tmp_path in blobs.values():
+            os.unlink(tmp_path)
+    return count
+
+
+# ---------- Import ----------
+
+def imported_name(ref):
+    """Nama storage deterministik dari hash isi: import ulang menunjuk objek yang sama."""
+    directory, filename = os.path.split(ref["name"])
+    return f"{directory}/{ref['sha256'][:16]}_{filename}" if directory else f"{ref['sha256'][:16]}_{filename}"
+
+
+def _upload(item, storage=default_storage):
+    name, tmp_path = item
+    try:
+        with open(tmp_path, "rb") as src:
+            return storage.save(name, File(src, name=os.path.basename(name)))
+    finally:
+        os.unlink(tmp_path)
+
+
+def _import_blobs(reader, storage=default_storage, stdout=None):
+    """
+    Upload blob yang belum ada di storage, dibaca sesuai urutan member arsip.
+    Returns: ({sha256: nama storage}, jumlah di-upload)
+    """
+    targets = {}
+    for ref in _iter_blob_refs(reader.manifest):
+        if ref:
+            targets.setdefault(ref["sha256"], (ref["path"], imported_name(ref)))
+    wanted = {blob_path: (sha256, name) for sha256, (blob_path, name) in targets.items()}
+    missing = set(wanted)
+
+    def pending():
+        for member_name, open_member in reader.members():
+            if member_name not in wanted:
+                continue
+            missing.discard(member_name)
+            sha256, name = wanted[member_name]
+            if storage.exists(name):
+                continue
+            # Blob dibaca berurutan dari arsip ke file sementara, upload paralel
+            fd, tmp_path = tempfile.mkstemp(prefix="materi-import-")
+            with os.fdopen(fd, "wb") as tmp, open_member() as src:
+                digest, _ = _hash_copy(src, tmp)
+            if digest != sha256:
+                os.unlink(tmp_path)
+                raise ValueError(f"Checksum {member_name} tidak cocok")
+            yield name, tmp_path
+
+    uploaded = 0
+    for saved in _bounded_map(lambda item: _upload(item, storage), pending()):
+        uploaded += 1
+        if stdout:
+            stdout.write(f"Uploaded {saved}")
+    if missing:
+        raise ValueError(f"Blob tidak ada di arsip: {', '.join(sorted(missing))}")
+    return {sha256: name for sha256, (_, name) in targets.items()}, uploaded
+
+
+def _stored(ref, names):
+    return names[ref["sha256"]] if ref else None
+
+
+def check_import_conflicts(manifest, replace=False):
+    """
+    Slug materi dan submateri unik di seluruh tabel. Import hanya boleh menimpa
+    materi dengan slug yang sama jika `replace`, dan tidak pernah mengambil
+    submateri milik materi lain.
+    """
+    slug = manifest["materi"]["slug"]
+    materi = MateriUtama.objects.filter(slug=slug).first()
+    if materi and not replace:
+        raise ValueError(f"Materi '{slug}' sudah ada; pakai --replace untuk menimpanya")
+
+    sub_slugs = [item["slug"] for item in manifest["submateri"]]
+    taken = SubMateri.objects.filter(slug__in=sub_slugs)
+    if materi:
+        taken = taken.exclude(parent=materi)
+    taken = sorted(taken.values_list("slug", flat=True))
+    if taken:
+        raise ValueError(f"Slug submateri sudah dipakai materi lain: {', '.join(taken)}")
+    return materi
+
+
+def import_archive(path, storage=default_storage, stdout=None, replace=False):
+    """
+    Import arsip hasil export_materi. Materi dengan slug yang sama hanya
+    ditimpa jika `replace` (import ulang jadi idempoten): submateri dicocokkan
+    lewat slug di dalam materi itu, file lewat (submateri, nama blob berbasis hash).
+    Submateri dan file materi itu yang tidak ada di manifest dihapus.
+    Returns: (materi, {"created": n, "updated": n, "deleted": n, "uploaded": n})
+    """
+    reader = _ArchiveReader(path)
+    try:
+        manifest = reader.manifest
+        if manifest.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Versi arsip tidak didukung: {manifest.get('version')}")
+        # Cek sebelum upload blob supaya konflik tidak meninggalkan objek yatim
+        check_import_conflicts(manifest, replace)
+        names, uploaded = _import_blobs(reader, storage, stdout)
+    finally:
+        reader.close()
+
+    stats = {"created": 0, "updated": 0, "deleted": 0, "uploaded": uploaded}
+    # bulk_update tidak mengisi auto_now; updated_at dipakai ETag/Last-Modified
+    now = timezone.now()
+    data = manifest["materi"]
+    sub_slugs = [item["slug"] for item in manifest["submateri"]]
+
+    with transaction.atomic():
+        # Diulang di dalam transaksi: data bisa berubah selama upload blob
+        materi = check_import_conflicts(manifest, replace)
+        created = materi is None
+        if created:
+            materi = MateriUtama(slug=data["slug"])
+        materi.judul = data["judul"]
+        materi.deskripsi = data["deskripsi"]
+        materi.cover_image = _stored(data["cover_image"], names)
+        materi.save()
+        stats["created" if created else "updated"] += 1
+
+        existing = {s.slug: s for s in SubMateri.objects.filter(parent=materi, slug__in=sub_slugs)}
+        new_subs, changed_subs = [], []
+        for item in manifest["submateri"]:
+            sub = existing.get(item["slug"]) or SubMateri(parent=materi, slug=item["slug"])
+            sub.judul = item["judul"]
+            sub.isi = item["isi"]
+            sub.urutan = item["urutan"]
+            sub.file = _stored(item["file"], names)
+            sub.gambar = _stored(item["gambar"], names)
+            sub.updated_at = now
+            sub.update_isi_derived()  # bulk_create/bulk_update tidak memanggil save()
+            (changed_subs if sub.pk else new_subs).append(sub)
+        SubMateri.objects.bulk_create(new_subs)
+        SubMateri.objects.bulk_update(changed_subs, ["judul", "isi", "isi_text", "isi_images", "isi_hash", "urutan", "file", "gambar", "updated_at"])
+        stats["created"] += len(new_subs)
+        stats["updated"] += len(changed_subs)
+
+        # Setelah replace isi materi sama dengan arsip; file ikut terhapus lewat CASCADE
+        stale_subs = SubMateri.objects.filter(parent=materi).exclude(slug__in=sub_slugs)
+        stats["deleted"] += stale_subs.count()
+        stale_subs.delete()
+
+        subs = {s.slug: s for s in SubMateri.objects.filter(parent=materi, slug__in=sub_slugs)}
+        existing_files = {
+            (f.submateri_id, f.file.name): f
+            for f in MateriFile.objects.filter(submateri__in=subs.values())
+        }
+        new_files, changed_files = [], []
+        kept_files = set()
+        for item in manifest["submateri"]:
+            sub = subs[item["slug"]]
+            for file_item in item["files"]:
+                name = _stored(file_item["file"], names)
+                kept_files.add((sub.pk, name))
+                materi_file = existing_files.get((sub.pk, name)) or MateriFile(submateri=sub, file=name)
+                materi_file.judul = file_item["judul"]
+                materi_file.deskripsi = file_item["deskripsi"]
+                materi_file.urutan = file_item["urutan"]
+                materi_file.updated_at = now
+                (changed_files if materi_file.pk else new_files).append(materi_file)
+        MateriFile.objects.bulk_create(new_files)
+        MateriFile.objects.bulk_update(changed_files, ["judul", "deskripsi", "urutan", "updated_at"])
+        stats["created"] += len(new_files)
+        stats["updated"] += len(changed_files)
+
+        stale_files = MateriFile.objects.filter(
+            pk__in=[f.pk for key, f in existing_files.items() if key not in kept_files]
+        )
+        stats["deleted"] += stale_files.count()
+        stale_files.delete()
+
+        transaction.on_commit(lambda: after_bulk_import(materi, list(subs.values())))
+
+    return materi, stats
+
+
+def after_bulk_import(materi, submateri_list):
+    """
+    bulk_create/bulk_update tidak memicu signal: jalankan manual hook yang
+    biasanya dijalankan signals.py (index chat + search, varian gambar,
+    invalidasi response cache).
+    """
+    from .bulk import submateri_changed
+    from .images import generate_variants, store_variants
+    from .retrieval import index_materi
+    from .search import index_search_submateri, index_search_file
+
+    for sub in submateri_list:
+        variants = {}
+        if sub.gambar:
+            try:
+                variants = generate_variants(sub.gambar.name)
+            except Exception as e:
+                print(f"Error generating variants for {sub.gambar.name}: {e}")
+        store_variants(sub, "gambar_variants", variants)
+        index_search_submateri(sub)
+
+    # Ekstraksi file + chunk BM25; ExtractedContent memicu index search file lewat signal
+    index_materi(materi)
+    for materi_file in MateriFile.objects.filter(submateri__parent=materi).select_related("submateri"):
+        index_search_file(materi_file)
+
+    submateri_changed(materi, [sub.slug for sub in submateri_list])
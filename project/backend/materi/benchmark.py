@@ -0,0 +1,309 @@
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.files import File
+from .file_utils import extract_file_details
+from .helper import extract_text_and_images
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS tidak tersedia
+    resource = None
+
+# Benchmark extractor: fixture sintetis dibuat sekali ke folder sementara, lalu
+# tiap kasus dijalankan di subprocess tersendiri supaya peak RSS tidak tercampur.
+
+WORDS = (
+    "materi belajar siswa guru sekolah energi cahaya tumbuhan klorofil air udara "
+    "karbon oksigen glukosa sel inti atom molekul reaksi kimia fisika gaya gerak "
+    "percepatan massa volume suhu tekanan listrik arus hambatan tegangan medan "
+    "sejarah kerajaan nusantara budaya bahasa matematika aljabar fungsi grafik"
+).split()
+
+# Ukuran fixture pada --scale 1
+BASE_SIZES = {
+    "pdf": 40,         # halaman
+    "docx": 3000,      # paragraf
+    "pptx": 40,        # slide
+    "xlsx": 20000,     # baris
+    "csv": 50000,      # baris
+    "html": 2000,      # KB
+}
+
+# Kasus: nama -> format fixture. html-<parser> mengukur extract_text_and_images,
+# sisanya extract_file_details
+CASES = {
+    "pdf": "pdf",
+    "docx": "docx",
+    "pptx": "pptx",
+    "xlsx": "xlsx",
+    "csv": "csv",
+    "html-stream": "html",
+    "html-html.parser": "html",
+    "html-lxml": "html",
+}
+
+# Kasus yang punya satuan halaman/slide untuk pages/s
+PAGED_CASES = ("pdf", "pptx")
+
+# Selisih RSS di bawah ini dianggap noise saat membandingkan baseline
+RSS_NOISE_MB = 8
+
+
+def _sentence(rng, n_words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def _paragraph(rng, n_sentences=5):
+    return " ".join(_sentence(rng) for _ in range(n_sentences))
+
+
+# ---------- Generator fixture ----------
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def generate_pdf(path, pages, rng):
+    """PDF minimal (Helvetica, satu content stream per halaman) tanpa dependensi tambahan."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages diisi setelah jumlah kid diketahui
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for _ in range(pages):
+        lines = ["BT /F1 10 Tf 50 800 Td 12 TL"]
+        for _ in range(60):
+            lines.append(f"({_pdf_escape(_sentence(rng, 14))}) '")
+        lines.append("ET")
+        stream = "\n".join(lines).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids),
+    )
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return {"pages": pages}
+
+
+def generate_docx(path, paragraphs, rng):
+    import docx
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            document.add_heading(_sentence(rng, 5), level=1)
+        document.add_paragraph(_paragraph(rng, 3))
+    document.save(path)
+    return {"paragraphs": paragraphs}
+
+
+def generate_pptx(path, slides, rng):
+    from pptx import Presentation
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]  # judul + isi
+    for _ in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = _sentence(rng, 5)
+        body = slide.placeholders[1].text_frame
+        body.text = _sentence(rng)
+        for _ in range(6):
+            body.add_paragraph().text = _sentence(rng)
+    presentation.save(path)
+    return {"pages": slides}
+
+
+def generate_xlsx(path, rows, rng):
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_no in range(2):
+        sheet = workbook.create_sheet(f"Data {sheet_no + 1}")
+        sheet.append(["No", "Nama", "Kelas", "Nilai", "Catatan"])
+        for i in range(rows // 2):
+            sheet.append([i + 1, rng.choice(WORDS).title(), f"X-{rng.randint(1, 9)}", rng.randint(40, 100), _sentence(rng, 6)])
+    workbook.save(path)
+    return {"rows": rows}
+
+
+def generate_csv(path, rows, rng):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["no", "nama", "kelas", "nilai", "catatan"])
+        for i in range(rows):
+            writer.writerow([i + 1, rng.choice(WORDS).title(), f"X-{rng.randint(1, 9)}", rng.randint(40, 100), _sentence(rng, 6)])
+    return {"rows": rows}
+
+
+def generate_html(path, kilobytes, rng):
+    """HTML isi SubMateri: paragraf bertingkat, gambar, tabel, dan script/style yang harus dibuang."""
+    target = kilobytes * 1024
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        i = 0
+        while size < target:
+            block = (
+                f"<h2>{_sentence(rng, 4)}</h2>"
+                f"<p>{_sentence(rng)} <strong>{_sentence(rng, 4)}</strong> <em>{_sentence(rng, 3)}</em></p>"
+                f'<p><img src="https://example.com/media/gambar-{i}.png" alt="gambar {i}"></p>'
+                f"<ul><li>{_sentence(rng, 6)}</li><li>{_sentence(rng, 6)}</li></ul>"
+                f"<table><tr><td>{rng.randint(1, 99)}</td><td>{_sentence(rng, 4)}</td></tr></table>"
+                f"<script>var x{i} = {i};</script><style>.c{i} {{ color: red; }}</style>"
+                "\n"
+            )
+            f.write(block)
+            size += len(block.encode("utf-8"))
+            i += 1
+    return {"kilobytes": kilobytes}
+
+
+GENERATORS = {
+    "pdf": (".pdf", generate_pdf),
+    "docx": (".docx", generate_docx),
+    "pptx": (".pptx", generate_pptx),
+    "xlsx": (".xlsx", generate_xlsx),
+    "csv": (".csv", generate_csv),
+    "html": (".html", generate_html),
+}
+
+
+def generate_fixtures(directory, formats, scale=1.0, seed=42):
+    """
+    Tulis fixture untuk tiap format ke `directory`.
+    Returns: {format: {"path", "bytes", "params"}}
+    """
+    fixtures = {}
+    for fmt in formats:
+        ext, generator = GENERATORS[fmt]
+        path = os.path.join(directory, f"fixture-{fmt}{ext}")
+        params = generator(path, max(1, int(BASE_SIZES[fmt] * scale)), random.Random(seed))
+        fixtures[fmt] = {"path": path, "bytes": os.path.getsize(path), "params": params}
+    return fixtures
+
+
+# ---------- Pengukuran ----------
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _case_runner(case, path):
+    if case.startswith("html-"):
+        parser = case.split("-", 1)[1]
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        return lambda: {"page_count": None, "chars": len(extract_text_and_images(html, parser=parser)[0])}
+
+    def run():
+        # Seluruh dokumen di-parse, sama seperti saat disimpan
+        with open(path, "rb") as f:
+            details = extract_file_details(File(f, name=path))
+        return {"page_count": details["page_count"], "chars": len(details["text"])}
+    return run
+
+
+def run_case(case, path, repeat=3):
+    """
+    Jalankan satu kasus `repeat` kali di proses ini.
+    Returns: dict waktu (median/min), peak RSS dan throughput
+    """
+    size = os.path.getsize(path)
+    runner = _case_runner(case, path)
+    rss_before = peak_rss_mb()
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = runner()
+        timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+    rss_after = peak_rss_mb()
+    report = {
+        "case": case,
+        "bytes": size,
+        "repeat": repeat,
+        "median_s": round(median, 4),
+        "min_s": round(min(timings), 4),
+        "mb_per_s": round(size / (1024 * 1024) / median, 3) if median else None,
+        "pages_per_s": (
+            round(result["page_count"] / median, 2) if case in PAGED_CASES and result["page_count"] and median else None
+        ),
+        "chars": result["chars"],
+        "peak_rss_mb": round(rss_after, 1) if rss_after is not None else None,
+        "rss_delta_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+    }
+    return report
+
+
+def run_case_subprocess(case, path, repeat=3):
+    """Jalankan run_case di proses baru (manage.py benchmark_extractors --run-case)."""
+    command = [
+        sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "benchmark_extractors",
+        "--run-case", case, "--fixture", path, "--repeat", str(repeat),
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    # Extractor bisa mencetak log ke stdout; hasil ada di baris terakhir
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def environment_info():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()}
+
+
+# ---------- Baseline ----------
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Bandingkan hasil dengan baseline.
+    Returns: list pesan regresi (kosong = aman). Kasus yang ukuran fixture-nya
+    berbeda dari baseline dilewati.
+    """
+    regressions = []
+    previous = {item["case"]: item for item in baseline.get("results", [])}
+    for item in results:
+        old = previous.get(item["case"])
+        if not old or old.get("params") != item.get("params"):
+            continue
+        limit = old["median_s"] * (1 + threshold)
+        if item["median_s"] > limit:
+            regressions.append(
+                f"{item['case']}: waktu {item['median_s']}s > {old['median_s']}s (+{threshold:.0%})"
+            )
+        if item.get("rss_delta_mb") is not None and old.get("rss_delta_mb") is not None:
+            grown = item["rss_delta_mb"] - old["rss_delta_mb"]
+            if grown > RSS_NOISE_MB and item["rss_delta_mb"] > old["rss_delta_mb"] * (1 + threshold):
+                regressions.append(
+                    f"{item['case']}: RSS +{item['rss_delta_mb']}MB > +{old['rss_delta_mb']}MB (+{threshold:.0%})"
+                )
+    return regressions
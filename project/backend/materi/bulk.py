@@ -0,0 +1,101 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import MateriUtama, SubMateri, MateriChunk, SearchDocument
+from .response_cache import invalidate_scope
+from .retrieval import _build_chunks
+from .search import SEARCH_MAX_CHARS
+
+
+class BulkError(Exception):
+    pass
+
+
+def submateri_changed(materi, sub_slugs):
+    """
+    Pengganti signal untuk operasi bulk (bulk_create/bulk_update tidak
+    memicu signals.py): naikkan updated_at materi dan invalidasi response cache.
+    """
+    MateriUtama.objects.filter(pk=materi.pk).update(updated_at=timezone.now())
+    invalidate_scope("list", f"materi:{materi.slug}", *[f"sub:{materi.slug}:{slug}" for slug in sub_slugs])
+
+
+def index_new_submateri(submateri_list):
+    """Index chunk chat + dokumen search untuk submateri baru dalam dua bulk_create."""
+    chunks = []
+    documents = []
+    for sub in submateri_list:
+        text = sub.isi_text
+        chunks.extend(_build_chunks(text, materi_id=sub.parent_id, submateri=sub))
+        documents.append(SearchDocument(
+            kind=SearchDocument.KIND_SUBMATERI,
+            materi_id=sub.parent_id,
+            submateri=sub,
+            judul=sub.judul[:255],
+            text=text[:SEARCH_MAX_CHARS],
+        ))
+    MateriChunk.objects.bulk_create(chunks)
+    SearchDocument.objects.bulk_create(documents)
+
+
+def bulk_create_submateri(materi, items):
+    """
+    Buat banyak submateri sekaligus di akhir materi dengan urutan berurutan.
+    `items`: [{"judul", "isi"}] yang sudah tervalidasi.
+    Jumlah query konstan: kunci materi, max urutan, cek slug, insert, index.
+    """
+    slugs = [slugify(item["judul"]) for item in items]
+    if len(set(slugs)) != len(slugs) or not all(slugs):
+        raise BulkError("Judul submateri menghasilkan slug kosong atau ganda")
+
+    with transaction.atomic():
+        taken = set(SubMateri.objects.filter(slug__in=slugs).values_list("slug", flat=True))
+        if taken:
+            raise BulkError(f"Slug sudah dipakai: {', '.join(sorted(taken))}")
+
+        first = SubMateri.allocate_urutan(materi.pk)
+        new_subs = [
+            SubMateri(parent=materi, judul=item["judul"], isi=item.get("isi", ""), slug=slug, urutan=first + i)
+            for i, (item, slug) in enumerate(zip(items, slugs))
+        ]
+        # bulk_create tidak memanggil save()
+        for sub in new_subs:
+            sub.update_isi_derived()
+        try:
+            created = SubMateri.objects.bulk_create(new_subs)
+        except IntegrityError:
+            # Request lain membuat slug yang sama setelah pengecekan di atas;
+            # keluar dari atomic() dengan exception me-rollback transaksi
+            raise BulkError("Slug sudah dipakai oleh submateri yang baru dibuat; coba lagi")
+        index_new_submateri(created)
+        transaction.on_commit(lambda: submateri_changed(materi, slugs))
+    return created
+
+
+def reorder_submateri(materi, slugs):
+    """
+    Terapkan urutan lengkap (daftar slug seluruh submateri materi) dalam satu
+    bulk_update. Baris submateri dikunci selama transaksi.
+    """
+    if not isinstance(slugs, list) or not all(isinstance(slug, str) for slug in slugs):
+        raise BulkError("order harus berupa list slug")
+
+    with transaction.atomic():
+        submateri = {
+            sub.slug: sub
+            for sub in SubMateri.objects.select_for_update().filter(parent=materi).only("id", "slug", "urutan")
+        }
+        if len(slugs) != len(set(slugs)) or set(slugs) != set(submateri):
+            raise BulkError("Urutan harus memuat setiap slug submateri materi ini tepat satu kali")
+
+        now = timezone.now()
+        changed = []
+        for position, slug in enumerate(slugs, start=1):
+            sub = submateri[slug]
+            if sub.urutan != position:
+                sub.urutan = position
+                sub.updated_at = now
+                changed.append(sub)
+        SubMateri.objects.bulk_update(changed, ["urutan", "updated_at"])
+        transaction.on_commit(lambda: submateri_changed(materi, [sub.slug for sub in changed]))
+    return [submateri[slug] for slug in slugs]
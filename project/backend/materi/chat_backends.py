@@ -0,0 +1,88 @@
+import os
+import httpx
+from django.conf import settings
+from django.utils.module_loading import import_string
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+# Backend model chat dipilih lewat settings.CHAT_BACKEND (dotted path) dengan
+# argumen settings.CHAT_BACKEND_OPTIONS. Backend wajib menyediakan
+# create(**params) dan acreate(**params) dengan format chat.completions OpenAI.
+
+
+class OpenAIChatBackend:
+    """
+    Chat completions lewat SDK OpenAI (atau server lain yang kompatibel lewat
+    `base_url`, mis. manage.py fake_openai_server).
+    Client sync/async dibuat sekali per proses sehingga koneksi HTTP dipakai
+    ulang. Retry memakai backoff eksponensial dengan jitter bawaan SDK untuk
+    error koneksi, 408, 409, 429 dan 5xx.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        base_url=None,
+        timeout=60.0,
+        connect_timeout=5.0,
+        max_retries=2,
+        max_connections=100,
+        max_keepalive_connections=20,
+    ):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url or None
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=DefaultHttpxClient(limits=self.limits, timeout=self.timeout),
+            )
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=DefaultAsyncHttpxClient(limits=self.limits, timeout=self.timeout),
+            )
+        return self._async_client
+
+    def create(self, **params):
+        return self.client.chat.completions.create(**params)
+
+    async def acreate(self, **params):
+        return await self.async_client.chat.completions.create(**params)
+
+
+_backend = None
+
+
+def get_chat_backend():
+    global _backend
+    if _backend is None:
+        backend_class = import_string(getattr(settings, "CHAT_BACKEND", "materi.chat_backends.OpenAIChatBackend"))
+        _backend = backend_class(**getattr(settings, "CHAT_BACKEND_OPTIONS", {}))
+    return _backend
+
+
+def set_chat_backend(backend):
+    """Ganti backend aktif (mis. stub saat pengujian). Returns: backend sebelumnya."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
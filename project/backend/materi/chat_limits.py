@@ -0,0 +1,324 @@
+import asyncio
+import math
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+# Batas untuk /api/chat/ (AllowAny). State disimpan di cache Django; pakai
+# backend cache bersama (Redis/Memcached) agar batas berlaku lintas worker.
+# Dengan LocMemCache batas dihitung per proses.
+CHAT_LIMIT_CACHE_ALIAS = getattr(settings, "CHAT_LIMIT_CACHE_ALIAS", "default")
+CHAT_MAX_CONCURRENT = getattr(settings, "CHAT_MAX_CONCURRENT", 16)
+CHAT_MAX_CONCURRENT_PER_CLIENT = getattr(settings, "CHAT_MAX_CONCURRENT_PER_CLIENT", 2)
+# Token bucket: `RATE` token per menit, kapasitas `BURST` (0 = tanpa batas)
+CHAT_RATE_PER_MINUTE = getattr(settings, "CHAT_RATE_PER_MINUTE", 10)
+CHAT_RATE_BURST = getattr(settings, "CHAT_RATE_BURST", 5)
+CHAT_GLOBAL_RATE_PER_MINUTE = getattr(settings, "CHAT_GLOBAL_RATE_PER_MINUTE", 600)
+CHAT_GLOBAL_RATE_BURST = getattr(settings, "CHAT_GLOBAL_RATE_BURST", 60)
+# > 0: tunggu slot kosong paling lama sekian detik sebelum 429
+CHAT_QUEUE_TIMEOUT = getattr(settings, "CHAT_QUEUE_TIMEOUT", 0)
+# Slot dihitung per jendela waktu CHAT_SLOT_TTL detik (jendela ini + sebelumnya);
+# slot yang bocor karena worker mati hilang paling lama setelah 2 jendela
+CHAT_SLOT_TTL = getattr(settings, "CHAT_SLOT_TTL", 120)
+# Jumlah reverse proxy tepercaya di depan aplikasi (Railway: 1). 0 = pakai
+# REMOTE_ADDR saja; X-Forwarded-For dari client tidak pernah dipercaya
+CHAT_TRUSTED_PROXY_COUNT = getattr(settings, "CHAT_TRUSTED_PROXY_COUNT", 0)
+
+QUEUE_POLL_INTERVAL = 0.05
+BUCKET_LOCK_TIMEOUT = 1
+STAT_NAMES = ("admitted", "queued", "shed_concurrency", "shed_client_concurrency", "shed_rate", "shed_client_rate")
+
+
+def _cache():
+    return caches[CHAT_LIMIT_CACHE_ALIAS]
+
+
+def _incr(key, delta=1, timeout=None):
+    cache = _cache()
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout):
+            return cache.incr(key, delta)
+        return delta
+
+
+def record_stat(name):
+    _incr(f"chat-limit:stats:{name}")
+
+
+def limiter_stats():
+    values = _cache().get_many([f"chat-limit:stats:{name}" for name in STAT_NAMES])
+    stats = {name: values.get(f"chat-limit:stats:{name}", 0) for name in STAT_NAMES}
+    shed = sum(v for k, v in stats.items() if k.startswith("shed_"))
+    total = stats["admitted"] + shed
+    stats["shed_ratio"] = round(shed / total, 4) if total else None
+    stats["in_flight"] = sum(_cache().get_many(_window_keys("chat-limit:slots:global")).values())
+    return stats
+
+
+def reset_limiter_stats():
+    _cache().delete_many([f"chat-limit:stats:{name}" for name in STAT_NAMES])
+
+
+def client_ip(request, trusted_proxies=None):
+    """
+    IP client yang tidak bisa dipalsukan lewat header. Setiap proxy menambahkan
+    alamat yang dilihatnya di kanan X-Forwarded-For, jadi dengan N proxy
+    tepercaya alamat client adalah entri ke-N dari kanan.
+    """
+    if trusted_proxies is None:
+        trusted_proxies = CHAT_TRUSTED_PROXY_COUNT
+    remote = request.META.get("REMOTE_ADDR", "unknown")
+    if trusted_proxies <= 0:
+        return remote
+    forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+    if len(forwarded) < trusted_proxies:
+        return forwarded[0] if forwarded else remote
+    return forwarded[-trusted_proxies]
+
+
+def client_id(request, user=None):
+    """User login jika ada, selain itu IP client (lihat client_ip)."""
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+class ChatLimited(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ---------- Token bucket ----------
+
+def take_token(key, rate_per_minute, burst, now=None):
+    """
+    Ambil satu token dari bucket `key`.
+    Returns: 0 jika berhasil, selain itu detik sampai token berikutnya tersedia.
+    """
+    if not rate_per_minute or not burst:
+        return 0
+    cache = _cache()
+    rate = rate_per_minute / 60.0
+    lock_key = f"{key}:lock"
+
+    # Read-modify-write dijaga lock singkat (cache.add atomik di semua backend).
+    # Lock yang terus direbut justru tanda burst: minta client mencoba lagi
+    deadline = time.monotonic() + 0.2
+    while not cache.add(lock_key, 1, BUCKET_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            return 1 / rate
+        time.sleep(0.005)
+
+    try:
+        now = now if now is not None else time.time()
+        tokens, updated = cache.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        cache.set(key, (tokens - 1, now), timeout=int(burst / rate) + 60)
+        return 0
+    finally:
+        cache.delete(lock_key)
+
+
+# ---------- Slot konkurensi ----------
+
+def _window_keys(key, now=None):
+    """Key counter jendela sekarang dan sebelumnya."""
+    window = int((now if now is not None else time.time()) // CHAT_SLOT_TTL)
+    return [f"{key}:{window}", f"{key}:{window - 1}"]
+
+
+def _try_slot(key, limit):
+    """
+    Returns: key counter yang dinaikkan ("" jika tanpa batas), atau None jika penuh.
+    TTL counter tidak pernah diperpanjang, jadi lalu lintas terus-menerus tidak
+    membuat slot bocor bertahan selamanya.
+    """
+    if not limit:
+        return ""
+    current, previous = _window_keys(key)
+    in_use = _incr(current, timeout=CHAT_SLOT_TTL * 2) + (_cache().get(previous) or 0)
+    if in_use <= limit:
+        return current
+    _release_slot(current)
+    return None
+
+
+def _release_slot(counter_key):
+    if not counter_key:
+        return
+    try:
+        if _cache().decr(counter_key) < 0:
+            _cache().set(counter_key, 0, CHAT_SLOT_TTL * 2)
+    except ValueError:
+        pass  # sudah kedaluwarsa
+
+
+class ChatSlot:
+    """Slot yang diperoleh acquire_chat_slot; wajib release() tepat sekali."""
+
+    def __init__(self, counter_keys):
+        self.counter_keys = counter_keys
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        for counter_key in self.counter_keys:
+            _release_slot(counter_key)
+
+
+def _try_acquire(client):
+    """Returns: ChatSlot, atau raise ChatLimited."""
+    client_key = _try_slot(f"chat-limit:slots:client:{client}", CHAT_MAX_CONCURRENT_PER_CLIENT)
+    if client_key is None:
+        raise ChatLimited("shed_client_concurrency", 1)
+    global_key = _try_slot("chat-limit:slots:global", CHAT_MAX_CONCURRENT)
+    if global_key is None:
+        _release_slot(client_key)
+        raise ChatLimited("shed_concurrency", 1)
+    slot = ChatSlot([client_key, global_key])
+
+    # Token diambil setelah slot didapat, jadi menunggu di antrean tidak menghabiskan kuota
+    wait = take_token(f"chat-limit:bucket:client:{client}", CHAT_RATE_PER_MINUTE, CHAT_RATE_BURST)
+    if wait:
+        slot.release()
+        raise ChatLimited("shed_client_rate", wait)
+    wait = take_token("chat-limit:bucket:global", CHAT_GLOBAL_RATE_PER_MINUTE, CHAT_GLOBAL_RATE_BURST)
+    if wait:
+        slot.release()
+        raise ChatLimited("shed_rate", wait)
+    return slot
+
+
+def _queueable(error, remaining):
+    # Batas rate per client tidak diantrekan: itu justru yang ingin dibatasi
+    if error.reason == "shed_client_rate":
+        return False
+    if error.reason == "shed_rate":
+        return error.retry_after <= remaining
+    return True
+
+
+def acquire_chat_slot(request, queue_timeout=CHAT_QUEUE_TIMEOUT):
+    client = client_id(request, getattr(request, "user", None))
+    deadline = time.monotonic() + queue_timeout
+    queued = False
+    while True:
+        try:
+            slot = _try_acquire(client)
+        except ChatLimited as error:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not _queueable(error, remaining):
+                record_stat(error.reason)
+                raise
+            queued = True
+            time.sleep(min(QUEUE_POLL_INTERVAL, remaining))
+            continue
+        record_stat("admitted")
+        if queued:
+            record_stat("queued")
+        return slot
+
+
+async def aacquire_chat_slot(request, queue_timeout=CHAT_QUEUE_TIMEOUT):
+    """
+    Versi async. Operasi cache (termasuk spin-wait lock bucket) berjalan di
+    thread lewat sync_to_async, dan antrean menunggu dengan asyncio.sleep.
+    """
+    client = client_id(request, await request.auser() if hasattr(request, "auser") else None)
+    try_acquire = sync_to_async(_try_acquire, thread_sensitive=False)
+    arecord_stat = sync_to_async(record_stat, thread_sensitive=False)
+    deadline = time.monotonic() + queue_timeout
+    queued = False
+    while True:
+        try:
+            slot = await try_acquire(client)
+        except ChatLimited as error:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not _queueable(error, remaining):
+                await arecord_stat(error.reason)
+                raise
+            queued = True
+            await asyncio.sleep(min(QUEUE_POLL_INTERVAL, remaining))
+            continue
+        await arecord_stat("admitted")
+        if queued:
+            await arecord_stat("queued")
+        return slot
+
+
+def limited_response(error):
+    response = JsonResponse(
+        {"error": "Terlalu banyak permintaan chat, coba lagi sebentar lagi", "reason": error.reason},
+        status=429,
+    )
+    response["Retry-After"] = str(max(1, math.ceil(error.retry_after)))
+    return response
+
+
+class _ReleaseAfter:
+    """
+    Iterator SSE yang melepas slot saat stream habis, error, atau ditutup.
+    Sengaja bukan generator: generator yang ditutup sebelum sempat berjalan
+    (client putus sebelum chunk pertama) tidak pernah menjalankan `finally`.
+    """
+
+    def __init__(self, events, slot):
+        self.events = events
+        self.slot = slot
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.events)
+        except BaseException:
+            self.slot.release()
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self.events, "close", None)
+            if close:
+                close()
+        finally:
+            self.slot.release()
+
+
+class _AsyncReleaseAfter:
+    def __init__(self, events, slot):
+        self.events = events
+        self.slot = slot
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.events.__anext__()
+        except BaseException:
+            await sync_to_async(self.slot.release, thread_sensitive=False)()
+            raise
+
+    def close(self):
+        # Dipanggil handler ASGI lewat sync_to_async setelah response selesai/terputus
+        self.slot.release()
+
+
+def release_after(events, slot):
+    """Bungkus generator SSE supaya slot dilepas saat stream selesai/terputus."""
+    return _ReleaseAfter(events, slot)
+
+
+def arelease_after(events, slot):
+    return _AsyncReleaseAfter(events, slot)
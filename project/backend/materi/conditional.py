@@ -0,0 +1,87 @@
+import hashlib
+from functools import wraps
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import MateriUtama, SubMateri, MateriFile
+
+
+def _latest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def _etag(request, *parts):
+    # Query string ikut dihitung karena ?fields= / ?include= mengubah isi response
+    raw = "|".join(str(p) for p in parts) + "|" + request.GET.urlencode()
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def materi_version(request, materi_slug):
+    row = (
+        MateriUtama.objects.filter(slug=materi_slug)
+        .annotate(
+            sub_count=Count("submateri", distinct=True),
+            sub_updated=Max("submateri__updated_at"),
+            file_count=Count("submateri__files", distinct=True),
+            file_updated=Max("submateri__files__updated_at"),
+        )
+        .values("id", "updated_at", "sub_count", "sub_updated", "file_count", "file_updated")
+        .first()
+    )
+    if row is None:
+        return None, None
+    etag = _etag(request, *row.values())
+    return etag, _latest(row["updated_at"], row["sub_updated"], row["file_updated"])
+
+
+def submateri_version(request, materi_slug, sub_slug):
+    row = (
+        SubMateri.objects.filter(parent__slug=materi_slug, slug=sub_slug)
+        .annotate(
+            file_count=Count("files"),
+            file_updated=Max("files__updated_at"),
+        )
+        .values("id", "updated_at", "file_count", "file_updated")
+        .first()
+    )
+    if row is None:
+        return None, None
+    etag = _etag(request, *row.values())
+    return etag, _latest(row["updated_at"], row["file_updated"])
+
+
+def materi_file_version(request, pk):
+    row = MateriFile.objects.filter(pk=pk).values("id", "updated_at").first()
+    if row is None:
+        return None, None
+    return _etag(request, *row.values()), row["updated_at"]
+
+
+def conditional_get(version_func, max_age=0):
+    """
+    ETag + Last-Modified dari kolom versi (tanpa serialisasi), balas 304 untuk
+    If-None-Match / If-Modified-Since, dan tambahkan Cache-Control pada GET
+    supaya frontend/CDN melakukan revalidasi alih-alih mengunduh ulang.
+    """
+    def decorator(view):
+        def get_version(request, *args, **kwargs):
+            if not hasattr(request, "_content_version"):
+                request._content_version = version_func(request, *args, **kwargs)
+            return request._content_version
+
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: get_version(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs: get_version(request, *args, **kwargs)[1],
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=max_age, must_revalidate=True)
+            return response
+
+        return wrapper
+
+    return decorator
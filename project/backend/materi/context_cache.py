@@ -0,0 +1,51 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from .models import SubMateri
+
+CONTEXT_CACHE_ALIAS = getattr(settings, "MATERI_CONTEXT_CACHE_ALIAS", "default")
+CONTEXT_CACHE_TIMEOUT = getattr(settings, "MATERI_CONTEXT_CACHE_TIMEOUT", 60 * 60)
+
+
+def context_version(materi, sub_slug=None):
+    """
+    Versi konten satu materi (atau satu submateri), dihitung dengan satu query
+    agregat. Berubah setiap kali materi, SubMateri atau MateriFile di bawahnya berubah.
+    """
+    subs = SubMateri.objects.filter(parent=materi)
+    if sub_slug:
+        subs = subs.filter(slug=sub_slug)
+
+    agg = subs.aggregate(
+        sub_count=Count("id", distinct=True),
+        sub_updated=Max("updated_at"),
+        file_count=Count("files", distinct=True),
+        file_max_id=Max("files__id"),
+        file_updated=Max("files__updated_at"),
+        extracted_at=Max("files__extracted__extracted_at"),
+    )
+    raw = "|".join([
+        str(materi.pk), materi.judul, materi.deskripsi or "",
+        str(agg["sub_count"]), str(agg["sub_updated"]),
+        str(materi.updated_at),
+        str(agg["file_count"]), str(agg["file_max_id"]), str(agg["file_updated"]),
+        str(agg["extracted_at"]),
+    ])
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def cached_context(kind, materi, sub_slug, builder):
+    """
+    Kembalikan builder() dari cache selama versi konten belum berubah.
+    Entri versi lama tidak dihapus, tetapi tergeser oleh eviction backend cache.
+    """
+    cache = caches[CONTEXT_CACHE_ALIAS]
+    version = context_version(materi, sub_slug)
+    key = f"materi-context:{kind}:{materi.pk}:{sub_slug or '-'}:{version}"
+
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, CONTEXT_CACHE_TIMEOUT)
+    return value
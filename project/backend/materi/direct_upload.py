@@ -0,0 +1,154 @@
+import math
+import uuid
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+from storages.utils import clean_name
+
+# Upload langsung browser -> S3 (Supabase) lewat presigned URL, tanpa
+# melewati worker Django. Alur: init -> PUT ke URL (atau per part) -> complete.
+DIRECT_UPLOAD_EXPIRES = getattr(settings, "MATERI_DIRECT_UPLOAD_EXPIRES", 3600)
+DIRECT_UPLOAD_MAX_BYTES = getattr(settings, "MATERI_DIRECT_UPLOAD_MAX_BYTES", 2 * 1024 ** 3)
+MULTIPART_THRESHOLD = getattr(settings, "MATERI_DIRECT_UPLOAD_MULTIPART_THRESHOLD", 64 * 1024 * 1024)
+MULTIPART_PART_SIZE = getattr(settings, "MATERI_DIRECT_UPLOAD_PART_SIZE", 16 * 1024 * 1024)
+TOKEN_SALT = "materi.direct_upload"
+
+UPLOAD_PREFIXES = {
+    "file": "materi/files/",
+    "image": "uploads/",
+}
+
+
+class DirectUploadError(Exception):
+    pass
+
+
+def _s3(storage):
+    if not hasattr(storage, "bucket"):
+        raise DirectUploadError("Upload langsung hanya tersedia untuk storage S3")
+    return storage.bucket.meta.client, storage.bucket_name
+
+
+def _object_key(storage, name):
+    return storage._normalize_name(clean_name(name))
+
+
+def storage_name(kind, filename):
+    # uuid, bukan timestamp: dua upload dalam detik yang sama tidak boleh berbagi key
+    filename = get_valid_filename(filename.rsplit("/", 1)[-1]) or "file"
+    return f"{UPLOAD_PREFIXES[kind]}{uuid.uuid4().hex}_{filename}"
+
+
+def init_upload(kind, filename, size, content_type="", storage=default_storage):
+    """
+    Siapkan upload langsung. File kecil mendapat satu presigned PUT; file
+    >= MULTIPART_THRESHOLD mendapat multipart upload dengan presigned URL per
+    part. `token` (ditandatangani) wajib dikirim balik ke complete_upload.
+    """
+    if kind not in UPLOAD_PREFIXES:
+        raise DirectUploadError(f"Jenis upload tidak dikenal: {kind}")
+    if kind == "image" and not content_type.startswith("image/"):
+        raise DirectUploadError("content_type harus image/*")
+    if size <= 0 or size > DIRECT_UPLOAD_MAX_BYTES:
+        raise DirectUploadError(f"Ukuran file harus 1..{DIRECT_UPLOAD_MAX_BYTES} byte")
+
+    client, bucket = _s3(storage)
+    name = storage_name(kind, filename)
+    key = _object_key(storage, name)
+    params = {"Bucket": bucket, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+
+    payload = {"name": name, "kind": kind, "size": size}
+    if size < MULTIPART_THRESHOLD:
+        upload = {
+            "method": "PUT",
+            "url": client.generate_presigned_url("put_object", Params=params, ExpiresIn=DIRECT_UPLOAD_EXPIRES),
+            "headers": {"Content-Type": content_type} if content_type else {},
+        }
+    else:
+        upload_id = client.create_multipart_upload(**params)["UploadId"]
+        payload["upload_id"] = upload_id
+        part_count = math.ceil(size / MULTIPART_PART_SIZE)
+        upload = {
+            "method": "MULTIPART",
+            "part_size": MULTIPART_PART_SIZE,
+            "parts": [
+                {
+                    "part_number": number,
+                    "url": client.generate_presigned_url(
+                        "upload_part",
+                        Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                        ExpiresIn=DIRECT_UPLOAD_EXPIRES,
+                    ),
+                }
+                for number in range(1, part_count + 1)
+            ],
+        }
+
+    return {
+        "path": name,
+        "token": signing.dumps(payload, salt=TOKEN_SALT),
+        "expires_in": DIRECT_UPLOAD_EXPIRES,
+        **upload,
+    }
+
+
+def read_token(token, kind=None):
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=DIRECT_UPLOAD_EXPIRES * 2)
+    except signing.BadSignature:
+        raise DirectUploadError("Token upload tidak valid atau kedaluwarsa")
+    if kind and payload["kind"] != kind:
+        raise DirectUploadError(f"Token bukan untuk upload {kind}")
+    return payload
+
+
+def complete_upload(token, parts=None, kind=None, storage=default_storage):
+    """
+    Selesaikan multipart upload (bila ada) lalu pastikan objek benar-benar ada
+    di bucket. `parts`: [{"part_number": 1, "etag": "..."}] dari respons PUT.
+    Returns: nama storage yang bisa langsung diisikan ke FileField.
+    """
+    payload = read_token(token, kind)
+    client, bucket = _s3(storage)
+    key = _object_key(storage, payload["name"])
+
+    if payload.get("upload_id"):
+        if not parts:
+            raise DirectUploadError("parts wajib untuk multipart upload")
+        try:
+            client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=payload["upload_id"],
+                MultipartUpload={"Parts": sorted(
+                    ({"PartNumber": int(p["part_number"]), "ETag": p["etag"]} for p in parts),
+                    key=lambda p: p["PartNumber"],
+                )},
+            )
+        except ClientError as err:
+            raise DirectUploadError(f"Gagal menyelesaikan multipart upload: {err}")
+
+    try:
+        head = client.head_object(Bucket=bucket, Key=key)
+    except ClientError:
+        raise DirectUploadError("Objek belum ada di storage")
+    # Ukuran dari init sudah divalidasi; objek yang berbeda ukurannya ditolak
+    if head["ContentLength"] != payload["size"]:
+        storage.delete(payload["name"])
+        raise DirectUploadError("Ukuran file tidak sesuai dengan yang didaftarkan")
+
+    return payload["name"]
+
+
+def abort_upload(token, storage=default_storage):
+    payload = read_token(token)
+    if not payload.get("upload_id"):
+        return
+    client, bucket = _s3(storage)
+    client.abort_multipart_upload(
+        Bucket=bucket, Key=_object_key(storage, payload["name"]), UploadId=payload["upload_id"]
+    )
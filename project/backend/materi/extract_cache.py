@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from .file_utils import extract_file_details, is_extraction_error, EXTRACTOR_VERSION
+from .models import FileContentCache
+
+# Batas total ukuran teks yang disimpan di cache (byte)
+EXTRACT_CACHE_MAX_BYTES = getattr(settings, "MATERI_EXTRACT_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+
+
+def file_etag(file_field):
+    """
+    ETag objek di storage tanpa mengunduh isinya.
+    S3 -> HEAD object, storage lain -> ukuran + waktu modifikasi.
+    """
+    storage = file_field.storage
+    name = file_field.name
+
+    if hasattr(storage, "blob_etag"):
+        return storage.blob_etag(name)
+
+    if hasattr(storage, "bucket"):
+        from storages.utils import clean_name
+        obj = storage.bucket.Object(storage._normalize_name(clean_name(name)))
+        return obj.e_tag.strip('"')
+
+    modified = storage.get_modified_time(name)
+    return f"{storage.size(name)}-{int(modified.timestamp())}"
+
+
+def cached_extract_file_details(file_field, extractor=extract_file_details):
+    """
+    Versi ber-cache dari extract_file_details. `extractor` bisa diganti,
+    mis. untuk mem-parse di process pool (lihat extraction.py).
+    """
+    if not file_field:
+        return extractor(file_field)
+
+    try:
+        etag = file_etag(file_field)
+    except Exception as e:
+        print(f"Error reading ETag {file_field.name}: {e}")
+        return extractor(file_field)
+
+    lookup = {
+        "storage_name": file_field.name,
+        "etag": etag,
+        "extractor_version": EXTRACTOR_VERSION,
+    }
+    entry = (
+        FileContentCache.objects.filter(**lookup)
+        .only("pk", "text", "image_urls", "page_count", "page_offsets", "truncated")
+        .first()
+    )
+    if entry:
+        FileContentCache.objects.filter(pk=entry.pk).update(accessed_at=timezone.now())
+        return {
+            "text": entry.text,
+            "image_urls": entry.image_urls,
+            "page_count": entry.page_count,
+            "page_offsets": entry.page_offsets,
+            "truncated": entry.truncated,
+        }
+
+    details = extractor(file_field)
+
+    # Jangan simpan pesan error, supaya request berikutnya mencoba lagi
+    if is_extraction_error(details["text"]):
+        return details
+
+    FileContentCache.objects.update_or_create(
+        **lookup,
+        defaults={
+            "text": details["text"],
+            "image_urls": details["image_urls"],
+            "page_count": details["page_count"],
+            "page_offsets": details["page_offsets"],
+            "truncated": details["truncated"],
+            "size": len(details["text"].encode("utf-8")),
+            "accessed_at": timezone.now(),
+        },
+    )
+    evict_extract_cache()
+    return details
+
+
+def evict_extract_cache(max_bytes=None):
+    """Hapus entri yang paling lama tidak diakses sampai total ukuran di bawah batas."""
+    if max_bytes is None:
+        max_bytes = EXTRACT_CACHE_MAX_BYTES
+
+    total = FileContentCache.objects.aggregate(total=Sum("size"))["total"] or 0
+    if total <= max_bytes:
+        return 0
+
+    stale_ids = []
+    for pk, size in FileContentCache.objects.order_by("accessed_at").values_list("pk", "size").iterator():
+        if total <= max_bytes:
+            break
+        stale_ids.append(pk)
+        total -= size
+
+    FileContentCache.objects.filter(pk__in=stale_ids).delete()
+    return len(stale_ids)
+
+
+def invalidate_extract_cache(storage_name):
+    """Buang semua entri cache milik satu file storage."""
+    if storage_name:
+        FileContentCache.objects.filter(storage_name=storage_name).delete()
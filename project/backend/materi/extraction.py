@@ -0,0 +1,170 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from .extract_cache import cached_extract_file_details
+from .file_utils import EXTRACTOR_VERSION, extract_file_details, is_extraction_error
+from .models import ExtractedContent
+
+# Jumlah thread untuk unduh + ekstrak file secara paralel
+EXTRACT_THREADS = getattr(settings, "MATERI_EXTRACT_THREADS", 4)
+# > 0: parsing PDF/PPTX (berat di CPU) dijalankan di process pool
+EXTRACT_PROCESSES = getattr(settings, "MATERI_EXTRACT_PROCESSES", 0)
+# Batas waktu per file (detik) sebelum diganti placeholder
+EXTRACT_TIMEOUT = getattr(settings, "MATERI_EXTRACT_TIMEOUT", 20)
+
+PROCESS_EXTENSIONS = (".pdf", ".pptx")
+
+_thread_pool = None
+_process_pool = None
+
+
+def _get_thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=EXTRACT_THREADS, thread_name_prefix="materi-extract")
+    return _thread_pool
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=EXTRACT_PROCESSES)
+    return _process_pool
+
+
+def _parse_bytes(filename, data):
+    # Dijalankan di process pool: hanya parsing, tanpa akses database/storage
+    return extract_file_details(ContentFile(data, name=filename))
+
+
+def _extract_in_process(file_field):
+    with file_field.open("rb") as f:
+        data = f.read()
+    return _get_process_pool().submit(_parse_bytes, file_field.name, data).result()
+
+
+def _extractor_for(file_field):
+    ext = os.path.splitext(file_field.name.lower())[1]
+    if EXTRACT_PROCESSES and ext in PROCESS_EXTENSIONS:
+        return _extract_in_process
+    return extract_file_details
+
+
+def is_extraction_stale(materi_file):
+    """True jika file belum pernah diekstrak, gagal diekstrak, sudah diganti, atau versi extractor naik."""
+    try:
+        extracted = materi_file.extracted
+    except ExtractedContent.DoesNotExist:
+        return True
+    return (
+        bool(extracted.error)
+        or extracted.source_name != materi_file.file.name
+        or extracted.extractor_version != EXTRACTOR_VERSION
+    )
+
+
+def extract_and_store(materi_file):
+    """
+    Ekstrak isi file lalu simpan ke ExtractedContent. Jika gagal, pesan error
+    disimpan di `error` (teks kosong) sehingga file dicoba lagi lain kali.
+    """
+    details = cached_extract_file_details(materi_file.file, extractor=_extractor_for(materi_file.file))
+    error = details["text"] if is_extraction_error(details["text"]) else ""
+    extracted, _ = ExtractedContent.objects.update_or_create(
+        materi_file=materi_file,
+        defaults={
+            "source_name": materi_file.file.name,
+            "text": "" if error else details["text"],
+            "image_urls": details["image_urls"],
+            "char_count": 0 if error else len(details["text"]),
+            "page_count": details["page_count"],
+            "page_offsets": details["page_offsets"],
+            "truncated": details["truncated"],
+            "error": error,
+            "extractor_version": EXTRACTOR_VERSION,
+        },
+    )
+    materi_file.extracted = extracted
+    return extracted
+
+
+def get_extracted_content(materi_file):
+    """
+    Ambil hasil ekstraksi yang tersimpan. File lama yang belum di-backfill
+    diekstrak sekali di sini lalu disimpan.
+    """
+    if is_extraction_stale(materi_file):
+        return extract_and_store(materi_file)
+    return materi_file.extracted
+
+
+def _placeholder(materi_file, reason):
+    """
+    ExtractedContent sementara (tidak disimpan) untuk file yang gagal/terlalu lama.
+    `error` terisi sehingga pemanggil bisa membedakannya dari isi file asli.
+    """
+    name = os.path.basename(materi_file.file.name)
+    return ExtractedContent(
+        materi_file=materi_file,
+        source_name=materi_file.file.name,
+        text=f"[File {name} belum bisa dibaca: {reason}]",
+        error=reason,
+    )
+
+
+def extract_many(materi_files, timeout=EXTRACT_TIMEOUT, force=False):
+    """
+    Ambil hasil ekstraksi banyak file sekaligus. File yang belum/usang (atau
+    semua file jika `force`) diekstrak paralel di thread pool; file yang gagal
+    atau melewati `timeout` detik (dihitung sejak mulai diproses) diganti
+    placeholder dengan `error` terisi.
+    Ekstraksi yang terlambat tetap disimpan di background untuk request berikutnya.
+    Returns: {materi_file.pk: ExtractedContent} sesuai urutan `materi_files`
+    """
+    materi_files = list(materi_files)
+    results = {}
+    pending = {}
+    started = {}
+
+    def run(materi_file):
+        started[materi_file.pk] = time.monotonic()
+        try:
+            return extract_and_store(materi_file)
+        finally:
+            connection.close()
+
+    for materi_file in materi_files:
+        if force or is_extraction_stale(materi_file):
+            pending[_get_thread_pool().submit(run, materi_file)] = materi_file
+        else:
+            results[materi_file.pk] = materi_file.extracted
+
+    submitted_at = time.monotonic()
+    while pending:
+        done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+        for future in done:
+            materi_file = pending.pop(future)
+            try:
+                extracted = future.result()
+                if extracted.error:
+                    raise RuntimeError(extracted.error)
+                results[materi_file.pk] = extracted
+            except Exception as e:
+                print(f"Error extracting file {materi_file.file.name}: {e}")
+                results[materi_file.pk] = _placeholder(materi_file, "terjadi kesalahan")
+
+        if timeout is None:
+            continue
+        now = time.monotonic()
+        for future, materi_file in list(pending.items()):
+            # File yang masih antre juga dibatasi agar request tidak menggantung
+            if now - started.get(materi_file.pk, submitted_at) > timeout:
+                future.cancel()
+                pending.pop(future)
+                results[materi_file.pk] = _placeholder(materi_file, "waktu habis")
+
+    # Urutan hasil tidak bergantung pada file mana yang selesai lebih dulu
+    return {f.pk: results[f.pk] for f in materi_files}
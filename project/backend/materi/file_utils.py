@@ -5,23 +5,135 @@ from pptx import Presentation
 import docx
 import openpyxl
 import csv
-import io
+import codecs
 import traceback
 from .helper import supabase_signed_to_public
 
 # Ensure mimetypes are initialized
 mimetypes.init()
 
+# Naikkan setiap kali logika ekstraksi berubah agar hasil lama tidak dipakai lagi
+EXTRACTOR_VERSION = 4
+
+# Media/arsip tidak punya teks yang bisa diekstrak: jangan diunduh sama sekali
+NON_EXTRACTABLE_MIME_PREFIXES = ("video/", "audio/")
+NON_EXTRACTABLE_EXTENSIONS = (".zip", ".rar", ".7z", ".gz", ".tar", ".exe", ".dmg", ".iso", ".apk")
+
+
+def is_extractable(name):
+    """False untuk file yang isinya tidak mungkin diekstrak (video, audio, arsip)."""
+    name = (name or "").lower()
+    mime_type, _ = mimetypes.guess_type(name)
+    if mime_type and mime_type.startswith(NON_EXTRACTABLE_MIME_PREFIXES):
+        return False
+    return not name.endswith(NON_EXTRACTABLE_EXTENSIONS)
+
+
+def is_extraction_error(text):
+    """True jika `text` adalah pesan error extract_file_details, bukan isi file."""
+    return text.startswith("[Error")
+
+
+def iter_pdf_pages(reader):
+    """
+    Generator (nomor_halaman, teks) dari PdfReader; halaman di-parse satu per
+    satu saat diiterasi. Nomor halaman dimulai dari 1.
+    """
+    for i in range(len(reader.pages)):
+        yield i + 1, reader.pages[i].extract_text() or ""
+
+
+def extract_pdf_text(f):
+    """
+    Ekstrak teks PDF halaman demi halaman. Seluruh dokumen disimpan; batas
+    karakter untuk prompt chat diterapkan saat konteks dibangun (select_chunks).
+    Returns: (text, page_count, page_offsets) dengan page_offsets berisi
+    {"page", "start", "end"} posisi karakter tiap halaman di `text`.
+    """
+    reader = PdfReader(f)
+
+    parts = []
+    page_offsets = []
+    length = 0
+    for page_no, page_text in iter_pdf_pages(reader):
+        if not page_text:
+            continue
+        if parts:
+            length += 2  # separator "\n\n"
+        page_offsets.append({"page": page_no, "start": length, "end": length + len(page_text)})
+        parts.append(page_text)
+        length += len(page_text)
+
+    return "\n\n".join(parts), len(reader.pages), page_offsets
+
+# Tabel (xlsx/csv) besar diringkas: header + contoh baris + jumlah baris
+TABLE_SAMPLE_ROWS = 50
+TABLE_MAX_COLS = 30
+TABLE_MAX_CELL_CHARS = 200
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+
+def summarize_table(rows, separator):
+    """
+    Baca `rows` (iterable list string) secara streaming. Tabel kecil dikembalikan
+    apa adanya; tabel yang lebih dari TABLE_SAMPLE_ROWS baris diringkas menjadi
+    jumlah baris + header + contoh baris. Kolom dan panjang sel dibatasi.
+    Returns: list baris teks
+    """
+    lines = []
+    total = 0
+    for row in rows:
+        cells = [cell[:TABLE_MAX_CELL_CHARS] for cell in row[:TABLE_MAX_COLS]]
+        if not any(cells):
+            continue
+        total += 1
+        if total <= TABLE_SAMPLE_ROWS:
+            lines.append(separator.join(cells))
+
+    if total > TABLE_SAMPLE_ROWS:
+        lines.insert(0, f"Jumlah baris: {total} (ditampilkan {TABLE_SAMPLE_ROWS} baris pertama)")
+        lines.append(f"... ({total - TABLE_SAMPLE_ROWS} baris lainnya tidak ditampilkan)")
+    return lines
+
+
+def open_text_stream(f):
+    """
+    Bungkus file biner menjadi stream teks yang di-decode bertahap.
+    Encoding ditebak dari potongan awal file: UTF-8 jika valid, selain itu latin-1.
+    """
+    sample = f.read(ENCODING_SNIFF_BYTES)
+    f.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "latin-1"
+    return codecs.getreader(encoding)(f, errors="replace")
+
+
 def extract_file_content(file_field):
     """
     Extracts text and image URLs from a Django FileField.
     Returns: (text_content, image_urls)
     """
+    details = extract_file_details(file_field)
+    return details["text"], details["image_urls"]
+
+
+def extract_file_details(file_field):
+    """
+    Seperti extract_file_content, ditambah jumlah halaman/slide/sheet.
+    Returns: {"text": str, "image_urls": list, "page_count": int | None,
+    "page_offsets": list, "truncated": bool}
+    """
     text_content = ""
     image_urls = []
+    page_count = None
+    page_offsets = []
+    truncated = False
     
     if not file_field:
-        return text_content, image_urls
+        return {"text": text_content, "image_urls": image_urls, "page_count": page_count, "page_offsets": page_offsets, "truncated": truncated}
 
     try:
         filename = file_field.name.lower()
@@ -38,7 +150,22 @@ def extract_file_content(file_field):
                 public_url = supabase_signed_to_public(file_field.url)
                 if public_url:
                     image_urls.append(public_url)
-            return f"[Gambar: {os.path.basename(filename)}]", image_urls
+            return {
+                "text": f"[Gambar: {os.path.basename(filename)}]",
+                "image_urls": image_urls,
+                "page_count": page_count,
+                "page_offsets": page_offsets,
+                "truncated": truncated,
+            }
+
+        if not is_extractable(filename):
+            return {
+                "text": f"[File: {os.path.basename(filename)} (Type: {file_ext}) - Content not extractable]",
+                "image_urls": image_urls,
+                "page_count": page_count,
+                "page_offsets": page_offsets,
+                "truncated": truncated,
+            }
 
         # Open file in appropriate mode
         # Note: file_field.open() usually returns file-like object.
@@ -46,14 +173,8 @@ def extract_file_content(file_field):
         
         if file_ext == ".pdf":
             with file_field.open('rb') as f:
-                reader = PdfReader(f)
-                pdf_text = []
-                for i, page in enumerate(reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        # Just append the text, skip "Page X" prefix for cleaner TTS
-                        pdf_text.append(page_text)
-                text_content = "\n\n".join(pdf_text)
+                # Just append the text, skip "Page X" prefix for cleaner TTS
+                text_content, page_count, page_offsets = extract_pdf_text(f)
 
         elif file_ext == ".docx":
             with file_field.open('rb') as f:
@@ -63,6 +184,7 @@ def extract_file_content(file_field):
         elif file_ext == ".pptx":
             with file_field.open('rb') as f:
                 prs = Presentation(f)
+                page_count = len(prs.slides)
                 slides_text = []
                 for i, slide in enumerate(prs.slides):
                     slide_text = []
@@ -81,41 +203,27 @@ def extract_file_content(file_field):
 
         elif file_ext == ".xlsx":
             with file_field.open('rb') as f:
-                wb = openpyxl.load_workbook(f, data_only=True)
-                sheets_text = []
-                for sheet in wb.worksheets:
-                    sheet_data = []
-                    sheet_data.append(f"Sheet: {sheet.title}")
-                    # Simple extraction: iterate rows
-                    for row in sheet.iter_rows(values_only=True):
+                # read_only: baris dibaca streaming, memori tidak tumbuh dengan ukuran sheet
+                wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
+                try:
+                    page_count = len(wb.sheetnames)
+                    sheets_text = []
+                    for sheet in wb.worksheets:
                         # Filter out None values
-                        row_data = [str(cell) for cell in row if cell is not None]
-                        if row_data:
-                            sheet_data.append("\t".join(row_data))
-                    sheets_text.append("\n".join(sheet_data))
-                text_content = "\n\n".join(sheets_text)
+                        rows = (
+                            [str(cell) for cell in row if cell is not None]
+                            for row in sheet.iter_rows(values_only=True)
+                        )
+                        sheet_lines = summarize_table(rows, "\t")
+                        sheets_text.append("\n".join([f"Sheet: {sheet.title}"] + sheet_lines))
+                    text_content = "\n\n".join(sheets_text)
+                finally:
+                    wb.close()
 
         elif file_ext == ".csv":
-            # CSV needs text mode, but safe to read bytes and decode
-            with file_field.open('r') as f:
-                # If 'r' returns string (if backed by file), great. 
-                # If bytes, we need to decode. 
-                # Safe approach: read bytes, decode, then use io.StringIO
-                pass
-            
             with file_field.open('rb') as f:
-                content_bytes = f.read()
-                try:
-                    content_str = content_bytes.decode('utf-8')
-                except:
-                    content_str = content_bytes.decode('latin-1', errors='replace')
-                
-                f_io = io.StringIO(content_str)
-                reader = csv.reader(f_io)
-                rows = []
-                for row in reader:
-                    rows.append(", ".join(row))
-                text_content = "\n".join(rows)
+                reader = csv.reader(open_text_stream(f))
+                text_content = "\n".join(summarize_table(reader, ", "))
         
         elif file_ext == ".txt" or file_ext in ['.py', '.js', '.html', '.css', '.java', '.c', '.cpp', '.h', '.md', '.json', '.xml', 'sql', '.sh', '.bat']:
              # Read as bytes and decode
@@ -139,6 +247,7 @@ def extract_file_content(file_field):
                      text_content = f.read(10000) # Read first 10k chars
                      if len(text_content) == 10000:
                          text_content += "\n... (truncated)"
+                         truncated = True
             except Exception:
                 text_content = f"[File: {os.path.basename(filename)} (Type: {file_ext}) - Content not extractable]"
 
@@ -147,4 +256,4 @@ def extract_file_content(file_field):
         traceback.print_exc()
         text_content = f"[Error reading file {file_field.name}: {str(e)}]"
 
-    return text_content, image_urls
+    return {"text": text_content, "image_urls": image_urls, "page_count": page_count, "page_offsets": page_offsets, "truncated": truncated}
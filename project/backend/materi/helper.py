@@ -1,4 +1,7 @@
+import hashlib
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
+from django.conf import settings
 from urllib.parse import urlparse
 
 SUPABASE_STORAGE_DOMAIN = "https://rktckjwvjwvhywqsubri.storage.supabase.co"
@@ -23,8 +26,76 @@ def supabase_signed_to_public(url: str):
 
     return url
 
-def extract_text_and_images(html: str):
-    soup = BeautifulSoup(html, "html.parser")
+# Parser untuk extract_text_and_images: "stream" (HTMLParser tanpa membangun
+# tree, paling cepat), "lxml" (butuh paket lxml) atau "html.parser" (BeautifulSoup)
+HTML_PARSER = getattr(settings, "MATERI_HTML_PARSER", "stream")
+
+SKIPPED_TAGS = {"script", "style", "template"}
+# Sama dengan BeautifulSoup: whitespace di dalam tag ini tidak diringkas
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+class _TextAndImages(HTMLParser):
+    """
+    Tag stripper streaming: kumpulkan teks dan src <img> dalam satu pass.
+    Hasilnya sama dengan BeautifulSoup(html, "html.parser").get_text("\n"):
+    teks yang hanya berisi whitespace diringkas menjadi "\n" atau " ", dan
+    isi CDATA ikut diambil.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.image_urls = []
+        self._skip = 0
+        self._preserve = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip += 1
+        elif tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve += 1
+        elif tag == "img":
+            src = dict(attrs).get("src")
+            if src:
+                self.image_urls.append(supabase_signed_to_public(src))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "img":
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in PRESERVE_WHITESPACE_TAGS and self._preserve:
+            self._preserve -= 1
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if not self._preserve and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        self.parts.append(data)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            self.handle_data(data[len("CDATA["):])
+
+
+def _stream_text_and_images(html):
+    parser = _TextAndImages()
+    parser.feed(html)
+    parser.close()
+    return "\n".join(parser.parts).strip(), parser.image_urls
+
+
+def extract_text_and_images(html: str, parser: str = None):
+    parser = parser or HTML_PARSER
+    if parser == "stream":
+        return _stream_text_and_images(html)
+
+    soup = BeautifulSoup(html, parser)
     image_urls = []
 
     for img in soup.find_all("img"):
@@ -34,4 +105,8 @@ def extract_text_and_images(html: str):
         img.decompose()  # hapus img dari teks
 
     clean_text = soup.get_text(separator="\n")
-    return clean_text.strip(), image_urls
\ No newline at end of file
+    return clean_text.strip(), image_urls
+
+
+def isi_hash(html: str):
+    return hashlib.sha256((html or "").encode("utf-8")).hexdigest()
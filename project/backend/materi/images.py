@@ -0,0 +1,101 @@
+import io
+import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .helper import supabase_signed_to_public
+from .models import MateriUtama, SubMateri
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variant_name(name, width, ext):
+    """materi/covers/a.png -> materi/covers/variants/a__w320.webp"""
+    directory, filename = os.path.split(name)
+    root = os.path.splitext(filename)[0]
+    return f"{directory}/variants/{root}__w{width}.{ext}" if directory else f"variants/{root}__w{width}.{ext}"
+
+
+def _flatten(img):
+    # JPEG tidak punya alpha: tempel di atas latar putih
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def generate_variants(name, storage=default_storage):
+    """
+    Buat versi kecil dari gambar `name` (lebar VARIANT_WIDTHS, WebP + JPEG).
+    Orientasi EXIF diterapkan lalu metadata EXIF dibuang. Lebar yang melebihi
+    gambar asli dilewati, kecuali satu varian seukuran aslinya.
+    Returns: {"webp": {"320": "<nama storage>", ...}, "jpg": {...}}
+    """
+    with storage.open(name, "rb") as f:
+        img = Image.open(f)
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    widths = [w for w in VARIANT_WIDTHS if w < img.width] or [img.width]
+    if img.width < VARIANT_WIDTHS[-1] and img.width not in widths:
+        widths.append(img.width)
+
+    variants = {ext: {} for ext in VARIANT_FORMATS}
+    for width in widths:
+        height = max(1, round(img.height * width / img.width))
+        resized = img.resize((width, height), Image.LANCZOS) if width != img.width else img
+
+        for ext, (fmt, options) in VARIANT_FORMATS.items():
+            source = _flatten(resized) if fmt == "JPEG" else resized.convert("RGBA" if "A" in resized.getbands() else "RGB")
+            buf = io.BytesIO()
+            source.save(buf, fmt, **options)
+
+            target = variant_name(name, width, ext)
+            if storage.exists(target):
+                storage.delete(target)
+            variants[ext][str(width)] = storage.save(target, ContentFile(buf.getvalue()))
+
+    return variants
+
+
+def store_variants(obj, variants_field, variants):
+    """
+    Simpan kolom *_variants lewat .update() (tanpa signal), sekaligus menaikkan
+    updated_at objek dan materi induknya supaya ETag/Last-Modified ikut berubah.
+    """
+    now = timezone.now()
+    type(obj).objects.filter(pk=obj.pk).update(**{variants_field: variants, "updated_at": now})
+    if isinstance(obj, SubMateri):
+        MateriUtama.objects.filter(pk=obj.parent_id).update(updated_at=now)
+
+
+def delete_variants(variants, storage=default_storage):
+    for names in (variants or {}).values():
+        for name in names.values():
+            try:
+                storage.delete(name)
+            except Exception as e:
+                print(f"Error deleting variant {name}: {e}")
+
+
+def variant_urls(variants, storage=default_storage):
+    """{"webp": {"320": nama}} -> {"webp": {"320": url publik}}"""
+    return {
+        ext: {width: supabase_signed_to_public(storage.url(name)) for width, name in names.items()}
+        for ext, names in (variants or {}).items()
+    }
+
+
+def smallest_variant_url(variants, storage=default_storage):
+    webp = (variants or {}).get("webp") or {}
+    if not webp:
+        return None
+    width = min(webp, key=int)
+    return supabase_signed_to_public(storage.url(webp[width]))
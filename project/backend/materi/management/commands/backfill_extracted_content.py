@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from materi.extraction import extract_many, is_extraction_stale
+from materi.models import MateriFile
+
+
+class Command(BaseCommand):
+    help = "Ekstrak isi MateriFile yang belum punya ExtractedContent atau sudah usang"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Ekstrak ulang semua file")
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        files = MateriFile.objects.select_related("extracted").order_by("pk")
+        batch = []
+        done = failed = 0
+
+        for materi_file in files.iterator(chunk_size=options["batch_size"]):
+            if options["force"] or is_extraction_stale(materi_file):
+                batch.append(materi_file)
+
+            if len(batch) >= options["batch_size"]:
+                ok, errors = self._extract_batch(batch, options["force"])
+                done, failed = done + ok, failed + errors
+                batch = []
+
+        if batch:
+            ok, errors = self._extract_batch(batch, options["force"])
+            done, failed = done + ok, failed + errors
+
+        self.stdout.write(self.style.SUCCESS(f"{done} file diekstrak"))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"{failed} file gagal diekstrak (dicoba lagi pada backfill berikutnya)"))
+
+    def _extract_batch(self, batch, force):
+        """Returns: (jumlah berhasil, jumlah gagal)"""
+        # Tanpa timeout: backfill boleh menunggu file besar selesai
+        results = extract_many(batch, timeout=None, force=force)
+        done = failed = 0
+        for materi_file in batch:
+            extracted = results[materi_file.pk]
+            if extracted.error:
+                failed += 1
+                self.stderr.write(f"Failed {materi_file.pk}: {materi_file.file.name} ({extracted.error})")
+            else:
+                done += 1
+                self.stdout.write(f"Extracted {materi_file.pk}: {materi_file.file.name}")
+        return done, failed
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from materi.images import generate_variants, store_variants
+from materi.models import MateriUtama, SubMateri
+from materi.response_cache import invalidate_scope
+
+
+class Command(BaseCommand):
+    help = "Buat varian ukuran (WebP + JPEG) untuk cover materi dan gambar submateri yang belum punya"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Buat ulang semua varian")
+
+    def handle(self, *args, **options):
+        done = 0
+
+        covers = MateriUtama.objects.exclude(cover_image="").exclude(cover_image=None)
+        if not options["force"]:
+            covers = covers.filter(cover_variants={})
+        for materi in covers.order_by("pk").iterator():
+            if self._backfill(materi, "cover_image", "cover_variants"):
+                invalidate_scope("list", f"materi:{materi.slug}")
+                done += 1
+
+        images = SubMateri.objects.select_related("parent").exclude(gambar="").exclude(gambar=None)
+        if not options["force"]:
+            images = images.filter(gambar_variants={})
+        for sub in images.order_by("pk").iterator():
+            if self._backfill(sub, "gambar", "gambar_variants"):
+                invalidate_scope(f"materi:{sub.parent.slug}", f"sub:{sub.parent.slug}:{sub.slug}")
+                done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{done} gambar diproses"))
+
+    def _backfill(self, obj, field, variants_field):
+        name = getattr(obj, field).name
+        try:
+            variants = generate_variants(name)
+        except Exception as e:
+            self.stderr.write(f"Gagal {name}: {e}")
+            return False
+
+        # Tanpa signal (reindex), tapi updated_at tetap naik agar ETag berubah
+        store_variants(obj, variants_field, variants)
+        self.stdout.write(f"Variants {name}: {len(variants.get('webp', {}))} ukuran")
+        return True
@@ -0,0 +1,160 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from materi.management.commands.seed_learnhub import seed_slug_prefix
+from materi.models import MateriUtama, SubMateri
+from materi.response_cache import invalidate_scope
+
+ENDPOINTS = ("materi_list", "materi_detail", "submateri_detail")
+MODES = ("cold", "warm")
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class QueryCounter:
+    """execute_wrapper: hitung query SQL di koneksi thread ini."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark materi_list, materi_detail dan submateri_detail lewat Django test Client "
+        "terhadap database aktif (SQLite/Postgres). Melaporkan req/s, latency dan jumlah query SQL. "
+        "Isi data dulu dengan manage.py seed_learnhub."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("endpoints", nargs="*", help=f"Endpoint (kosong = semua): {', '.join(ENDPOINTS)}")
+        parser.add_argument("--requests", type=int, default=200, help="Request per endpoint per mode")
+        parser.add_argument("--concurrency", type=int, default=1, help="Jumlah thread (masing-masing koneksi DB sendiri)")
+        parser.add_argument(
+            "--mode", choices=MODES + ("both",), default="both",
+            help="cold: response cache diinvalidasi sebelum tiap request; warm: cache dipakai (butuh RESPONSE_CACHE_URL)",
+        )
+        parser.add_argument("--prefix", default="", help="Hanya pakai data seed_learnhub dengan --prefix ini")
+        parser.add_argument(
+            "--page-size", type=int, default=settings.API_PAGE_SIZE,
+            help="?page_size untuk materi_list (0 = list penuh tanpa pagination)",
+        )
+        parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+
+    def handle(self, *args, **options):
+        endpoints = options["endpoints"] or list(ENDPOINTS)
+        unknown = [name for name in endpoints if name not in ENDPOINTS]
+        if unknown:
+            raise CommandError(f"Endpoint tidak dikenal: {', '.join(unknown)}")
+
+        subs = SubMateri.objects.select_related("parent").order_by("?")
+        if options["prefix"]:
+            subs = subs.filter(parent__slug__startswith=seed_slug_prefix(options["prefix"]))
+        targets = list(subs.values_list("parent__slug", "slug")[:1000])
+        if not targets:
+            raise CommandError("Belum ada data; jalankan manage.py seed_learnhub")
+
+        modes = MODES if options["mode"] == "both" else (options["mode"],)
+        results = []
+        for name in endpoints:
+            for mode in modes:
+                results.append(self._run(name, mode, targets, options))
+                if not options["json"]:
+                    self.stdout.write(self._format(results[-1]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "database": connection.vendor,
+                "materi": MateriUtama.objects.count(),
+                "submateri": SubMateri.objects.count(),
+                "results": results,
+            }, indent=2))
+
+    def _request_for(self, name, index, targets, options):
+        """Returns: (url, scope response cache)"""
+        materi_slug, sub_slug = targets[index % len(targets)]
+        if name == "materi_list":
+            url = reverse("materi-list")
+            if options["page_size"]:
+                url += f"?page_size={options['page_size']}"
+            return url, "list"
+        if name == "materi_detail":
+            return reverse("materi-detail", args=[materi_slug]), f"materi:{materi_slug}"
+        return reverse("submateri-detail", args=[materi_slug, sub_slug]), f"sub:{materi_slug}:{sub_slug}"
+
+    def _run(self, name, mode, targets, options):
+        host = next((h for h in settings.ALLOWED_HOSTS if not h.startswith(".") and h != "*"), "localhost")
+
+        def worker(indexes):
+            client = Client(HTTP_HOST=host)
+            counter = QueryCounter()
+            samples = []
+            try:
+                with connection.execute_wrapper(counter):
+                    for index in indexes:
+                        url, scope = self._request_for(name, index, targets, options)
+                        if mode == "cold":
+                            invalidate_scope(scope)
+                        before = counter.count
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        samples.append((response.status_code, time.perf_counter() - started, counter.count - before))
+            finally:
+                connection.close()
+            return samples
+
+        # Pemanasan: import, koneksi, dan (mode warm) isi response cache untuk semua target
+        warmup = 1 if name == "materi_list" else min(len(targets), options["requests"])
+        worker(range(warmup))
+
+        concurrency = max(1, options["concurrency"])
+        slices = [range(i, options["requests"], concurrency) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [sample for part in pool.map(worker, slices) for sample in part]
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency * 1000 for _, latency, _ in samples]
+        queries = [count for _, _, count in samples]
+        statuses = {}
+        for code, _, _ in samples:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        return {
+            "endpoint": name,
+            "mode": mode,
+            "database": connection.vendor,
+            "requests": len(samples),
+            "concurrency": concurrency,
+            "rps": round(len(samples) / elapsed, 1) if elapsed else None,
+            "status": statuses,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "mean": round(statistics.fmean(latencies), 2),
+            },
+            "queries": {"mean": round(statistics.fmean(queries), 2), "max": max(queries)},
+        }
+
+    def _format(self, result):
+        lat = result["latency_ms"]
+        return (
+            f"{result['endpoint']:<17} {result['mode']:<5} {result['database']:<10} "
+            f"{result['rps']:>8} req/s  p50 {lat['p50']}ms  p95 {lat['p95']}ms  p99 {lat['p99']}ms  "
+            f"query {result['queries']['mean']} (max {result['queries']['max']})  status {result['status']}"
+        )
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from materi.benchmark import (
+    CASES, compare_to_baseline, environment_info, generate_fixtures, run_case, run_case_subprocess,
+)
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, "benchmarks", "extractors_baseline.json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark extract_file_details / extract_text_and_images dengan fixture sintetis "
+        "(PDF, DOCX, PPTX, XLSX, CSV, HTML). Gagal jika lebih lambat dari baseline melebihi --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("cases", nargs="*", help=f"Kasus (kosong = semua): {', '.join(CASES)}")
+        parser.add_argument("--scale", type=float, default=1.0, help="Pengali ukuran fixture")
+        parser.add_argument("--repeat", type=int, default=3, help="Ulangan per kasus (median dipakai)")
+        parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+        parser.add_argument("--save-baseline", action="store_true", help="Tulis hasil sebagai baseline baru")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Regresi yang ditoleransi (0.25 = 25%%)")
+        parser.add_argument("--in-process", action="store_true", help="Tanpa subprocess (peak RSS tidak per kasus)")
+        parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+        # Internal: dipakai run_case_subprocess
+        parser.add_argument("--run-case", help=argparse.SUPPRESS)
+        parser.add_argument("--fixture", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["run_case"]:
+            report = run_case(options["run_case"], options["fixture"], options["repeat"])
+            self.stdout.write(json.dumps(report))
+            return
+
+        cases = options["cases"] or list(CASES)
+        unknown = [case for case in cases if case not in CASES]
+        if unknown:
+            raise CommandError(f"Kasus tidak dikenal: {', '.join(unknown)}")
+
+        runner = run_case if options["in_process"] else run_case_subprocess
+        results = []
+        with tempfile.TemporaryDirectory(prefix="learnhub-bench-") as directory:
+            formats = sorted({CASES[case] for case in cases})
+            fixtures = generate_fixtures(directory, formats, scale=options["scale"])
+            for case in cases:
+                fixture = fixtures[CASES[case]]
+                report = runner(case, fixture["path"], options["repeat"])
+                report["params"] = fixture["params"]
+                results.append(report)
+                if not options["json"]:
+                    self.stdout.write(self._format(report))
+
+        document = {"scale": options["scale"], "environment": environment_info(), "results": results}
+        if options["json"]:
+            self.stdout.write(json.dumps(document, indent=2))
+
+        if options["save_baseline"]:
+            os.makedirs(os.path.dirname(os.path.abspath(options["baseline"])), exist_ok=True)
+            with open(options["baseline"], "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Baseline disimpan: {options['baseline']}"))
+            return
+
+        if not os.path.exists(options["baseline"]):
+            raise CommandError(f"Baseline {options['baseline']} belum ada; jalankan dengan --save-baseline")
+
+        with open(options["baseline"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != document["environment"]:
+            self.stdout.write(self.style.WARNING("Baseline dibuat di lingkungan berbeda, perbandingan kurang akurat"))
+
+        regressions = compare_to_baseline(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError("Regresi performa:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"Tidak ada regresi > {options['threshold']:.0%} dari baseline"))
+
+    def _format(self, report):
+        pages = f"  {report['pages_per_s']} hal/s" if report["pages_per_s"] else ""
+        rss = f"  peak RSS {report['peak_rss_mb']}MB (+{report['rss_delta_mb']}MB)" if report["peak_rss_mb"] else ""
+        return (
+            f"{report['case']:<18} {report['bytes'] / 1024:>9.0f} KB  {report['median_s']:>8.3f}s"
+            f"  {report['mb_per_s']} MB/s{pages}{rss}"
+        )
+
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from materi.archive import export_materi
+from materi.models import MateriUtama
+
+
+class Command(BaseCommand):
+    help = "Export satu materi (submateri, file, media) ke arsip .zip / .tar / .tar.gz"
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug")
+        parser.add_argument("-o", "--output", help="Path arsip (default: <slug>.tar.gz)")
+
+    def handle(self, *args, **options):
+        try:
+            materi = MateriUtama.objects.get(slug=options["slug"])
+        except MateriUtama.DoesNotExist:
+            raise CommandError(f"Materi '{options['slug']}' tidak ditemukan")
+
+        path = options["output"] or f"{materi.slug}.tar.gz"
+        count = export_materi(materi, path, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"{path}: {count} blob"))
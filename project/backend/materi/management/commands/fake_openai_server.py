@@ -0,0 +1,140 @@
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+
+DEFAULT_REPLY = (
+    "Fotosintesis adalah proses tumbuhan hijau mengubah energi cahaya menjadi energi kimia. "
+    "Klorofil menyerap cahaya, air dipecah, dan karbon dioksida diubah menjadi glukosa serta oksigen."
+)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """POST /v1/chat/completions yang meniru format OpenAI (biasa dan streaming SSE)."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, supaya reuse koneksi client ikut teruji
+    options = {}
+
+    def log_message(self, format, *args):
+        if self.options.get("verbose"):
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "invalid json", "type": "invalid_request_error"}})
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        opts = self.options
+        time.sleep(max(0.0, random.gauss(opts["latency"], opts["jitter"])))
+
+        roll = random.random()
+        if roll < opts["error_rate"]:
+            return self._send_json(500, {"error": {"message": "fake server error", "type": "server_error"}})
+        if roll < opts["error_rate"] + opts["rate_limit_rate"]:
+            return self._send_json(
+                429,
+                {"error": {"message": "fake rate limit", "type": "rate_limit_error"}},
+                {"Retry-After": "1"},
+            )
+
+        model = request.get("model", "fake-model")
+        all_words = opts["reply"].split(" ")
+        words = all_words[: request.get("max_tokens") or None]
+        # Sama seperti API asli: jawaban yang terpotong max_tokens berakhir dengan "length"
+        finish_reason = "length" if len(words) < len(all_words) else "stop"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {"prompt_tokens": 100, "completion_tokens": len(words), "total_tokens": 100 + len(words)}
+
+        if not request.get("stream"):
+            return self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_chunk(choices, extra=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **(extra or {}),
+            }
+            data = f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for i, word in enumerate(words):
+            content = word if i == 0 else f" {word}"
+            send_chunk([{"index": 0, "delta": {"content": content}, "finish_reason": None}])
+            time.sleep(opts["token_delay"])
+        send_chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send_chunk([], {"usage": usage})
+
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+
+class Command(BaseCommand):
+    help = (
+        "Server lokal yang kompatibel dengan OpenAI chat completions untuk uji beban. "
+        "Jalankan Django dengan OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 OPENAI_API_KEY=fake"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency", type=float, default=0.5, help="Rata-rata jeda sebelum jawaban (detik)")
+        parser.add_argument("--jitter", type=float, default=0.1, help="Simpangan baku latency (detik)")
+        parser.add_argument("--token-delay", type=float, default=0.02, help="Jeda antar token saat streaming (detik)")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Peluang respons 500")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Peluang respons 429")
+        parser.add_argument("--reply", default=DEFAULT_REPLY)
+        parser.add_argument("--verbose", action="store_true")
+
+    def handle(self, *args, **options):
+        FakeOpenAIHandler.options = options
+        server = ThreadingHTTPServer((options["host"], options["port"]), FakeOpenAIHandler)
+        server.daemon_threads = True
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake OpenAI di http://{options['host']}:{options['port']}/v1 "
+            f"(latency {options['latency']}s, error {options['error_rate']}, 429 {options['rate_limit_rate']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from materi.archive import import_archive
+
+
+class Command(BaseCommand):
+    help = "Import materi dari arsip hasil export_materi (ulangi dengan --replace untuk memperbarui)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--replace", action="store_true",
+            help="Timpa materi yang sudah ada dengan slug sama (untuk import ulang); submateri/file yang tidak ada di arsip dihapus",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            materi, stats = import_archive(options["path"], stdout=self.stdout, replace=options["replace"])
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Gagal import {options['path']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{materi.slug}: {stats['created']} dibuat, {stats['updated']} diperbarui, {stats['deleted']} dihapus, "
+            f"{stats['uploaded']} blob di-upload"
+        ))
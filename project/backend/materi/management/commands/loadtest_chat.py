@@ -0,0 +1,118 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from django.core.management.base import BaseCommand
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Uji beban /api/chat/ (jalankan bersama fake_openai_server). "
+        "Melaporkan throughput dan latency p50/p95/p99."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/api/chat/")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--materi-slug", default=None)
+        parser.add_argument("--sub-slug", default=None)
+        parser.add_argument("--message", default="Jelaskan fotosintesis secara singkat")
+        parser.add_argument("--stream", action="store_true", help="Minta jawaban SSE, ukur juga time-to-first-byte")
+        parser.add_argument(
+            "--use-cache", action="store_true",
+            help="Izinkan cache jawaban (default: setiap request bypass cache)",
+        )
+        parser.add_argument(
+            "--clients", type=int, default=0,
+            help="Sebar X-Forwarded-For ke N IP (0 = satu IP); server harus diset CHAT_TRUSTED_PROXY_COUNT >= 1",
+        )
+        parser.add_argument("--timeout", type=float, default=120)
+        parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+
+    def handle(self, *args, **options):
+        limits = httpx.Limits(max_connections=options["concurrency"], max_keepalive_connections=options["concurrency"])
+        http = httpx.Client(timeout=options["timeout"], limits=limits)
+
+        def one(i):
+            body = {"message": options["message"], "stream": options["stream"]}
+            if not options["use_cache"]:
+                body["cache"] = False
+            if options["materi_slug"]:
+                body["materi_slug"] = options["materi_slug"]
+            if options["sub_slug"]:
+                body["sub_slug"] = options["sub_slug"]
+            headers = {"X-Request-Id": uuid.uuid4().hex}
+            if options["clients"]:
+                k = random.randrange(options["clients"])
+                headers["X-Forwarded-For"] = f"10.0.{k // 256}.{k % 256}"
+
+            started = time.perf_counter()
+            first_byte = None
+            try:
+                with http.stream("POST", options["url"], json=body, headers=headers) as response:
+                    for _ in response.iter_bytes():
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - started
+                    status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            return status, time.perf_counter() - started, first_byte
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(one, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        http.close()
+
+        statuses = Counter(str(status) for status, _, _ in results)
+        ok = [r for r in results if r[0] == 200]
+        latencies = [latency * 1000 for _, latency, _ in ok]
+        ttfb = [first * 1000 for _, _, first in ok if first is not None]
+
+        report = {
+            "requests": len(results),
+            "concurrency": options["concurrency"],
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+            "ok_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+            "status": dict(statuses),
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": statistics.fmean(latencies) if latencies else None,
+                "max": max(latencies) if latencies else None,
+            },
+        }
+        if options["stream"]:
+            report["ttfb_ms"] = {"p50": percentile(ttfb, 50), "p95": percentile(ttfb, 95), "p99": percentile(ttfb, 99)}
+
+        for section in ("latency_ms", "ttfb_ms"):
+            if section in report:
+                report[section] = {k: round(v, 1) if v is not None else None for k, v in report[section].items()}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{report['requests']} request, concurrency {report['concurrency']}, {report['elapsed_s']}s")
+        self.stdout.write(f"Throughput: {report['throughput_rps']} req/s ({report['ok_rps']} req/s status 200)")
+        self.stdout.write(f"Status: {report['status']}")
+        lat = report["latency_ms"]
+        self.stdout.write(f"Latency ms: p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+        if "ttfb_ms" in report:
+            t = report["ttfb_ms"]
+            self.stdout.write(f"TTFB ms:    p50 {t['p50']}  p95 {t['p95']}  p99 {t['p99']}")
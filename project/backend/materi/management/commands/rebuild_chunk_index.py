@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from materi.models import MateriUtama
+from materi.retrieval import index_materi
+
+
+class Command(BaseCommand):
+    help = "Bangun ulang index chunk BM25 untuk chat"
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Slug materi (kosong = semua)")
+
+    def handle(self, *args, **options):
+        materi_list = MateriUtama.objects.order_by("pk")
+        if options["slugs"]:
+            materi_list = materi_list.filter(slug__in=options["slugs"])
+
+        for materi in materi_list:
+            count = index_materi(materi)
+            self.stdout.write(f"{materi.slug}: {count} chunk")
+
+        self.stdout.write(self.style.SUCCESS("Index chunk selesai"))
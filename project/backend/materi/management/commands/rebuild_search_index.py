@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from materi.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Bangun ulang index full-text search (/api/search/) dari materi, submateri dan ExtractedContent"
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"{count} dokumen di-index"))
@@ -0,0 +1,166 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from materi.bulk import index_new_submateri
+from materi.helper import extract_text_and_images, isi_hash
+from materi.models import MateriUtama, SubMateri, MateriFile
+from materi.response_cache import invalidate_scope
+
+WORDS = (
+    "materi belajar siswa guru sekolah energi cahaya tumbuhan klorofil air udara "
+    "karbon oksigen glukosa sel inti atom molekul reaksi kimia fisika gaya gerak "
+    "percepatan massa volume suhu tekanan listrik arus hambatan tegangan medan "
+    "sejarah kerajaan nusantara budaya bahasa matematika aljabar fungsi grafik"
+).split()
+
+# Isi HTML dipilih dari sejumlah varian (ukuran beragam) sehingga turunan
+# isi_text/isi_images/isi_hash cukup dihitung sekali per varian
+ISI_VARIANTS = 64
+FILE_EXTENSIONS = (".pdf", ".docx", ".pptx", ".xlsx")
+# Jumlah SubMateri yang diproses per transaksi
+SUBMATERI_PER_CHUNK = 5000
+# Penanda slug data seed. slugify() membuang "_" di awal, jadi slug materi asli
+# tidak mungkin diawali penanda ini dan --clear hanya menghapus data seed
+SEED_SLUG_MARKER = "__seed__"
+
+
+def seed_slug_prefix(prefix):
+    return f"{SEED_SLUG_MARKER}-{prefix}-"
+
+
+def _sentence(rng, n_words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def build_isi(rng, target_bytes, variant):
+    """HTML mirip isi editor: heading, paragraf berformat, gambar, list dan tabel."""
+    blocks = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        block = f"<h3>{_sentence(rng, 4)}</h3><p>{_sentence(rng)} <strong>{_sentence(rng, 3)}</strong> {_sentence(rng)}</p>"
+        if i % 3 == 0:
+            block += f'<p><img src="https://example.com/media/seed/{variant}-{i}.png" alt="ilustrasi {i}"></p>'
+        if i % 4 == 1:
+            block += f"<ul><li>{_sentence(rng, 6)}</li><li>{_sentence(rng, 6)}</li><li>{_sentence(rng, 6)}</li></ul>"
+        if i % 7 == 2:
+            block += f"<table><tr><th>No</th><th>Keterangan</th></tr><tr><td>{i}</td><td>{_sentence(rng, 5)}</td></tr></table>"
+        blocks.append(block)
+        size += len(block.encode("utf-8"))
+        i += 1
+    return "".join(blocks)
+
+
+def build_isi_variants(rng, isi_kb):
+    """Returns: list (isi, isi_text, isi_images, isi_hash), ukuran sekitar 0.25x-4x `isi_kb`."""
+    variants = []
+    for variant in range(ISI_VARIANTS):
+        target = int(isi_kb * 1024 * min(4.0, max(0.25, rng.lognormvariate(0, 0.6))))
+        isi = build_isi(rng, target, variant)
+        text, images = extract_text_and_images(isi)
+        variants.append((isi, text, images, isi_hash(isi)))
+    return variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Isi database dengan N MateriUtama x M SubMateri x K MateriFile sintetis (bulk_create). "
+        "MateriFile hanya berisi nama file, tanpa blob di storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--materi", type=int, default=100, help="Jumlah MateriUtama (N)")
+        parser.add_argument("--sub", type=int, default=20, help="SubMateri per materi (M)")
+        parser.add_argument("--files", type=int, default=2, help="MateriFile per submateri (K)")
+        parser.add_argument("--isi-kb", type=float, default=8, help="Rata-rata ukuran isi HTML (KB)")
+        parser.add_argument(
+            "--prefix", default="seed",
+            help=f"Nama set data seed; slug materi menjadi {SEED_SLUG_MARKER}-<prefix>-<n>",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--index", action="store_true", help="Bangun juga chunk chat + dokumen search")
+        parser.add_argument("--clear", action="store_true", help="Hapus dulu data seed dengan prefix yang sama")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        slug_prefix = seed_slug_prefix(prefix)
+        existing = MateriUtama.objects.filter(slug__startswith=slug_prefix)
+        if options["clear"]:
+            deleted, _ = existing.delete()
+            self.stdout.write(f"Dihapus: {deleted} baris")
+        elif existing.exists():
+            raise CommandError(f"Data seed dengan prefix '{prefix}' sudah ada; pakai --clear atau --prefix lain")
+
+        rng = random.Random(options["seed"])
+        variants = build_isi_variants(rng, options["isi_kb"])
+        n_materi, n_sub, n_files = options["materi"], options["sub"], options["files"]
+        batch_size = options["batch_size"]
+        materi_per_chunk = max(1, SUBMATERI_PER_CHUNK // max(1, n_sub))
+
+        started = time.perf_counter()
+        totals = {"materi": 0, "submateri": 0, "files": 0}
+        for chunk_start in range(0, n_materi, materi_per_chunk):
+            chunk = range(chunk_start, min(n_materi, chunk_start + materi_per_chunk))
+            with transaction.atomic():
+                materi_list = MateriUtama.objects.bulk_create(
+                    [
+                        MateriUtama(
+                            judul=f"Materi {i + 1}: {_sentence(rng, 4)[:-1]}",
+                            deskripsi=_sentence(rng, 25),
+                            slug=f"{slug_prefix}{i + 1}",
+                        )
+                        for i in chunk
+                    ],
+                    batch_size=batch_size,
+                )
+
+                subs = []
+                for materi in materi_list:
+                    for j in range(n_sub):
+                        isi, text, images, digest = rng.choice(variants)
+                        subs.append(SubMateri(
+                            parent=materi,
+                            judul=f"Bagian {j + 1}: {_sentence(rng, 4)[:-1]}",
+                            slug=f"{materi.slug}-{j + 1}",
+                            isi=isi,
+                            isi_text=text,
+                            isi_images=images,
+                            isi_hash=digest,
+                            urutan=j + 1,
+                        ))
+                subs = SubMateri.objects.bulk_create(subs, batch_size=batch_size)
+
+                files = [
+                    MateriFile(
+                        submateri=sub,
+                        file=f"materi/files/{prefix}/{sub.slug}-{k + 1}{FILE_EXTENSIONS[k % len(FILE_EXTENSIONS)]}",
+                        judul=f"Lampiran {k + 1}",
+                        deskripsi=_sentence(rng, 8),
+                        urutan=k + 1,
+                    )
+                    for sub in subs
+                    for k in range(n_files)
+                ]
+                MateriFile.objects.bulk_create(files, batch_size=batch_size)
+
+                if options["index"]:
+                    index_new_submateri(subs)
+
+            totals["materi"] += len(materi_list)
+            totals["submateri"] += len(subs)
+            totals["files"] += len(files)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{totals['materi']}/{n_materi} materi, {totals['submateri']} submateri, "
+                f"{totals['files']} file ({elapsed:.1f}s)"
+            )
+
+        # bulk_create tidak memicu signals.py
+        invalidate_scope("list")
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai: {rows} baris dalam {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} baris/s)"
+        ))
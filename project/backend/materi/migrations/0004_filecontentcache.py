@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0003_alter_materiutama_deskripsi_materifile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileContentCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage_name', models.CharField(db_index=True, max_length=500)),
+                ('etag', models.CharField(max_length=255)),
+                ('extractor_version', models.PositiveIntegerField(default=1)),
+                ('text', models.TextField(blank=True)),
+                ('image_urls', models.JSONField(blank=True, default=list)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('accessed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'unique_together': {('storage_name', 'etag', 'extractor_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0004_filecontentcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filecontentcache',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ExtractedContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=500)),
+                ('text', models.TextField(blank=True)),
+                ('image_urls', models.JSONField(blank=True, default=list)),
+                ('char_count', models.PositiveIntegerField(default=0)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('extractor_version', models.PositiveIntegerField(default=1)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+                ('materi_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='extracted', to='materi.materifile')),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0005_extractedcontent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MateriChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('urutan', models.PositiveIntegerField(default=0)),
+                ('text', models.TextField()),
+                ('terms', models.JSONField(default=dict)),
+                ('length', models.PositiveIntegerField(default=0)),
+                ('materi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='materi.materiutama')),
+                ('materi_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='materi.materifile')),
+                ('submateri', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='materi.submateri')),
+            ],
+            options={
+                'ordering': ['submateri__urutan', 'materi_file__urutan', 'urutan'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0006_materichunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materifile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='materiutama',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedcontent',
+            name='page_offsets',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='filecontentcache',
+            name='page_offsets',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
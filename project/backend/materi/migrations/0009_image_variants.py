@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0008_page_offsets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materiutama',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='submateri',
+            name='gambar_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
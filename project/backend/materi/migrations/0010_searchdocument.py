@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Konfigurasi teks harus sama dengan SEARCH_CONFIG di materi/search.py.
+# "simple": tanpa stemming bahasa, cocok untuk teks campuran Indonesia/Inggris.
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE materi_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(judul, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(text, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX materi_searchdocument_vector_gin ON materi_searchdocument USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS materi_searchdocument_vector_gin",
+    "ALTER TABLE materi_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# FTS5 external-content table, disinkronkan oleh trigger
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE materi_searchdocument_fts USING fts5(
+        judul, text, content='materi_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER materi_searchdocument_ai AFTER INSERT ON materi_searchdocument BEGIN
+        INSERT INTO materi_searchdocument_fts(rowid, judul, text) VALUES (new.id, new.judul, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER materi_searchdocument_ad AFTER DELETE ON materi_searchdocument BEGIN
+        INSERT INTO materi_searchdocument_fts(materi_searchdocument_fts, rowid, judul, text)
+        VALUES ('delete', old.id, old.judul, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER materi_searchdocument_au AFTER UPDATE ON materi_searchdocument BEGIN
+        INSERT INTO materi_searchdocument_fts(materi_searchdocument_fts, rowid, judul, text)
+        VALUES ('delete', old.id, old.judul, old.text);
+        INSERT INTO materi_searchdocument_fts(rowid, judul, text) VALUES (new.id, new.judul, new.text);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS materi_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS materi_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS materi_searchdocument_au",
+    "DROP TABLE IF EXISTS materi_searchdocument_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('materi', 'Materi'), ('submateri', 'Submateri'), ('file', 'File')], max_length=20)),
+                ('judul', models.CharField(max_length=255)),
+                ('text', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('materi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='materi.materiutama')),
+                ('materi_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='materi.materifile')),
+                ('submateri', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='materi.submateri')),
+            ],
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+def fill_isi_derived(apps, schema_editor):
+    from materi.helper import extract_text_and_images, isi_hash
+
+    SubMateri = apps.get_model("materi", "SubMateri")
+    batch = []
+    for sub in SubMateri.objects.only("id", "isi").iterator(chunk_size=200):
+        sub.isi_text, sub.isi_images = extract_text_and_images(sub.isi) if sub.isi else ("", [])
+        sub.isi_hash = isi_hash(sub.isi)
+        batch.append(sub)
+        if len(batch) >= 200:
+            SubMateri.objects.bulk_update(batch, ["isi_text", "isi_images", "isi_hash"])
+            batch = []
+    SubMateri.objects.bulk_update(batch, ["isi_text", "isi_images", "isi_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0010_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submateri',
+            name='isi_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='submateri',
+            name='isi_images',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='submateri',
+            name='isi_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(fill_isi_derived, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0011_submateri_isi_derived'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedcontent',
+            name='truncated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='filecontentcache',
+            name='truncated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0012_extracted_truncated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedcontent',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+    ]
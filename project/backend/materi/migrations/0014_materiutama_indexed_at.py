@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_indexed(apps, schema_editor):
+    # Materi yang sudah punya chunk tidak perlu di-index ulang saat chat pertama
+    MateriUtama = apps.get_model("materi", "MateriUtama")
+    MateriUtama.objects.filter(chunks__isnull=False).update(indexed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materi', '0013_extracted_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materiutama',
+            name='indexed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_indexed, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max
 from django.utils.text import slugify
 
 class MateriUtama(models.Model):
@@ -6,6 +7,11 @@ class MateriUtama(models.Model):
     deskripsi = models.TextField(blank=True, default="")
     slug = models.SlugField(unique=True, blank=True)
     cover_image = models.ImageField(upload_to="materi/covers/", blank=True, null=True)
+    cover_variants = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kapan index chunk chat terakhir dibangun penuh (retrieval.index_materi);
+    # None = belum pernah, termasuk materi lama sebelum MateriChunk ada
+    indexed_at = models.DateTimeField(null=True, blank=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -21,27 +27,59 @@ class SubMateri(models.Model):
     judul = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)
     isi = models.TextField(blank=True)
+    # Turunan isi, dihitung di save() (lihat update_isi_derived)
+    isi_text = models.TextField(blank=True, default="")
+    isi_images = models.JSONField(default=list, blank=True)
+    isi_hash = models.CharField(max_length=64, blank=True, default="")
     file = models.FileField(upload_to="materi/files/", blank=True, null=True)
     gambar = models.ImageField(upload_to="materi/images/", blank=True, null=True)
+    gambar_variants = models.JSONField(default=dict, blank=True)
     urutan = models.PositiveIntegerField(default=1)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["urutan"]  
 
+    def update_isi_derived(self):
+        """Isi ulang isi_text/isi_images jika isi berubah. Returns: True jika dihitung ulang."""
+        from .helper import extract_text_and_images, isi_hash
+
+        digest = isi_hash(self.isi)
+        if digest == self.isi_hash:
+            return False
+        self.isi_text, self.isi_images = extract_text_and_images(self.isi) if self.isi else ("", [])
+        self.isi_hash = digest
+        return True
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.judul)
 
+        self.update_isi_derived()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "isi" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"isi_text", "isi_images", "isi_hash"}
+
         if not self.pk:
-            last = SubMateri.objects.filter(parent=self.parent).order_by('-urutan').first()
-            if last:
-                self.urutan = last.urutan + 1
-            else:
-                self.urutan = 1
+            with transaction.atomic():
+                self.urutan = SubMateri.allocate_urutan(self.parent_id)
+                super().save(*args, **kwargs)
+            return
 
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def allocate_urutan(parent_id):
+        """
+        Urutan berikutnya di akhir materi (untuk bulk: nomor pertama, sisanya +1).
+        Harus dipanggil di dalam transaksi: baris MateriUtama dikunci
+        (select_for_update) sampai commit, sehingga insert paralel ke materi
+        yang sama tidak mendapat nomor yang sama.
+        """
+        list(MateriUtama.objects.select_for_update().filter(pk=parent_id).values_list("pk"))
+        last = SubMateri.objects.filter(parent_id=parent_id).aggregate(last=Max("urutan"))["last"]
+        return (last or 0) + 1
+
     def __str__(self):
         return f"{self.parent.judul} - {self.judul}"
 
@@ -52,9 +90,94 @@ class MateriFile(models.Model):
     deskripsi = models.TextField(blank=True)
     urutan = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["urutan"]
 
     def __str__(self):
         return f"{self.submateri.judul} - {self.judul}"
+
+
+class FileContentCache(models.Model):
+    """Cache hasil ekstraksi file, dikunci oleh nama storage + ETag."""
+    storage_name = models.CharField(max_length=500, db_index=True)
+    etag = models.CharField(max_length=255)
+    extractor_version = models.PositiveIntegerField(default=1)
+    text = models.TextField(blank=True)
+    image_urls = models.JSONField(default=list, blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    page_offsets = models.JSONField(default=list, blank=True)
+    truncated = models.BooleanField(default=False)
+    size = models.PositiveIntegerField(default=0)
+    accessed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ("storage_name", "etag", "extractor_version")
+
+    def __str__(self):
+        return f"{self.storage_name} ({self.etag})"
+
+
+class ExtractedContent(models.Model):
+    """Teks hasil ekstraksi MateriFile, dihitung sekali saat file disimpan."""
+    materi_file = models.OneToOneField(MateriFile, on_delete=models.CASCADE, related_name="extracted")
+    source_name = models.CharField(max_length=500)
+    text = models.TextField(blank=True)
+    image_urls = models.JSONField(default=list, blank=True)
+    char_count = models.PositiveIntegerField(default=0)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    page_offsets = models.JSONField(default=list, blank=True)
+    # True jika teks dipotong (mis. batas karakter), bukan isi lengkap file
+    truncated = models.BooleanField(default=False)
+    # Pesan error jika ekstraksi gagal; teks dikosongkan dan baris dianggap usang
+    error = models.TextField(blank=True)
+    extractor_version = models.PositiveIntegerField(default=1)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_name} (v{self.extractor_version})"
+
+
+class MateriChunk(models.Model):
+    """Potongan teks submateri / file untuk pencarian BM25 saat chat."""
+    materi = models.ForeignKey(MateriUtama, on_delete=models.CASCADE, related_name="chunks")
+    submateri = models.ForeignKey(SubMateri, on_delete=models.CASCADE, related_name="chunks")
+    materi_file = models.ForeignKey(MateriFile, on_delete=models.CASCADE, related_name="chunks", null=True, blank=True)
+    urutan = models.PositiveIntegerField(default=0)
+    text = models.TextField()
+    terms = models.JSONField(default=dict)
+    length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["submateri__urutan", "materi_file__urutan", "urutan"]
+
+    def __str__(self):
+        return f"{self.submateri.judul} #{self.urutan}"
+
+
+class SearchDocument(models.Model):
+    """
+    Satu dokumen pencarian per materi, submateri, atau file (materi/search.py).
+    Kolom tsvector + indeks GIN (Postgres) atau tabel FTS5 (SQLite) dibuat di
+    migrasi 0010 karena spesifik per database.
+    """
+    KIND_MATERI = "materi"
+    KIND_SUBMATERI = "submateri"
+    KIND_FILE = "file"
+    KIND_CHOICES = [
+        (KIND_MATERI, "Materi"),
+        (KIND_SUBMATERI, "Submateri"),
+        (KIND_FILE, "File"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    materi = models.ForeignKey(MateriUtama, on_delete=models.CASCADE, related_name="search_documents")
+    submateri = models.ForeignKey(SubMateri, on_delete=models.CASCADE, related_name="search_documents", null=True, blank=True)
+    materi_file = models.ForeignKey(MateriFile, on_delete=models.CASCADE, related_name="search_documents", null=True, blank=True)
+    judul = models.CharField(max_length=255)
+    text = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind}: {self.judul}"
@@ -0,0 +1,144 @@
+import hashlib
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+# None = response cache nonaktif (tidak ada cache bersama antar worker)
+RESPONSE_CACHE_ALIAS = getattr(settings, "MATERI_RESPONSE_CACHE_ALIAS", None)
+RESPONSE_CACHE_TIMEOUT = getattr(settings, "MATERI_RESPONSE_CACHE_TIMEOUT", 5 * 60)
+
+# Stampede protection: hanya satu request yang membangun ulang, sisanya menunggu
+REBUILD_LOCK_TIMEOUT = 30
+REBUILD_WAIT_SECONDS = 5
+REBUILD_POLL_INTERVAL = 0.05
+
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+STAT_NAMES = ("hit", "miss", "wait_hit", "wait_timeout", "bypass")
+
+
+def _cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def _incr(key, timeout=None):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key belum ada; add() supaya tidak menimpa worker lain
+        if not cache.add(key, 1, timeout):
+            return cache.incr(key)
+        return 1
+
+
+def record_stat(name):
+    _incr(f"response-cache:stats:{name}")
+
+
+def cache_stats():
+    if RESPONSE_CACHE_ALIAS is None:
+        return {"enabled": False}
+    cache = _cache()
+    values = cache.get_many([f"response-cache:stats:{name}" for name in STAT_NAMES])
+    stats = {name: values.get(f"response-cache:stats:{name}", 0) for name in STAT_NAMES}
+    lookups = stats["hit"] + stats["miss"]
+    stats["hit_ratio"] = round(stats["hit"] / lookups, 4) if lookups else None
+    stats["enabled"] = True
+    return stats
+
+
+def reset_cache_stats():
+    if RESPONSE_CACHE_ALIAS is None:
+        return
+    _cache().delete_many([f"response-cache:stats:{name}" for name in STAT_NAMES])
+
+
+def scope_generation(scope):
+    return _cache().get(f"response-cache:gen:{scope}", 0)
+
+
+def invalidate_scope(*scopes):
+    """Naikkan generasi scope sehingga semua key lama tidak terpakai lagi."""
+    if RESPONSE_CACHE_ALIAS is None:
+        return
+    for scope in scopes:
+        if scope:
+            _incr(f"response-cache:gen:{scope}")
+
+
+def _cache_key(endpoint, scopes, request):
+    generations = ":".join(str(scope_generation(scope)) for scope in scopes)
+    query = hashlib.md5(request.GET.urlencode().encode("utf-8")).hexdigest()
+    return f"response-cache:{endpoint}:{':'.join(scopes)}:{generations}:{query}"
+
+
+def _from_entry(request, entry):
+    response = Response(entry["data"], status=entry["status"])
+    for header, value in entry["headers"].items():
+        response[header] = value
+
+    # 304 langsung dari cache, tanpa query ke database
+    last_modified = entry["headers"].get("Last-Modified")
+    return get_conditional_response(
+        request,
+        etag=entry["headers"].get("ETag"),
+        last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+        response=response,
+    )
+
+
+def cache_api_response(endpoint, scopes_func):
+    """
+    Read-through cache untuk GET. `scopes_func(request, *args, **kwargs)` mengembalikan
+    daftar scope (mis. ["list"], ["materi:<slug>"]) yang dinaikkan generasinya oleh
+    signals saat data berubah. Hanya response 200 yang disimpan.
+    Tanpa MATERI_RESPONSE_CACHE_ALIAS view dijalankan langsung.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if RESPONSE_CACHE_ALIAS is None or request.method != "GET":
+                return view(request, *args, **kwargs)
+
+            cache = _cache()
+            key = _cache_key(endpoint, scopes_func(request, *args, **kwargs), request)
+
+            entry = cache.get(key)
+            if entry is not None:
+                record_stat("hit")
+                return _from_entry(request, entry)
+            record_stat("miss")
+
+            lock_key = f"{key}:lock"
+            if not cache.add(lock_key, 1, REBUILD_LOCK_TIMEOUT):
+                deadline = time.monotonic() + REBUILD_WAIT_SECONDS
+                while time.monotonic() < deadline:
+                    time.sleep(REBUILD_POLL_INTERVAL)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        record_stat("wait_hit")
+                        return _from_entry(request, entry)
+                record_stat("wait_timeout")
+                return view(request, *args, **kwargs)
+
+            try:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and isinstance(response, Response):
+                    cache.set(key, {
+                        "data": response.data,
+                        "status": response.status_code,
+                        "headers": {h: response[h] for h in CACHED_HEADERS if response.has_header(h)},
+                    }, RESPONSE_CACHE_TIMEOUT)
+                else:
+                    record_stat("bypass")
+                return response
+            finally:
+                cache.delete(lock_key)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,209 @@
+import math
+import re
+from collections import Counter
+from django.utils import timezone
+from .models import MateriChunk, MateriUtama
+
+CHUNK_CHARS = 1200
+CHUNK_OVERLAP = 200
+
+# Parameter standar BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = {
+    # Bahasa Indonesia
+    "yang", "dan", "di", "ke", "dari", "ini", "itu", "untuk", "dengan", "pada",
+    "adalah", "atau", "juga", "dalam", "akan", "tidak", "ada", "oleh", "sebagai",
+    "apa", "bagaimana", "mengapa", "kenapa", "jelaskan", "saya", "kamu", "anda",
+    "bisa", "dapat", "tersebut", "karena", "jika", "maka", "para", "nya",
+    # English
+    "the", "and", "of", "to", "in", "is", "a", "an", "for", "on", "what", "how",
+    "why", "are", "with", "be", "this", "that",
+}
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def chunk_text(text, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Potong teks per paragraf menjadi chunk ~size karakter dengan sedikit tumpang tindih."""
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n|\n", text) if p.strip()]
+    chunks = []
+    current = ""
+
+    for paragraph in paragraphs:
+        # Paragraf yang terlalu panjang dipotong per `size` karakter
+        while len(paragraph) > size:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:size])
+            paragraph = paragraph[size - overlap:]
+
+        if current and len(current) + len(paragraph) + 1 > size:
+            chunks.append(current)
+            current = current[-overlap:] if overlap else ""
+            current = f"{current}\n{paragraph}" if current else paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _build_chunks(text, **fields):
+    chunks = []
+    for i, piece in enumerate(chunk_text(text)):
+        tokens = tokenize(piece)
+        chunks.append(MateriChunk(
+            urutan=i,
+            text=piece,
+            terms=dict(Counter(tokens)),
+            length=len(tokens),
+            **fields,
+        ))
+    return chunks
+
+
+def index_submateri(sub):
+    """Bangun ulang chunk dari isi satu submateri (chunk file tidak disentuh)."""
+    MateriChunk.objects.filter(submateri=sub, materi_file__isnull=True).delete()
+    # Submateri bisa dipindah ke materi lain
+    MateriChunk.objects.filter(submateri=sub).exclude(materi_id=sub.parent_id).update(materi_id=sub.parent_id)
+
+    if not sub.isi:
+        return 0
+    chunks = _build_chunks(sub.isi_text, materi_id=sub.parent_id, submateri=sub)
+    MateriChunk.objects.bulk_create(chunks)
+    return len(chunks)
+
+
+def index_materi_file(materi_file, text):
+    """Bangun ulang chunk dari teks hasil ekstraksi satu MateriFile."""
+    MateriChunk.objects.filter(materi_file=materi_file).delete()
+    chunks = _build_chunks(
+        text,
+        materi_id=materi_file.submateri.parent_id,
+        submateri_id=materi_file.submateri_id,
+        materi_file=materi_file,
+    )
+    MateriChunk.objects.bulk_create(chunks)
+    return len(chunks)
+
+
+def index_materi(materi):
+    """Bangun ulang seluruh index satu materi lalu tandai `indexed_at`."""
+    from .extraction import extract_many, is_extraction_stale
+
+    count = 0
+    submateri_list = list(materi.submateri.prefetch_related("files__extracted"))
+    files = [f for sub in submateri_list for f in sub.files.all()]
+    # File usang di-index oleh signal ExtractedContent saat hasil ekstraksinya
+    # disimpan (termasuk yang selesai belakangan), jadi jangan di-chunk dua kali
+    stale = {f.pk for f in files if is_extraction_stale(f)}
+    extracted_map = extract_many(files)
+    for sub in submateri_list:
+        count += index_submateri(sub)
+        for materi_file in sub.files.all():
+            extracted = extracted_map[materi_file.pk]
+            if materi_file.pk not in stale and not extracted.error:
+                count += index_materi_file(materi_file, extracted.text)
+    materi.indexed_at = timezone.now()
+    MateriUtama.objects.filter(pk=materi.pk).update(indexed_at=materi.indexed_at)
+    return count
+
+
+def build_bm25_index(chunks):
+    """
+    Statistik BM25 korpus (jumlah chunk, panjang rata-rata, inverted index),
+    cukup dihitung sekali per korpus dan disimpan bersama chunk di context cache.
+    """
+    postings = {}
+    for c in chunks:
+        for term, tf in c["terms"].items():
+            postings.setdefault(term, []).append((c["id"], tf, c["length"]))
+    n = len(chunks)
+    return {
+        "n": n,
+        "avgdl": (sum(c["length"] for c in chunks) / n or 1) if n else 1,
+        "postings": postings,
+    }
+
+
+def bm25_scores(chunks, query_tokens, index=None):
+    """
+    Hitung skor BM25 setiap chunk terhadap query. `index` dari build_bm25_index;
+    jika None dihitung dari `chunks`. Returns: {chunk_id: skor}
+    """
+    if not chunks or not query_tokens:
+        return {}
+    if index is None:
+        index = build_bm25_index(chunks)
+
+    n = index["n"]
+    avgdl = index["avgdl"]
+    scores = {}
+    for term in set(query_tokens):
+        posting = index["postings"].get(term)
+        if not posting:
+            continue
+        df = len(posting)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for chunk_id, tf, length in posting:
+            denom = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / denom
+    return scores
+
+
+def load_chunks(materi, sub_slug=None):
+    """Ambil semua chunk satu materi (atau satu submateri) sesuai urutan materi."""
+    # Materi lama yang belum pernah di-index; materi tanpa chunk (kosong)
+    # tetap ditandai indexed_at sehingga tidak di-index ulang setiap request
+    if materi.indexed_at is None:
+        index_materi(materi)
+
+    qs = MateriChunk.objects.filter(materi=materi)
+    if sub_slug:
+        qs = qs.filter(submateri__slug=sub_slug)
+    return list(qs.values("id", "submateri_id", "materi_file_id", "text", "terms", "length"))
+
+
+def select_chunks(chunks, query, top_k=8, max_chars=18_000, index=None):
+    """
+    Pilih chunk paling relevan untuk `query` dalam batas `max_chars`.
+    Jika tidak ada yang cocok, ambil chunk awal sesuai urutan materi.
+    Hasil dikembalikan sesuai urutan materi, bukan urutan skor.
+    """
+    scores = bm25_scores(chunks, tokenize(query), index)
+
+    if scores:
+        ranked = sorted(chunks, key=lambda c: scores.get(c["id"], 0.0), reverse=True)
+        ranked = [c for c in ranked if c["id"] in scores]
+    else:
+        ranked = chunks
+
+    selected = []
+    used = 0
+    for c in ranked:
+        if len(selected) >= top_k:
+            break
+        if used + len(c["text"]) > max_chars:
+            continue
+        selected.append(c)
+        used += len(c["text"])
+
+    position = {c["id"]: i for i, c in enumerate(chunks)}
+    selected.sort(key=lambda c: position[c["id"]])
+    return selected
@@ -0,0 +1,203 @@
+import html
+from django.db import connection
+from django.db.models import Q
+from .models import SearchDocument
+from .retrieval import TOKEN_RE
+
+# Harus sama dengan konfigurasi di migrasi 0010_searchdocument
+SEARCH_CONFIG = "simple"
+# Teks per dokumen yang di-index; tsvector Postgres dibatasi 1MB
+SEARCH_MAX_CHARS = 200_000
+# Panjang teks yang diproses ts_headline untuk snippet (mahal untuk teks besar)
+SNIPPET_SOURCE_CHARS = 50_000
+SNIPPET_WORDS = 24
+
+# Penanda highlight sementara; teks di-escape dulu baru diganti <mark>
+_START, _STOP = "\x02", "\x03"
+
+
+def _store(lookup, materi_id, judul, text):
+    SearchDocument.objects.update_or_create(
+        **lookup,
+        defaults={
+            "materi_id": materi_id,
+            "judul": (judul or "")[:255],
+            "text": (text or "")[:SEARCH_MAX_CHARS],
+        },
+    )
+
+
+def index_search_materi(materi):
+    from .helper import extract_text_and_images
+
+    text, _ = extract_text_and_images(materi.deskripsi) if materi.deskripsi else ("", [])
+    _store({"kind": SearchDocument.KIND_MATERI, "materi_id": materi.pk}, materi.pk, materi.judul, text)
+
+
+def index_search_submateri(sub):
+    _store({"kind": SearchDocument.KIND_SUBMATERI, "submateri_id": sub.pk}, sub.parent_id, sub.judul, sub.isi_text)
+    # Submateri bisa dipindah ke materi lain
+    SearchDocument.objects.filter(submateri=sub).exclude(materi_id=sub.parent_id).update(materi_id=sub.parent_id)
+
+
+def index_search_file(materi_file, text=None):
+    """`text`: hasil ekstraksi; jika None diambil dari ExtractedContent yang ada."""
+    if text is None:
+        from .models import ExtractedContent
+
+        text = (
+            ExtractedContent.objects.filter(materi_file=materi_file).values_list("text", flat=True).first()
+            or ""
+        )
+    if text.startswith("[Error"):
+        text = ""
+
+    parent_id = materi_file.submateri.parent_id
+    _store(
+        {"kind": SearchDocument.KIND_FILE, "materi_file_id": materi_file.pk},
+        parent_id,
+        materi_file.judul,
+        "\n".join(part for part in (materi_file.deskripsi, text) if part),
+    )
+    SearchDocument.objects.filter(materi_file=materi_file).update(submateri_id=materi_file.submateri_id)
+
+
+def rebuild_search_index():
+    from .models import MateriUtama, SubMateri, MateriFile
+
+    count = 0
+    for materi in MateriUtama.objects.iterator():
+        index_search_materi(materi)
+        count += 1
+    for sub in SubMateri.objects.iterator():
+        index_search_submateri(sub)
+        count += 1
+    for materi_file in MateriFile.objects.select_related("submateri", "extracted").iterator():
+        text = materi_file.extracted.text if hasattr(materi_file, "extracted") else ""
+        index_search_file(materi_file, text)
+        count += 1
+    return count
+
+
+def query_terms(query):
+    return [token for token in TOKEN_RE.findall((query or "").lower()) if token.strip("_")]
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _search_postgres(terms, limit, offset):
+    # Prefix match per kata (mis. "fotosin" -> fotosintesis), semua kata wajib ada
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    headline_options = f'StartSel="{_START}", StopSel="{_STOP}", MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=2'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM materi_searchdocument WHERE search_vector @@ to_tsquery(%s, %s)",
+            [SEARCH_CONFIG, tsquery],
+        )
+        total = cursor.fetchone()[0]
+        # ts_headline hanya dihitung untuk baris di halaman ini
+        cursor.execute(
+            f"""
+            SELECT page.id, page.rank,
+                   ts_headline(%s, left(d.text, {SNIPPET_SOURCE_CHARS}), page.query, %s)
+            FROM (
+                SELECT id, ts_rank_cd(search_vector, query) AS rank, query
+                FROM materi_searchdocument, to_tsquery(%s, %s) AS query
+                WHERE search_vector @@ query
+                ORDER BY rank DESC, id
+                LIMIT %s OFFSET %s
+            ) AS page
+            JOIN materi_searchdocument d ON d.id = page.id
+            ORDER BY page.rank DESC, page.id
+            """,
+            [SEARCH_CONFIG, headline_options, SEARCH_CONFIG, tsquery, limit, offset],
+        )
+        rows = cursor.fetchall()
+    return total, rows
+
+
+def _search_sqlite(terms, limit, offset):
+    match = " ".join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM materi_searchdocument_fts WHERE materi_searchdocument_fts MATCH %s",
+            [match],
+        )
+        total = cursor.fetchone()[0]
+        # bm25(): makin kecil makin relevan; judul diberi bobot 10x
+        cursor.execute(
+            f"""
+            SELECT rowid, -bm25(materi_searchdocument_fts, 10.0, 1.0) AS rank,
+                   snippet(materi_searchdocument_fts, 1, '{_START}', '{_STOP}', '…', {SNIPPET_WORDS})
+            FROM materi_searchdocument_fts
+            WHERE materi_searchdocument_fts MATCH %s
+            ORDER BY rank DESC, rowid
+            LIMIT %s OFFSET %s
+            """,
+            [match, limit, offset],
+        )
+        rows = cursor.fetchall()
+    return total, rows
+
+
+def _search_fallback(terms, limit, offset):
+    """Database lain: scan icontains tanpa ranking (hanya untuk development)."""
+    condition = Q()
+    for term in terms:
+        condition &= Q(judul__icontains=term) | Q(text__icontains=term)
+    qs = SearchDocument.objects.filter(condition).order_by("id")
+    rows = []
+    for doc_id, text in qs.values_list("id", "text")[offset:offset + limit]:
+        lower = text.lower()
+        pos = max(lower.find(terms[0]), 0)
+        start = max(pos - 80, 0)
+        snippet = text[start:pos + 160]
+        for term in terms:
+            snippet = snippet.replace(term, f"{_START}{term}{_STOP}")
+        rows.append((doc_id, 0.0, snippet))
+    return qs.count(), rows
+
+
+def search_documents(query, limit=20, offset=0):
+    """
+    Cari materi, submateri dan isi file.
+    Returns: (total, [{"kind", "judul", "snippet", "rank", "materi", ...}])
+    """
+    terms = query_terms(query)
+    if not terms:
+        return 0, []
+
+    backend = {
+        "postgresql": _search_postgres,
+        "sqlite": _search_sqlite,
+    }.get(connection.vendor, _search_fallback)
+    total, rows = backend(terms, limit, offset)
+
+    docs = {
+        doc["id"]: doc
+        for doc in SearchDocument.objects.filter(pk__in=[row[0] for row in rows]).values(
+            "id", "kind", "judul", "materi_file_id",
+            "materi__slug", "materi__judul", "submateri__slug", "submateri__judul",
+        )
+    }
+
+    results = []
+    for doc_id, rank, snippet in rows:
+        doc = docs.get(doc_id)
+        if doc is None:
+            continue
+        results.append({
+            "kind": doc["kind"],
+            "judul": doc["judul"],
+            "snippet": _highlight(snippet or ""),
+            "rank": round(float(rank), 4),
+            "materi": {"slug": doc["materi__slug"], "judul": doc["materi__judul"]},
+            "submateri": (
+                {"slug": doc["submateri__slug"], "judul": doc["submateri__judul"]}
+                if doc["submateri__slug"] else None
+            ),
+            "file_id": doc["materi_file_id"],
+        })
+    return total, results
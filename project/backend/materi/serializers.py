@@ -1,13 +1,88 @@
 from rest_framework import serializers
 from .models import MateriUtama, SubMateri, MateriFile
+from .images import variant_urls
 
-class MateriFileSerializer(serializers.ModelSerializer):
+
+def split_paths(paths):
+    """
+    ["judul", "submateri", "submateri.files"] ->
+    {"judul": [], "submateri": ["files"]}
+    """
+    tree = {}
+    for path in paths:
+        head, _, rest = path.partition(".")
+        children = tree.setdefault(head, [])
+        if rest:
+            children.append(rest)
+    return tree
+
+
+def nested_selection(name, fields=None, include=None):
+    """
+    Apakah relasi `name` ikut diserialisasi, dan dengan argumen apa.
+    Tanpa `fields`/`include` semua relasi ikut; selain itu relasi hanya ikut
+    jika disebut di `fields` atau `include`.
+    Returns: None jika tidak ikut, atau (fields, include) untuk serializer nested
+    """
+    field_tree = split_paths(fields or [])
+    include_tree = split_paths(include) if include is not None else None
+    if include_tree is None:
+        wanted = name in field_tree or not field_tree
+    else:
+        wanted = name in field_tree or name in include_tree
+    if not wanted:
+        return None
+    return field_tree.get(name), (include_tree.get(name, []) if include_tree is not None else None)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer yang field dan relasi nested-nya bisa dipilih lewat argumen
+    `fields` dan `include` (daftar path bertitik, mis. "submateri.judul").
+    Relasi nested di `nested_serializers` hanya ikut jika ada di `fields`
+    atau `include` (tanpa keduanya: semua relasi ikut).
+    """
+    nested_serializers = {}
+
+    def __init__(self, *args, fields=None, include=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        field_tree = split_paths(fields or [])
+
+        nested = set()
+        for name, serializer_class in self.nested_serializers.items():
+            selection = nested_selection(name, fields, include)
+            if selection is None:
+                self.fields.pop(name, None)
+                continue
+            nested.add(name)
+            self.fields[name] = serializer_class(
+                many=True,
+                read_only=True,
+                fields=selection[0],
+                include=selection[1],
+            )
+
+        # Field biasa hanya dibatasi jika ada nama field di level ini
+        selected = {name for name, children in field_tree.items() if not children}
+        if selected:
+            keep = selected | nested
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+class MateriFileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MateriFile
         fields = ["id", "file", "judul", "deskripsi", "urutan", "created_at", "submateri"]
 
-class SubMateriSerializer(serializers.ModelSerializer):
+class SubMateriSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     files = MateriFileSerializer(many=True, read_only=True)
+    nested_serializers = {"files": MateriFileSerializer}
+    gambar_srcset = serializers.SerializerMethodField()
+
+    def get_gambar_srcset(self, obj):
+        return variant_urls(obj.gambar_variants)
 
     class Meta:
         model = SubMateri
@@ -18,14 +93,20 @@ class SubMateriSerializer(serializers.ModelSerializer):
             "isi",
             "file",
             "gambar",
+            "gambar_srcset",
             "urutan",
             "updated_at",
             "files",
         ]
 
 
-class MateriUtamaSerializer(serializers.ModelSerializer):
+class MateriUtamaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     submateri = SubMateriSerializer(many=True, read_only=True)
+    nested_serializers = {"submateri": SubMateriSerializer}
+    cover_srcset = serializers.SerializerMethodField()
+
+    def get_cover_srcset(self, obj):
+        return variant_urls(obj.cover_variants)
 
     class Meta:
         model = MateriUtama
@@ -35,5 +116,27 @@ class MateriUtamaSerializer(serializers.ModelSerializer):
             "slug",
             "deskripsi",
             "cover_image",
+            "cover_srcset",
             "submateri",
         ]
+
+
+class MateriSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Representasi ringkas untuk katalog: tanpa isi submateri, hanya jumlahnya."""
+    submateri_count = serializers.IntegerField(read_only=True)
+    cover_srcset = serializers.SerializerMethodField()
+
+    def get_cover_srcset(self, obj):
+        return variant_urls(obj.cover_variants)
+
+    class Meta:
+        model = MateriUtama
+        fields = [
+            "id",
+            "judul",
+            "slug",
+            "deskripsi",
+            "cover_image",
+            "cover_srcset",
+            "submateri_count",
+        ]
@@ -0,0 +1,203 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import MateriUtama, MateriFile, SubMateri, ExtractedContent, MateriChunk
+from .extract_cache import invalidate_extract_cache
+from .retrieval import index_submateri, index_materi_file
+from .response_cache import invalidate_scope
+from .images import generate_variants, delete_variants, store_variants
+from .search import index_search_materi, index_search_submateri, index_search_file
+
+
+# Varian gambar (materi/images.py). Didaftarkan paling awal supaya invalidasi
+# response cache di bawah berjalan setelah kolom *_variants terisi.
+
+def _remember_old_image(instance, field, variants_field):
+    instance._old_image = None
+    if instance.pk:
+        instance._old_image = (
+            type(instance).objects.filter(pk=instance.pk).values_list(field, variants_field).first()
+        )
+
+
+def _sync_variants(instance, field, variants_field):
+    name = getattr(instance, field).name or ""
+    old_name, old_variants = getattr(instance, "_old_image", None) or ("", {})
+    if name == (old_name or ""):
+        return
+
+    variants = {}
+    if name:
+        try:
+            variants = generate_variants(name)
+        except Exception as e:
+            print(f"Error generating variants for {name}: {e}")
+
+    # Nama varian deterministik; yang masih dipakai jangan ikut dihapus
+    kept = {n for names in variants.values() for n in names.values()}
+    delete_variants({
+        ext: {w: n for w, n in names.items() if n not in kept}
+        for ext, names in (old_variants or {}).items()
+    })
+
+    setattr(instance, variants_field, variants)
+    store_variants(instance, variants_field, variants)
+
+
+@receiver(pre_save, sender=MateriUtama)
+def remember_old_cover(sender, instance, **kwargs):
+    _remember_old_image(instance, "cover_image", "cover_variants")
+
+
+@receiver(post_save, sender=MateriUtama)
+def sync_cover_variants(sender, instance, **kwargs):
+    _sync_variants(instance, "cover_image", "cover_variants")
+
+
+@receiver(pre_save, sender=SubMateri)
+def remember_old_gambar(sender, instance, **kwargs):
+    _remember_old_image(instance, "gambar", "gambar_variants")
+
+
+@receiver(post_save, sender=SubMateri)
+def sync_gambar_variants(sender, instance, **kwargs):
+    _sync_variants(instance, "gambar", "gambar_variants")
+
+
+@receiver(post_delete, sender=MateriUtama)
+def delete_cover_variants(sender, instance, **kwargs):
+    delete_variants(instance.cover_variants)
+
+
+@receiver(post_delete, sender=SubMateri)
+def delete_gambar_variants(sender, instance, **kwargs):
+    delete_variants(instance.gambar_variants)
+
+
+@receiver(pre_save, sender=MateriFile)
+def remember_old_file(sender, instance, **kwargs):
+    instance._old_file_name = None
+    if instance.pk:
+        instance._old_file_name = (
+            MateriFile.objects.filter(pk=instance.pk).values_list("file", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=MateriFile)
+def invalidate_replaced_file(sender, instance, created, **kwargs):
+    old_name = getattr(instance, "_old_file_name", None)
+    if old_name and old_name != instance.file.name:
+        invalidate_extract_cache(old_name)
+
+    if not created:
+        MateriChunk.objects.filter(materi_file=instance).update(
+            submateri_id=instance.submateri_id,
+            materi_id=instance.submateri.parent_id,
+        )
+
+
+@receiver(post_delete, sender=MateriFile)
+def invalidate_deleted_file(sender, instance, **kwargs):
+    invalidate_extract_cache(instance.file.name)
+
+
+@receiver(post_save, sender=SubMateri)
+def reindex_submateri(sender, instance, **kwargs):
+    index_submateri(instance)
+
+
+@receiver(post_save, sender=ExtractedContent)
+def reindex_materi_file(sender, instance, **kwargs):
+    index_materi_file(instance.materi_file, instance.text)
+
+
+# Index full-text search (materi/search.py); penghapusan ikut CASCADE
+
+@receiver(post_save, sender=MateriUtama)
+def index_materi_search(sender, instance, **kwargs):
+    index_search_materi(instance)
+
+
+@receiver(post_save, sender=SubMateri)
+def index_submateri_search(sender, instance, **kwargs):
+    index_search_submateri(instance)
+
+
+@receiver(post_save, sender=MateriFile)
+def index_file_search(sender, instance, **kwargs):
+    index_search_file(instance)
+
+
+@receiver(post_save, sender=ExtractedContent)
+def index_extracted_search(sender, instance, **kwargs):
+    index_search_file(instance.materi_file, instance.text)
+
+
+@receiver(post_delete, sender=MateriFile)
+@receiver(post_save, sender=MateriFile)
+def touch_file_parents(sender, instance, **kwargs):
+    # Jaga Last-Modified submateri/materi tetap naik, termasuk saat file dihapus
+    now = timezone.now()
+    SubMateri.objects.filter(pk=instance.submateri_id).update(updated_at=now)
+    MateriUtama.objects.filter(submateri__pk=instance.submateri_id).update(updated_at=now)
+
+
+@receiver(post_delete, sender=SubMateri)
+@receiver(post_save, sender=SubMateri)
+def touch_submateri_parent(sender, instance, **kwargs):
+    MateriUtama.objects.filter(pk=instance.parent_id).update(updated_at=timezone.now())
+
+
+# Invalidasi response cache (materi/response_cache.py)
+
+@receiver(pre_save, sender=MateriUtama)
+def remember_old_materi_slug(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk:
+        instance._old_slug = MateriUtama.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+@receiver(post_delete, sender=MateriUtama)
+@receiver(post_save, sender=MateriUtama)
+def invalidate_materi_responses(sender, instance, **kwargs):
+    invalidate_scope("list", f"materi:{instance.slug}")
+    old_slug = getattr(instance, "_old_slug", None)
+    if old_slug and old_slug != instance.slug:
+        # Response submateri di-cache per slug materi; slug lama harus ikut mati
+        sub_slugs = SubMateri.objects.filter(parent_id=instance.pk).values_list("slug", flat=True)
+        invalidate_scope(f"materi:{old_slug}", *[f"sub:{old_slug}:{slug}" for slug in sub_slugs])
+
+
+@receiver(pre_save, sender=SubMateri)
+def remember_old_submateri_slug(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk:
+        instance._old_slug = SubMateri.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+def _invalidate_submateri(parent_id, *sub_slugs):
+    parent_slug = MateriUtama.objects.filter(pk=parent_id).values_list("slug", flat=True).first()
+    if parent_slug is None:
+        invalidate_scope("list")
+        return
+    invalidate_scope(
+        "list",
+        f"materi:{parent_slug}",
+        *[f"sub:{parent_slug}:{slug}" for slug in sub_slugs if slug],
+    )
+
+
+@receiver(post_delete, sender=SubMateri)
+@receiver(post_save, sender=SubMateri)
+def invalidate_submateri_responses(sender, instance, **kwargs):
+    _invalidate_submateri(instance.parent_id, instance.slug, getattr(instance, "_old_slug", None))
+
+
+@receiver(post_delete, sender=MateriFile)
+@receiver(post_save, sender=MateriFile)
+def invalidate_file_responses(sender, instance, **kwargs):
+    sub = SubMateri.objects.filter(pk=instance.submateri_id).values("slug", "parent_id").first()
+    if sub:
+        _invalidate_submateri(sub["parent_id"], sub["slug"])
+    else:
+        invalidate_scope("list")
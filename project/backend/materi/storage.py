@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import hashlib
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+
+class CachedBlobFile(File):
+    """File dari cache disk lokal yang bisa dibuka ulang (seperti S3File)."""
+
+    def __init__(self, file, name, path, storage):
+        super().__init__(file, name=name)
+        self._path = path
+        self._storage = storage
+
+    def open(self, mode="rb"):
+        if not self.closed:
+            self.seek(0)
+        elif os.path.exists(self._path):
+            self.file = open(self._path, mode)
+        else:
+            # Sudah di-evict worker lain, ambil lagi lewat storage
+            self.file = self._storage.open(self.name, mode).file
+        return self
+
+
+class BlobCacheMixin:
+    """
+    Simpan salinan lokal objek yang dibaca dari storage di disk, dengan key
+    nama + ETag. Penulisan atomik (file sementara + os.replace) sehingga aman
+    dipakai bersama oleh beberapa worker gunicorn; total ukuran dibatasi dan
+    file yang paling lama tidak dibaca (mtime) dihapus lebih dulu.
+    Objek di atas `blob_cache_max_object_bytes` tidak di-cache: dibaca langsung
+    (streaming) dari storage supaya open() tidak mengunduh seluruh isinya dulu.
+    Subclass wajib mengimplementasikan blob_info(name) -> (etag, size).
+    """
+
+    def __init__(self, *args, blob_cache_dir=None, blob_cache_max_bytes=None,
+                 blob_cache_max_object_bytes=None, **kwargs):
+        self.blob_cache_dir = blob_cache_dir or getattr(
+            settings, "MATERI_BLOB_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "learnhub-blob-cache"),
+        )
+        self.blob_cache_max_bytes = blob_cache_max_bytes or getattr(
+            settings, "MATERI_BLOB_CACHE_MAX_BYTES", 1024 * 1024 * 1024
+        )
+        self.blob_cache_max_object_bytes = blob_cache_max_object_bytes or getattr(
+            settings, "MATERI_BLOB_CACHE_MAX_OBJECT_BYTES", 100 * 1024 * 1024
+        )
+        super().__init__(*args, **kwargs)
+
+    def blob_info(self, name):
+        raise NotImplementedError("subclasses of BlobCacheMixin must provide a blob_info() method")
+
+    def blob_etag(self, name):
+        return self.blob_info(name)[0]
+
+    def _blob_path(self, name, etag):
+        key = hashlib.sha256(f"{name}\0{etag}".encode("utf-8")).hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(self.blob_cache_dir, key[:2], key + ext)
+
+    def _open(self, name, mode="rb"):
+        if any(flag in mode for flag in "wa+"):
+            return super()._open(name, mode)
+
+        etag, size = self.blob_info(name)
+        if size > self.blob_cache_max_object_bytes:
+            return super()._open(name, mode)
+
+        path = self._blob_path(name, etag)
+        try:
+            fh = open(path, "rb")
+            os.utime(path)  # tandai baru dipakai untuk LRU
+            return CachedBlobFile(fh, name, path, self)
+        except FileNotFoundError:
+            pass
+
+        self._download(name, path)
+        self.evict_blob_cache()
+        return CachedBlobFile(open(path, "rb"), name, path, self)
+
+    def _download(self, name, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        remote = super()._open(name, "rb")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(remote, tmp, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        finally:
+            remote.close()
+
+    def evict_blob_cache(self):
+        """Hapus file tertua (mtime) sampai total ukuran cache di bawah batas."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.blob_cache_dir):
+            for filename in files:
+                if filename.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.blob_cache_max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.blob_cache_max_bytes:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+
+class CachedS3Storage(BlobCacheMixin, S3Boto3Storage):
+    """S3Boto3Storage (Supabase) dengan cache disk lokal untuk file yang dibaca."""
+
+    def blob_info(self, name):
+        # Satu HEAD object untuk ETag dan ukuran
+        obj = self.bucket.Object(self._normalize_name(clean_name(name)))
+        try:
+            return obj.e_tag.strip('"'), obj.content_length
+        except ClientError as err:
+            if err.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+                raise FileNotFoundError("File does not exist: %s" % name)
+            raise
+
+
+class CachedFileSystemStorage(BlobCacheMixin, FileSystemStorage):
+    """Pengganti lokal untuk S3 (development/testing) dengan perilaku cache yang sama."""
+
+    def blob_info(self, name):
+        stat = os.stat(self.path(name))
+        return f"{stat.st_size}-{stat.st_mtime_ns}", stat.st_size
@@ -1,3 +1,1356 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from . import chat_limits, direct_upload, extract_cache, extraction, response_cache
+from .archive import export_materi, import_archive
+from .benchmark import generate_html, generate_pdf
+from .bulk import BulkError, reorder_submateri
+from .chat_backends import set_chat_backend
+from .chat_limits import ChatLimited, acquire_chat_slot, limiter_stats
+from .answer_cache import CHAT_ANSWER_CACHE_ALIAS, answer_cache_stats
+from .context_cache import CONTEXT_CACHE_ALIAS, cached_context, context_version
+from .images import VARIANT_WIDTHS, generate_variants
+from .file_utils import TABLE_MAX_CELL_CHARS, TABLE_MAX_COLS, TABLE_SAMPLE_ROWS, extract_file_details, extract_pdf_text
+from .helper import extract_text_and_images
+from .retrieval import bm25_scores, build_bm25_index, chunk_text, index_materi, select_chunks, tokenize
+from .models import (
+    ExtractedContent, FileContentCache, MateriChunk, MateriFile, MateriUtama, SearchDocument, SubMateri,
+)
+from .search import rebuild_search_index, search_documents
+from .storage import CachedBlobFile, CachedFileSystemStorage
+from .views_chat import MAX_CHARS_SOURCE, build_retrieved_context, chat_gpt, chat_gpt_async
 
-# Create your tests here.
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="stop")])
+
+
+def _chunk(content=None, finish_reason=None):
+    return SimpleNamespace(
+        usage=None,
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)],
+    )
+
+
+def _use_temp_storage(test):
+    """Storage default (S3) diganti FileSystemStorage di direktori sementara."""
+    directory = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, directory)
+    settings_override = override_settings(
+        MEDIA_ROOT=directory,
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        },
+    )
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+    return directory
+
+
+class StubStream:
+    def __init__(self, words):
+        self.chunks = iter([_chunk(word) for word in words] + [_chunk(finish_reason="stop")])
+        self.closed = False
+
+    def __iter__(self):
+        return self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+class StubChatBackend:
+    """Pengganti model chat: tanpa jaringan, mencatat stream yang dibuat."""
+
+    def __init__(self):
+        self.streams = []
+
+    def create(self, stream=False, **params):
+        if stream:
+            self.streams.append(StubStream(["Halo", " dunia"]))
+            return self.streams[-1]
+        return _completion("Halo dunia")
+
+
+class ChatLimiterTests(TestCase):
+    def setUp(self):
+        for alias in ("default", "chat_answers"):
+            caches[alias].clear()
+        self.backend = StubChatBackend()
+        self.addCleanup(set_chat_backend, set_chat_backend(self.backend))
+        self.factory = RequestFactory()
+
+    def limits(self, **values):
+        patcher = mock.patch.multiple(chat_limits, **values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def chat(self, ip="10.0.0.1", **body):
+        return self.client.post(
+            "/api/chat/",
+            {"message": "Apa itu fotosintesis?", "cache": False, **body},
+            content_type="application/json",
+            REMOTE_ADDR=ip,
+        )
+
+    def hold_slot(self, ip="10.0.0.99"):
+        return acquire_chat_slot(self.factory.post("/api/chat/", REMOTE_ADDR=ip), queue_timeout=0)
+
+    def test_sheds_with_429_when_concurrency_is_full(self):
+        self.limits(CHAT_MAX_CONCURRENT=1)
+        slot = self.hold_slot()
+
+        response = self.chat()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["reason"], "shed_concurrency")
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+        slot.release()
+        response = self.chat()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["reply"], "Halo dunia")
+        self.assertEqual(limiter_stats()["in_flight"], 0)
+
+    def test_client_rate_limit_ignores_spoofed_forwarded_for(self):
+        self.limits(CHAT_RATE_PER_MINUTE=1, CHAT_RATE_BURST=1)
+        self.assertEqual(self.chat(HTTP_X_FORWARDED_FOR="1.1.1.1").status_code, 200)
+
+        response = self.client.post(
+            "/api/chat/", {"message": "lagi", "cache": False}, content_type="application/json",
+            REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="2.2.2.2",
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json()["reason"], "shed_client_rate")
+        self.assertEqual(self.chat(ip="10.0.0.2").status_code, 200)
+
+    def test_trusted_proxy_uses_rightmost_forwarded_address(self):
+        self.limits(CHAT_TRUSTED_PROXY_COUNT=1)
+        request = self.factory.post("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 3.3.3.3")
+        self.assertEqual(chat_limits.client_ip(request), "3.3.3.3")
+
+    def test_queued_request_is_admitted_when_slot_frees(self):
+        self.limits(CHAT_MAX_CONCURRENT=1)
+        slot = self.hold_slot()
+        threading.Timer(0.2, slot.release).start()
+
+        admitted = acquire_chat_slot(self.factory.post("/", REMOTE_ADDR="10.0.0.1"), queue_timeout=3)
+        admitted.release()
+        self.assertEqual(limiter_stats()["queued"], 1)
+
+    def test_queue_timeout_sheds(self):
+        self.limits(CHAT_MAX_CONCURRENT=1)
+        slot = self.hold_slot()
+        with self.assertRaises(ChatLimited):
+            acquire_chat_slot(self.factory.post("/", REMOTE_ADDR="10.0.0.1"), queue_timeout=0.1)
+        slot.release()
+        self.assertEqual(limiter_stats()["shed_concurrency"], 1)
+
+    def test_stream_releases_slot_when_finished(self):
+        response = self.chat(stream=True)
+        self.assertEqual(limiter_stats()["in_flight"], 1)
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("event: done", body)
+        self.assertEqual(limiter_stats()["in_flight"], 0)
+
+    def test_stream_releases_slot_when_closed_early(self):
+        response = self.chat(stream=True)
+        self.assertEqual(limiter_stats()["in_flight"], 1)
+        response.close()  # client putus sebelum chunk pertama
+        self.assertEqual(limiter_stats()["in_flight"], 0)
+
+        response = self.chat(stream=True)
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertEqual(limiter_stats()["in_flight"], 0)
+        self.assertTrue(self.backend.streams[-1].closed)
+
+    def test_slot_counter_expires_under_steady_traffic(self):
+        self.limits(CHAT_MAX_CONCURRENT=1, CHAT_SLOT_TTL=60)
+        with mock.patch.object(chat_limits.time, "time", return_value=1000.0):
+            self.hold_slot()  # slot bocor: tidak pernah dilepas
+            with self.assertRaises(ChatLimited):
+                self.hold_slot(ip="10.0.0.2")
+        # Dua jendela kemudian slot bocor tidak lagi dihitung
+        with mock.patch.object(chat_limits.time, "time", return_value=1000.0 + 120):
+            self.hold_slot(ip="10.0.0.3").release()
+
+
+class ChatAsyncViewTests(SimpleTestCase):
+    async def test_non_object_json_body_is_rejected(self):
+        for body in ("[1, 2]", '"halo"', "null"):
+            request = AsyncRequestFactory().post("/api/chat/", body, content_type="application/json")
+            response = await chat_gpt_async(request)
+            self.assertEqual(response.status_code, 400, body)
+
+    async def test_non_string_message_is_rejected(self):
+        for body in ('{"message": 5}', '{"message": ["halo"]}', '{"message": "  "}'):
+            request = AsyncRequestFactory().post("/api/chat/", body, content_type="application/json")
+            response = await chat_gpt_async(request)
+            self.assertEqual(response.status_code, 400, body)
+
+
+class ChatSyncViewTests(TestCase):
+    def post(self, body):
+        request = RequestFactory().post("/api/chat/", body, content_type="application/json")
+        return chat_gpt(request)
+
+    def test_malformed_body_is_rejected(self):
+        for body in ([1, 2], "halo", {"message": 5}, {"message": None}, {"message": ""}):
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+
+    def test_prompt_is_not_printed(self):
+        previous = set_chat_backend(StubChatBackend())
+        self.addCleanup(set_chat_backend, previous)
+        with mock.patch("builtins.print") as printed:
+            response = self.post({"message": "rahasia siswa"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["reply"], "Halo dunia")
+        self.assertNotIn("rahasia siswa", str(printed.call_args_list))
+
+
+class BlobCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp(prefix="learnhub-media-")
+        self.cache_dir = tempfile.mkdtemp(prefix="learnhub-blob-")
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def storage(self, **kwargs):
+        storage = CachedFileSystemStorage(location=self.media, blob_cache_dir=self.cache_dir, **kwargs)
+        patcher = mock.patch.object(storage, "_download", wraps=storage._download)
+        self.downloads = patcher.start()
+        self.addCleanup(patcher.stop)
+        return storage
+
+    def read(self, storage, name):
+        with storage.open(name) as f:
+            return f.read()
+
+    def cached_files(self):
+        return sorted(name for _, _, files in os.walk(self.cache_dir) for name in files)
+
+    def test_miss_downloads_once_then_hits(self):
+        storage = self.storage()
+        name = storage.save("materi/files/a.txt", ContentFile(b"isi pertama"))
+
+        self.assertEqual(self.read(storage, name), b"isi pertama")
+        self.assertEqual(self.read(storage, name), b"isi pertama")
+        self.assertEqual(self.downloads.call_count, 1)
+        self.assertIsInstance(storage.open(name), CachedBlobFile)
+
+    def test_changed_etag_downloads_new_content(self):
+        storage = self.storage()
+        name = storage.save("materi/files/a.txt", ContentFile(b"versi satu"))
+        self.read(storage, name)
+
+        with open(storage.path(name), "wb") as f:
+            f.write(b"versi kedua yang lebih panjang")
+        self.assertEqual(self.read(storage, name), b"versi kedua yang lebih panjang")
+        self.assertEqual(self.downloads.call_count, 2)
+
+    def test_evicts_least_recently_read(self):
+        storage = self.storage(blob_cache_max_bytes=250)
+        names = [storage.save(f"materi/files/{i}.bin", ContentFile(bytes([i]) * 100)) for i in range(3)]
+
+        self.read(storage, names[0])
+        self.read(storage, names[1])
+        # Mundurkan mtime, lalu names[0] dibaca ulang: names[1] jadi yang paling lama tidak dipakai
+        past = time.time() - 60
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                os.utime(os.path.join(root, filename), (past, past))
+        self.read(storage, names[0])
+        self.read(storage, names[2])
+
+        self.assertEqual(len(self.cached_files()), 2)
+        self.read(storage, names[0])
+        self.assertEqual(self.downloads.call_count, 3)
+        self.read(storage, names[1])
+        self.assertEqual(self.downloads.call_count, 4)
+
+    def test_large_object_is_streamed_without_caching(self):
+        storage = self.storage(blob_cache_max_object_bytes=10)
+        name = storage.save("materi/files/besar.bin", ContentFile(b"x" * 100))
+
+        f = storage.open(name)
+        self.assertNotIsInstance(f, CachedBlobFile)
+        self.assertEqual(f.read(), b"x" * 100)
+        f.close()
+        self.downloads.assert_not_called()
+        self.assertEqual(self.cached_files(), [])
+
+
+class StreamHtmlParserTests(SimpleTestCase):
+    """Parser "stream" harus menghasilkan teks yang sama dengan BeautifulSoup html.parser."""
+
+    CASES = [
+        "<p>a</p>\n<p>b</p>",
+        "<p>a</p>  <p>b</p>",
+        "<p>a</p>\n\n\n<p>b</p>",
+        "<ul>\n  <li>satu</li>\n  <li>dua</li>\n</ul>",
+        "<div><![CDATA[x < y]]></div>",
+        "<pre>  baris\n\n  </pre><pre>\n\n</pre>",
+        "<textarea>  </textarea>",
+        "a<br>b<img src='https://example.com/a.png'>c",
+        "<p>x &amp; y &#233; &nbsp;</p>",
+        "<script>var a = '<p>';</script>t<style>p {}</style><template><p>t</p></template>u",
+        "<!-- komentar -->z<!DOCTYPE html><?php x ?>",
+        "<p>unclosed <b>bold",
+        "<table><tr><td>1</td>\r\n<td>2</td></tr></table>",
+    ]
+
+    def assertParity(self, html):
+        self.assertEqual(
+            extract_text_and_images(html, parser="stream"),
+            extract_text_and_images(html, parser="html.parser"),
+        )
+
+    def test_matches_html_parser_on_edge_cases(self):
+        for html in self.CASES:
+            with self.subTest(html=html):
+                self.assertParity(html)
+
+    def test_matches_html_parser_on_generated_isi(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="learnhub-html-"), "isi.html")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+        generate_html(path, 64, random.Random(7))
+        with open(path, encoding="utf-8") as f:
+            self.assertParity(f.read())
+
+
+class BulkSubmateriTests(TestCase):
+    def setUp(self):
+        self.materi = MateriUtama.objects.create(judul="Biologi", slug="biologi")
+        for i in (1, 2):
+            SubMateri.objects.create(parent=self.materi, judul=f"Awal {i}", slug=f"awal-{i}", isi=f"<p>awal {i}</p>")
+        self.other = MateriUtama.objects.create(judul="Kimia", slug="kimia")
+        SubMateri.objects.create(parent=self.other, judul="Atom", slug="atom", isi="<p>atom</p>")
+
+    def bulk(self, items, materi_slug="biologi"):
+        return self.client.post(f"/api/materi/{materi_slug}/sub/bulk/", items, content_type="application/json")
+
+    def reorder(self, body, materi_slug="biologi"):
+        return self.client.post(f"/api/materi/{materi_slug}/sub/reorder/", body, content_type="application/json")
+
+    def urutan(self):
+        return list(SubMateri.objects.filter(parent=self.materi).order_by("urutan").values_list("slug", "urutan"))
+
+    def test_bulk_create_appends_contiguous_urutan(self):
+        response = self.bulk([{"judul": f"Bagian {i}", "isi": f"<p>isi {i}</p>"} for i in range(3)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["urutan"] for row in response.json()], [3, 4, 5])
+        self.assertEqual([u for _, u in self.urutan()], [1, 2, 3, 4, 5])
+        self.assertTrue(MateriChunk.objects.filter(submateri__slug="bagian-0").exists())
+
+    def test_bulk_create_query_count_does_not_grow_with_items(self):
+        def queries(prefix, n):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.bulk([{"judul": f"{prefix} {i}", "isi": f"<p>{i}</p>"} for i in range(n)])
+            self.assertEqual(response.status_code, 201)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries("dua", 2), queries("sepuluh", 10))
+
+    def test_bulk_create_rejects_taken_or_duplicate_slugs(self):
+        self.assertEqual(self.bulk([{"judul": "Atom"}]).status_code, 400)
+        self.assertEqual(self.bulk([{"judul": "Sel"}, {"judul": "sel"}]).status_code, 400)
+        self.assertEqual(SubMateri.objects.filter(parent=self.materi).count(), 2)
+
+    def test_reorder_sets_contiguous_urutan(self):
+        self.bulk([{"judul": "Baru"}])
+        response = self.reorder({"order": ["baru", "awal-2", "awal-1"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.urutan(), [("baru", 1), ("awal-2", 2), ("awal-1", 3)])
+
+    def test_reorder_query_count_does_not_grow_with_submateri(self):
+        def queries(order):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.reorder({"order": order}).status_code, 200)
+            return len(ctx.captured_queries)
+
+        small = queries(["awal-2", "awal-1"])
+        self.bulk([{"judul": f"Tambahan {i}"} for i in range(8)])
+        order = [slug for slug, _ in self.urutan()]
+        self.assertEqual(queries(order[::-1]), small)
+
+    def test_reorder_rejects_duplicate_missing_or_foreign_slug(self):
+        for order in (["awal-1", "awal-1"], ["awal-1"], ["awal-1", "awal-2", "atom"], ["awal-1", "atom"]):
+            with self.subTest(order=order):
+                self.assertEqual(self.reorder({"order": order}).status_code, 400)
+        self.assertEqual(self.urutan(), [("awal-1", 1), ("awal-2", 2)])
+
+    def test_reorder_rejects_malformed_order(self):
+        for body in ({"order": [{"a": 1}]}, {"order": "awal-1"}, {"order": [1, 2]}, {}, [["awal-1"]]):
+            with self.subTest(body=body):
+                self.assertEqual(self.reorder(body).status_code, 400)
+        with self.assertRaises(BulkError):
+            reorder_submateri(self.materi, [["awal-1"], "awal-2"])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(response_cache, "RESPONSE_CACHE_ALIAS", "default")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+        self.materi = MateriUtama.objects.create(judul="Fisika", slug="fisika")
+        self.sub = SubMateri.objects.create(parent=self.materi, judul="Gaya", slug="gaya", isi="<p>gaya</p>")
+
+    def test_second_get_is_served_from_cache(self):
+        first = self.client.get("/api/materi/fisika/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/materi/fisika/")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+        stats = response_cache.cache_stats()
+        self.assertEqual((stats["hit"], stats["miss"]), (1, 1))
+
+    def test_conditional_get_is_answered_from_cache(self):
+        etag = self.client.get("/api/materi/fisika/gaya/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/materi/fisika/gaya/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get("/api/materi/")
+        self.client.get("/api/materi/", {"page_size": 1})
+        self.assertEqual(response_cache.cache_stats()["miss"], 2)
+
+    def test_edit_invalidates_materi_and_submateri_responses(self):
+        self.client.get("/api/materi/fisika/")
+        self.client.get("/api/materi/fisika/gaya/")
+        self.client.get("/api/materi/")
+
+        self.sub.judul = "Gaya Gesek"
+        self.sub.save()
+
+        self.assertEqual(self.client.get("/api/materi/fisika/gaya/").json()["judul"], "Gaya Gesek")
+        self.assertIn("Gaya Gesek", str(self.client.get("/api/materi/fisika/").json()))
+        self.client.get("/api/materi/")
+        self.assertEqual(response_cache.cache_stats()["hit"], 0)
+
+    def test_materi_rename_invalidates_submateri_under_old_slug(self):
+        self.assertEqual(self.client.get("/api/materi/fisika/gaya/").status_code, 200)
+        self.materi.slug = "fisika-dasar"
+        self.materi.save()
+
+        self.assertEqual(self.client.get("/api/materi/fisika/gaya/").status_code, 404)
+        self.assertEqual(self.client.get("/api/materi/fisika/").status_code, 404)
+        self.assertEqual(self.client.get("/api/materi/fisika-dasar/gaya/").status_code, 200)
+
+    def test_error_responses_are_not_cached(self):
+        self.client.get("/api/materi/kimia/")
+        MateriUtama.objects.create(judul="Kimia", slug="kimia")
+        self.assertEqual(self.client.get("/api/materi/kimia/").status_code, 200)
+
+    def cached_key(self, path):
+        request = RequestFactory().get(path)
+        return response_cache._cache_key("materi-detail", ["materi:fisika"], request)
+
+    def test_waiter_gets_entry_built_by_lock_holder(self):
+        self.client.get("/api/materi/fisika/")
+        key = self.cached_key("/api/materi/fisika/")
+        cache = caches["default"]
+        entry = cache.get(key)
+        cache.delete(key)
+        cache.add(f"{key}:lock", 1)
+        timer = threading.Timer(0.1, cache.set, args=(key, entry))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/materi/fisika/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_cache.cache_stats()["wait_hit"], 1)
+
+    def test_waiter_builds_response_itself_after_timeout(self):
+        key = self.cached_key("/api/materi/fisika/")
+        caches["default"].add(f"{key}:lock", 1)
+        with mock.patch.object(response_cache, "REBUILD_WAIT_SECONDS", 0.1):
+            response = self.client.get("/api/materi/fisika/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_cache.cache_stats()["wait_timeout"], 1)
+        # Pemegang lock yang menyimpan entri; waiter tidak
+        self.assertIsNone(caches["default"].get(key))
+
+    def test_disabled_cache_runs_view_directly(self):
+        with mock.patch.object(response_cache, "RESPONSE_CACHE_ALIAS", None):
+            self.client.get("/api/materi/fisika/")
+            self.assertEqual(response_cache.cache_stats(), {"enabled": False})
+        self.assertEqual(response_cache.cache_stats()["miss"], 0)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.materi = MateriUtama.objects.create(judul="Biologi", slug="biologi", deskripsi="<p>Ilmu tentang makhluk hidup</p>")
+        self.sub = SubMateri.objects.create(
+            parent=self.materi, judul="Fotosintesis", slug="fotosintesis",
+            isi="<p>Tumbuhan membuat makanan sendiri dengan bantuan cahaya matahari.</p>",
+        )
+
+    def titles(self, query):
+        return [result["judul"] for result in search_documents(query)[1]]
+
+    def add_file(self, **kwargs):
+        return MateriFile.objects.create(submateri=self.sub, file="materi/files/catatan.pdf", **kwargs)
+
+    def test_title_match_ranks_above_body_match(self):
+        SubMateri.objects.create(
+            parent=self.materi, judul="Respirasi", slug="respirasi",
+            isi="<p>Respirasi adalah kebalikan dari fotosintesis.</p>",
+        )
+        self.assertEqual(self.titles("fotosintesis"), ["Fotosintesis", "Respirasi"])
+
+    def test_prefix_and_all_terms_match(self):
+        self.assertEqual(self.titles("fotosin"), ["Fotosintesis"])
+        self.assertEqual(self.titles("tumbuhan cahaya"), ["Fotosintesis"])
+        self.assertEqual(self.titles("tumbuhan kimia"), [])
+        self.assertEqual(search_documents("  !? "), (0, []))
+
+    def test_snippet_marks_terms_and_escapes_html(self):
+        self.add_file(judul="Catatan", deskripsi="Rumus: cahaya < energi & klorofil")
+        result = next(r for r in search_documents("klorofil")[1] if r["kind"] == "file")
+        self.assertIn("<mark>klorofil</mark>", result["snippet"])
+        self.assertIn("&lt;", result["snippet"])
+        self.assertEqual(result["materi"]["slug"], "biologi")
+        self.assertEqual(result["submateri"]["slug"], "fotosintesis")
+
+    def test_search_view_paginates(self):
+        for i in range(5):
+            SubMateri.objects.create(parent=self.materi, judul=f"Sel {i}", slug=f"sel-{i}", isi="<p>membran sel</p>")
+        first = self.client.get("/api/search/", {"q": "membran", "page_size": 2}).json()
+        self.assertEqual(first["count"], 5)
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).json()
+        third = self.client.get(second["next"]).json()
+        self.assertIsNone(third["next"])
+        judul = [r["judul"] for page in (first, second, third) for r in page["results"]]
+        self.assertEqual(sorted(judul), [f"Sel {i}" for i in range(5)])
+        self.assertEqual(self.client.get("/api/search/", {"q": "membran", "page": "x"}).status_code, 400)
+
+    def test_submateri_changes_update_index(self):
+        self.sub.isi = "<p>Klorofil menyerap cahaya.</p>"
+        self.sub.save()
+        self.assertEqual(self.titles("klorofil"), ["Fotosintesis"])
+        self.assertEqual(self.titles("makanan"), [])
+
+        self.sub.delete()
+        self.assertEqual(self.titles("klorofil"), [])
+        self.assertEqual(self.titles("biologi"), ["Biologi"])
+
+    def test_materi_file_changes_update_index(self):
+        materi_file = self.add_file(judul="Lembar Kerja", deskripsi="latihan soal")
+        self.assertEqual(self.titles("latihan"), ["Lembar Kerja"])
+
+        ExtractedContent.objects.create(materi_file=materi_file, source_name=materi_file.file.name, text="stomata daun")
+        self.assertEqual(self.titles("stomata"), ["Lembar Kerja"])
+
+        materi_file.judul = "Lembar Diskusi"
+        materi_file.save()
+        self.assertEqual(self.titles("stomata"), ["Lembar Diskusi"])
+
+        materi_file.delete()
+        self.assertEqual(self.titles("stomata"), [])
+        self.assertEqual(self.titles("latihan"), [])
+
+    def test_rebuild_restores_index(self):
+        self.add_file(judul="Lembar Kerja")
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.titles("lembar"), [])
+        self.assertEqual(rebuild_search_index(), 3)
+        self.assertEqual(self.titles("lembar"), ["Lembar Kerja"])
+        self.assertEqual(self.titles("fotosin"), ["Fotosintesis"])
+
+    def test_extraction_error_is_not_indexed(self):
+        materi_file = self.add_file(judul="Rusak")
+        ExtractedContent.objects.create(
+            materi_file=materi_file, source_name=materi_file.file.name, text="[Error reading PDF: rusak]",
+        )
+        self.assertEqual(self.titles("reading"), [])
+
+
+class ContextCacheTests(TestCase):
+    def setUp(self):
+        caches[CONTEXT_CACHE_ALIAS].clear()
+        self.addCleanup(caches[CONTEXT_CACHE_ALIAS].clear)
+        self.materi = MateriUtama.objects.create(judul="Sejarah", slug="sejarah")
+        self.sub = SubMateri.objects.create(parent=self.materi, judul="Kerajaan", slug="kerajaan", isi="<p>Majapahit</p>")
+
+    def version(self, sub_slug=None):
+        self.materi.refresh_from_db()
+        return context_version(self.materi, sub_slug)
+
+    def test_version_changes_when_content_is_edited(self):
+        before = self.version()
+        self.sub.isi = "<p>Sriwijaya</p>"
+        self.sub.save()
+        after_sub = self.version()
+        self.assertNotEqual(after_sub, before)
+
+        materi_file = MateriFile.objects.create(submateri=self.sub, file="materi/files/peta.pdf", judul="Peta")
+        after_file = self.version()
+        self.assertNotEqual(after_file, after_sub)
+
+        ExtractedContent.objects.create(materi_file=materi_file, source_name=materi_file.file.name, text="peta")
+        self.assertNotEqual(self.version(), after_file)
+
+        self.materi.deskripsi = "Sejarah Indonesia"
+        self.materi.save()
+        self.assertNotEqual(self.version(), after_file)
+
+    def test_cached_context_rebuilds_after_edit(self):
+        builder = mock.Mock(side_effect=["lama", "baru"])
+        self.assertEqual(cached_context("corpus", self.materi, None, builder), "lama")
+        self.assertEqual(cached_context("corpus", self.materi, None, builder), "lama")
+        self.sub.isi = "<p>Sriwijaya</p>"
+        self.sub.save()
+        self.materi.refresh_from_db()
+        self.assertEqual(cached_context("corpus", self.materi, None, builder), "baru")
+        self.assertEqual(builder.call_count, 2)
+
+
+def _chunk_rows(texts):
+    rows = []
+    for i, text in enumerate(texts):
+        tokens = tokenize(text)
+        terms = {}
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+        rows.append({"id": i + 1, "submateri_id": 1, "materi_file_id": None, "text": text, "terms": terms, "length": len(tokens)})
+    return rows
+
+
+class RetrievalTests(TestCase):
+    def test_chunk_text_respects_size_and_overlap(self):
+        self.assertEqual(chunk_text("  \n "), [])
+        self.assertEqual(chunk_text("satu\n\ndua", size=100), ["satu\ndua"])
+
+        paragraphs = [f"paragraf {i} " + "isi " * 20 for i in range(10)]
+        chunks = chunk_text("\n\n".join(paragraphs), size=200, overlap=30)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 200 for c in chunks))
+        for paragraph in paragraphs:
+            self.assertTrue(any(paragraph.strip() in c for c in chunks))
+
+        long_chunks = chunk_text("x" * 500, size=200, overlap=50)
+        self.assertEqual([len(c) for c in long_chunks], [200, 200, 200])
+        self.assertEqual(long_chunks[0][-50:], long_chunks[1][:50])
+
+    def test_bm25_prefers_rare_and_frequent_terms(self):
+        chunks = _chunk_rows([
+            "fotosintesis fotosintesis klorofil",
+            "fotosintesis terjadi di daun",
+            "respirasi sel",
+        ])
+        scores = bm25_scores(chunks, tokenize("fotosintesis klorofil"))
+        self.assertEqual(set(scores), {1, 2})
+        self.assertGreater(scores[1], scores[2])
+        self.assertEqual(scores, bm25_scores(chunks, tokenize("fotosintesis klorofil"), build_bm25_index(chunks)))
+        self.assertEqual(bm25_scores(chunks, []), {})
+        self.assertEqual(bm25_scores([], ["sel"]), {})
+
+    def test_select_chunks_stays_within_budget_in_materi_order(self):
+        chunks = _chunk_rows([f"bagian {i} " + "mitokondria " * 300 for i in range(20)])
+        selected = select_chunks(chunks, "mitokondria", top_k=20, max_chars=MAX_CHARS_SOURCE)
+        self.assertTrue(selected)
+        self.assertLessEqual(sum(len(c["text"]) for c in selected), MAX_CHARS_SOURCE)
+        self.assertEqual([c["id"] for c in selected], sorted(c["id"] for c in selected))
+
+    def test_select_chunks_falls_back_to_leading_chunks(self):
+        chunks = _chunk_rows(["awal", "tengah", "akhir"])
+        self.assertEqual([c["id"] for c in select_chunks(chunks, "tidak ada", top_k=2)], [1, 2])
+        self.assertEqual([c["id"] for c in select_chunks(chunks, "akhir", top_k=2)], [3])
+
+    def test_retrieved_context_is_bounded(self):
+        caches[CONTEXT_CACHE_ALIAS].clear()
+        self.addCleanup(caches[CONTEXT_CACHE_ALIAS].clear)
+        materi = MateriUtama.objects.create(judul="Biologi", slug="biologi")
+        for i in range(30):
+            paragraphs = "".join(f"<p>sel {i} membran {j} " + "protein " * 40 + "</p>" for j in range(10))
+            SubMateri.objects.create(parent=materi, judul=f"Bab {i}", slug=f"bab-{i}", isi=paragraphs)
+
+        text, _ = build_retrieved_context(materi, "membran protein")
+        body = [line for line in text.split("\n") if line and not line.startswith(("Materi:", "--- Submateri:"))]
+        self.assertLessEqual(sum(len(line) for line in body), MAX_CHARS_SOURCE)
+        self.assertIn("membran", text)
+
+
+class ExtractCacheTests(TestCase):
+    def setUp(self):
+        self.etag = "v1"
+        patcher = mock.patch.object(extract_cache, "file_etag", side_effect=lambda f: self.etag)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def extractor(self, text="isi file"):
+        return mock.Mock(return_value={
+            "text": text, "image_urls": [], "page_count": 1, "page_offsets": [0], "truncated": False,
+        })
+
+    def extract(self, name, extractor):
+        return extract_cache.cached_extract_file_details(SimpleNamespace(name=name), extractor=extractor)
+
+    def test_same_etag_is_served_from_cache(self):
+        extractor = self.extractor()
+        self.extract("materi/files/a.pdf", extractor)
+        details = self.extract("materi/files/a.pdf", extractor)
+        self.assertEqual(details["text"], "isi file")
+        self.assertEqual(details["page_offsets"], [0])
+        self.assertEqual(extractor.call_count, 1)
+
+    def test_etag_change_misses_cache(self):
+        extractor = self.extractor()
+        self.extract("materi/files/a.pdf", extractor)
+        self.etag = "v2"
+        self.extract("materi/files/a.pdf", extractor)
+        self.assertEqual(extractor.call_count, 2)
+        self.assertEqual(
+            sorted(FileContentCache.objects.values_list("etag", flat=True)), ["v1", "v2"],
+        )
+
+    def test_extraction_error_is_not_cached(self):
+        extractor = self.extractor("[Error reading PDF: rusak]")
+        self.extract("materi/files/a.pdf", extractor)
+        self.extract("materi/files/a.pdf", extractor)
+        self.assertEqual(extractor.call_count, 2)
+        self.assertFalse(FileContentCache.objects.exists())
+
+    def test_oldest_rows_are_evicted_over_the_cap(self):
+        with mock.patch.object(extract_cache, "EXTRACT_CACHE_MAX_BYTES", 25):
+            for name in ("a", "b", "c"):
+                self.extract(f"materi/files/{name}.pdf", self.extractor("x" * 10))
+            self.assertEqual(
+                sorted(FileContentCache.objects.values_list("storage_name", flat=True)),
+                ["materi/files/b.pdf", "materi/files/c.pdf"],
+            )
+
+            # Akses ulang memperbarui accessed_at sehingga "b" tidak tergusur lebih dulu
+            self.extract("materi/files/b.pdf", self.extractor())
+            self.extract("materi/files/d.pdf", self.extractor("x" * 10))
+            self.assertEqual(
+                sorted(FileContentCache.objects.values_list("storage_name", flat=True)),
+                ["materi/files/b.pdf", "materi/files/d.pdf"],
+            )
+
+    def test_invalidate_removes_every_etag(self):
+        self.extract("materi/files/a.pdf", self.extractor())
+        self.etag = "v2"
+        self.extract("materi/files/a.pdf", self.extractor())
+        extract_cache.invalidate_extract_cache("materi/files/a.pdf")
+        self.assertFalse(FileContentCache.objects.exists())
+
+
+class PdfExtractionTests(SimpleTestCase):
+    def test_page_offsets_cover_every_page(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "materi.pdf")
+        generate_pdf(path, 4, random.Random(1))
+
+        with open(path, "rb") as f:
+            text, page_count, page_offsets = extract_pdf_text(f)
+        self.assertEqual(page_count, 4)
+        self.assertEqual([o["page"] for o in page_offsets], [1, 2, 3, 4])
+        self.assertEqual(page_offsets[-1]["end"], len(text))
+        for previous, current in zip(page_offsets, page_offsets[1:]):
+            self.assertEqual(current["start"], previous["end"] + 2)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.source = FileSystemStorage(location=os.path.join(directory, "source"))
+        self.target = FileSystemStorage(location=os.path.join(directory, "target"))
+        self.path = os.path.join(directory, "biologi.tar.gz")
+
+        self.materi = MateriUtama.objects.create(judul="Biologi", slug="biologi", deskripsi="Makhluk hidup")
+        sub = SubMateri.objects.create(parent=self.materi, judul="Sel", slug="sel", isi="<p>membran</p>", urutan=1)
+        for judul, content in (("Ringkasan", b"ringkasan sel"), ("Salinan", b"ringkasan sel"), ("Latihan", b"soal")):
+            name = self.source.save(f"materi/files/{judul.lower()}.txt", ContentFile(content))
+            MateriFile.objects.create(submateri=sub, file=name, judul=judul)
+        self.assertEqual(export_materi(self.materi, self.path, storage=self.source), 2)
+
+    def rows(self):
+        return (
+            list(SubMateri.objects.filter(parent__slug="biologi").order_by("pk").values_list("pk", "slug", "judul", "urutan")),
+            list(MateriFile.objects.filter(submateri__parent__slug="biologi").order_by("pk").values_list("pk", "file", "judul")),
+        )
+
+    def test_round_trip_and_reimport_uploads_nothing(self):
+        self.materi.delete()
+        materi, stats = import_archive(self.path, storage=self.target)
+        self.assertEqual((stats["created"], stats["uploaded"]), (5, 2))
+        self.assertEqual(materi.deskripsi, "Makhluk hidup")
+        files = MateriFile.objects.filter(submateri__parent=materi)
+        self.assertEqual(sorted(files.values_list("judul", flat=True)), ["Latihan", "Ringkasan", "Salinan"])
+        for materi_file in files:
+            with self.target.open(materi_file.file.name) as f:
+                self.assertIn(f.read(), (b"ringkasan sel", b"soal"))
+
+        before = self.rows()
+        _, stats = import_archive(self.path, storage=self.target, replace=True)
+        self.assertEqual(stats, {"created": 0, "updated": 5, "deleted": 0, "uploaded": 0})
+        self.assertEqual(self.rows(), before)
+
+    def test_existing_slug_needs_replace(self):
+        with self.assertRaises(ValueError):
+            import_archive(self.path, storage=self.target)
+        # Konflik dicek sebelum upload: tidak ada blob yatim di storage tujuan
+        self.assertFalse(os.path.exists(self.target.location))
+
+    def test_replace_removes_rows_missing_from_archive(self):
+        import_archive(self.path, storage=self.target, replace=True)
+        sub = SubMateri.objects.get(slug="sel")
+        MateriFile.objects.create(submateri=sub, file="materi/files/baru.txt", judul="Baru")
+        SubMateri.objects.create(parent=self.materi, judul="Jaringan", slug="jaringan", urutan=2)
+
+        _, stats = import_archive(self.path, storage=self.target, replace=True)
+        self.assertEqual(stats["deleted"], 2)
+        self.assertFalse(SubMateri.objects.filter(slug="jaringan").exists())
+        self.assertFalse(MateriFile.objects.filter(judul="Baru").exists())
+        self.assertEqual(MateriFile.objects.filter(submateri=sub).count(), 3)
+
+    def test_checksum_mismatch_is_rejected(self):
+        with tarfile.open(self.path) as archive:
+            members = [(m, archive.extractfile(m).read()) for m in archive.getmembers()]
+        manifest = json.loads(members[0][1])
+        blob_path = manifest["submateri"][0]["files"][0]["file"]["path"]
+        tampered = os.path.join(os.path.dirname(self.path), "tampered.tar")
+        with tarfile.open(tampered, "w") as archive:
+            for member, data in members:
+                if member.name == blob_path:
+                    data = b"isi lain"
+                    member.size = len(data)
+                archive.addfile(member, io.BytesIO(data))
+
+        self.materi.delete()
+        with self.assertRaisesMessage(ValueError, "Checksum"):
+            import_archive(tampered, storage=self.target)
+        self.assertFalse(MateriUtama.objects.filter(slug="biologi").exists())
+
+
+class ExtractedContentTests(TestCase):
+    def setUp(self):
+        _use_temp_storage(self)
+        materi = MateriUtama.objects.create(judul="Kimia", slug="kimia")
+        self.sub = SubMateri.objects.create(parent=materi, judul="Atom", slug="atom")
+
+    def upload(self, content=b"proton neutron elektron"):
+        response = self.client.post("/api/materi-file/", {
+            "submateri": self.sub.pk,
+            "judul": "Catatan",
+            "file": SimpleUploadedFile("catatan.txt", content, content_type="text/plain"),
+        })
+        self.assertEqual(response.status_code, 201)
+        return MateriFile.objects.get(pk=response.json()["id"])
+
+    def test_row_is_written_at_upload(self):
+        materi_file = self.upload()
+        extracted = ExtractedContent.objects.get(materi_file=materi_file)
+        self.assertEqual(extracted.text, "proton neutron elektron")
+        self.assertEqual(extracted.char_count, len(extracted.text))
+        self.assertEqual(extracted.source_name, materi_file.file.name)
+        self.assertEqual(extracted.error, "")
+
+        with mock.patch.object(extraction, "extract_file_details") as extractor:
+            response = self.client.get(f"/api/materi-file/{materi_file.pk}/content/")
+        self.assertEqual(response.json()["content"], "proton neutron elektron")
+        extractor.assert_not_called()
+
+    def test_failed_extraction_sets_error_and_is_retried(self):
+        failure = {"text": "[Error reading file: rusak]", "image_urls": [], "page_count": None, "page_offsets": [], "truncated": False}
+        with mock.patch.object(extraction, "extract_file_details", return_value=failure):
+            materi_file = self.upload()
+            response = self.client.get(f"/api/materi-file/{materi_file.pk}/content/")
+        extracted = ExtractedContent.objects.get(materi_file=materi_file)
+        self.assertEqual((extracted.text, extracted.error), ("", "[Error reading file: rusak]"))
+        self.assertEqual(response.status_code, 500)
+
+        response = self.client.get(f"/api/materi-file/{materi_file.pk}/content/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["content"], "proton neutron elektron")
+        extracted.refresh_from_db()
+        self.assertEqual(extracted.error, "")
+
+
+class MateriListFieldsTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            materi = MateriUtama.objects.create(judul=f"Materi {i}", slug=f"materi-{i}", deskripsi="panjang " * 50)
+            for j in range(2):
+                sub = SubMateri.objects.create(parent=materi, judul=f"Sub {i}-{j}", slug=f"sub-{i}-{j}", isi="<p>isi</p>")
+                MateriFile.objects.create(submateri=sub, file=f"materi/files/{i}-{j}.pdf", judul=f"File {i}-{j}")
+
+    def test_fields_limit_output_and_skip_relations(self):
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/materi/", {"fields": "judul,slug"}).json()
+        self.assertEqual(data[0], {"judul": "Materi 0", "slug": "materi-0"})
+
+    def test_nested_fields(self):
+        data = self.client.get("/api/materi/", {"fields": "slug,submateri.judul"}).json()
+        self.assertEqual(data[0], {"slug": "materi-0", "submateri": [{"judul": "Sub 0-0"}, {"judul": "Sub 0-1"}]})
+
+    def test_include_adds_relations_to_default_fields(self):
+        data = self.client.get("/api/materi/", {"include": "submateri"}).json()
+        self.assertIn("deskripsi", data[0])
+        self.assertNotIn("files", data[0]["submateri"][0])
+
+        data = self.client.get("/api/materi/", {"include": "submateri,submateri.files"}).json()
+        self.assertEqual(data[0]["submateri"][0]["files"][0]["judul"], "File 0-0")
+
+    def test_full_listing_uses_three_queries(self):
+        with self.assertNumQueries(3):
+            data = self.client.get("/api/materi/").json()
+        self.assertEqual(len(data), 3)
+        self.assertEqual(len(data[2]["submateri"][1]["files"]), 1)
+
+        materi = MateriUtama.objects.create(judul="Materi 3", slug="materi-3")
+        SubMateri.objects.create(parent=materi, judul="Sub 3", slug="sub-3")
+        with self.assertNumQueries(3):
+            self.client.get("/api/materi/")
+
+    def test_summary_view(self):
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/materi/", {"view": "summary"}).json()
+        self.assertEqual(data[0]["submateri_count"], 2)
+        self.assertNotIn("submateri", data[0])
+
+
+class CursorPaginationTests(TestCase):
+    def walk(self, url, params):
+        ids, pages = [], 0
+        data = self.client.get(url, params).json()
+        while True:
+            pages += 1
+            ids.extend(row["id"] for row in data["results"])
+            if not data["next"]:
+                return ids, pages
+            data = self.client.get(data["next"]).json()
+
+    def test_materi_list_cursor_is_continuous(self):
+        for i in range(7):
+            MateriUtama.objects.create(judul=f"Materi {i}", slug=f"materi-{i}")
+        ids, pages = self.walk("/api/materi/", {"page_size": 3, "fields": "id"})
+        self.assertEqual(ids, list(MateriUtama.objects.order_by("id").values_list("id", flat=True)))
+        self.assertEqual(pages, 3)
+
+    def test_rows_added_between_pages_are_not_skipped(self):
+        for i in range(4):
+            MateriUtama.objects.create(judul=f"Materi {i}", slug=f"materi-{i}")
+        first = self.client.get("/api/materi/", {"page_size": 2, "fields": "id"}).json()
+        MateriUtama.objects.create(judul="Baru", slug="baru")
+        second = self.client.get(first["next"]).json()
+        third = self.client.get(second["next"]).json()
+        ids = [row["id"] for page in (first, second, third) for row in page["results"]]
+        self.assertEqual(ids, list(MateriUtama.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_materi_list_without_params_is_not_paginated(self):
+        MateriUtama.objects.create(judul="Materi", slug="materi")
+        self.assertIsInstance(self.client.get("/api/materi/").json(), list)
+
+    def test_page_size_is_capped(self):
+        MateriUtama.objects.bulk_create(
+            MateriUtama(judul=f"Materi {i}", slug=f"materi-{i}") for i in range(settings.API_MAX_PAGE_SIZE + 5)
+        )
+        data = self.client.get("/api/materi/", {"page_size": 1000, "fields": "id"}).json()
+        self.assertEqual(len(data["results"]), settings.API_MAX_PAGE_SIZE)
+        self.assertIsNotNone(data["next"])
+
+    def test_list_gurus_cursor_and_cap(self):
+        User = get_user_model()
+        for i in range(5):
+            User.objects.create_user(username=f"guru{i}", password="x", role="guru")
+        User.objects.create_user(username="siswa", password="x")
+
+        ids, pages = self.walk("/accounts/auth/list-gurus/", {"page_size": 2})
+        self.assertEqual(ids, list(User.objects.filter(role="guru").order_by("id").values_list("id", flat=True)))
+        self.assertEqual(pages, 3)
+
+        User.objects.bulk_create(
+            User(username=f"guru-lain{i}", role="guru") for i in range(settings.API_MAX_PAGE_SIZE)
+        )
+        data = self.client.get("/accounts/auth/list-gurus/", {"page_size": 1000}).json()
+        self.assertEqual(len(data["results"]), settings.API_MAX_PAGE_SIZE)
+        self.assertEqual(set(data["results"][0]), {"id", "username", "email"})
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.materi = MateriUtama.objects.create(judul="Ekonomi", slug="ekonomi")
+        self.sub = SubMateri.objects.create(parent=self.materi, judul="Pasar", slug="pasar", isi="<p>pasar</p>")
+        self.urls = ("/api/materi/ekonomi/", "/api/materi/ekonomi/pasar/")
+
+    def test_if_none_match_returns_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIn("must-revalidate", first["Cache-Control"])
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+    def test_if_modified_since_returns_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                last_modified = self.client.get(url)["Last-Modified"]
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_query_string(self):
+        plain = self.client.get(self.urls[0])["ETag"]
+        sparse = self.client.get(self.urls[0], {"fields": "judul"})["ETag"]
+        self.assertNotEqual(plain, sparse)
+
+    def test_edit_produces_new_etag(self):
+        etags = {url: self.client.get(url)["ETag"] for url in self.urls}
+
+        self.sub.isi = "<p>pasar modal</p>"
+        self.sub.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response["ETag"], etags[url])
+                etags[url] = response["ETag"]
+
+        # File baru di submateri juga mengubah versi materi dan submateri
+        MateriFile.objects.create(submateri=self.sub, file="materi/files/saham.pdf", judul="Saham")
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url)["ETag"], etags[url])
+
+    def test_materi_file_detail_etag(self):
+        materi_file = MateriFile.objects.create(submateri=self.sub, file="materi/files/saham.pdf", judul="Saham")
+        url = f"/api/materi-file/{materi_file.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        materi_file.judul = "Obligasi"
+        materi_file.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExtractManyTests(TestCase):
+    def setUp(self):
+        materi = MateriUtama.objects.create(judul="Geografi", slug="geografi")
+        self.sub = SubMateri.objects.create(parent=materi, judul="Peta", slug="peta")
+        self.files = [
+            MateriFile.objects.create(submateri=self.sub, file=f"materi/files/{name}.txt", judul=name)
+            for name in ("lambat", "gagal", "cepat")
+        ]
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def fake_extract(self, materi_file):
+        if materi_file.judul == "lambat":
+            self.release.wait(5)
+        if materi_file.judul == "gagal":
+            raise OSError("storage tidak bisa diakses")
+        return ExtractedContent(materi_file=materi_file, source_name=materi_file.file.name, text=f"isi {materi_file.judul}")
+
+    def extract_many(self, **kwargs):
+        with mock.patch.object(extraction, "extract_and_store", side_effect=self.fake_extract):
+            return extraction.extract_many(self.files, **kwargs)
+
+    def test_slow_and_failed_files_become_placeholders(self):
+        results = self.extract_many(timeout=0.3)
+        self.assertEqual(results[self.files[2].pk].text, "isi cepat")
+        self.assertEqual(results[self.files[0].pk].error, "waktu habis")
+        self.assertIn("lambat.txt", results[self.files[0].pk].text)
+        self.assertEqual(results[self.files[1].pk].error, "terjadi kesalahan")
+        self.assertIsNone(results[self.files[0].pk].pk)
+
+    def test_results_follow_input_order(self):
+        self.release.set()
+        results = self.extract_many(timeout=None)
+        self.assertEqual(list(results), [f.pk for f in self.files])
+
+        self.files.reverse()
+        self.assertEqual(list(self.extract_many(timeout=None)), [f.pk for f in self.files])
+
+    def test_placeholders_are_not_indexed(self):
+        self.release.set()
+        with mock.patch.object(extraction, "extract_and_store", side_effect=self.fake_extract):
+            index_materi(self.sub.parent)
+        self.assertFalse(MateriChunk.objects.filter(materi_file__in=self.files).exists())
+        self.assertFalse(
+            SearchDocument.objects.filter(materi_file__in=self.files, text__contains="belum bisa dibaca").exists()
+        )
+        self.assertFalse(ExtractedContent.objects.filter(materi_file__in=self.files).exists())
+
+
+class TableExtractionTests(SimpleTestCase):
+    rows = TABLE_SAMPLE_ROWS + 25
+    cols = TABLE_MAX_COLS + 10
+
+    def table(self):
+        return [[f"r{r}c{c}" + "x" * (TABLE_MAX_CELL_CHARS if c == 0 else 0) for c in range(self.cols)] for r in range(self.rows)]
+
+    def assert_capped(self, text, separator):
+        lines = text.split("\n")
+        self.assertEqual(lines[0], f"Jumlah baris: {self.rows} (ditampilkan {TABLE_SAMPLE_ROWS} baris pertama)")
+        self.assertEqual(lines[-1], f"... ({self.rows - TABLE_SAMPLE_ROWS} baris lainnya tidak ditampilkan)")
+        sample = lines[1:-1]
+        self.assertEqual(len(sample), TABLE_SAMPLE_ROWS)
+        for line in sample:
+            cells = line.split(separator)
+            self.assertEqual(len(cells), TABLE_MAX_COLS)
+            self.assertTrue(all(len(cell) <= TABLE_MAX_CELL_CHARS for cell in cells))
+        self.assertTrue(sample[0].startswith("r0c0"))
+        self.assertNotIn(f"r{TABLE_SAMPLE_ROWS}c0", text)
+
+    def test_csv_is_capped(self):
+        data = "\n".join(",".join(row) for row in self.table()).encode("utf-8")
+        details = extract_file_details(ContentFile(data, name="nilai.csv"))
+        self.assert_capped(details["text"], ", ")
+
+    def test_small_csv_is_kept_and_latin1_is_decoded(self):
+        data = "nama,kota\nJosé,Bandung\n".encode("latin-1")
+        details = extract_file_details(ContentFile(data, name="siswa.csv"))
+        self.assertEqual(details["text"], "nama, kota\nJosé, Bandung")
+
+    def test_xlsx_is_capped_per_sheet(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        for title in ("Kelas A", "Kelas B"):
+            sheet = workbook.create_sheet(title)
+            for row in self.table():
+                sheet.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        details = extract_file_details(ContentFile(buffer.getvalue(), name="nilai.xlsx"))
+        self.assertEqual(details["page_count"], 2)
+        sheets = details["text"].split("\n\n")
+        self.assertEqual(len(sheets), 2)
+        for title, sheet_text in zip(("Kelas A", "Kelas B"), sheets):
+            header, _, body = sheet_text.partition("\n")
+            self.assertEqual(header, f"Sheet: {title}")
+            self.assert_capped(body, "\t")
+
+
+def _image_bytes(size, mode="RGBA", fmt="PNG", **save_options):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, size, (10, 120, 200, 128) if mode == "RGBA" else (10, 120, 200)).save(buffer, fmt, **save_options)
+    return buffer.getvalue()
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = _use_temp_storage(self)
+
+    def open_image(self, name):
+        from PIL import Image
+
+        with default_storage.open(name, "rb") as f:
+            img = Image.open(f)
+            img.load()
+        return img
+
+    def test_widths_and_formats(self):
+        name = default_storage.save("materi/covers/besar.png", ContentFile(_image_bytes((2000, 1000))))
+        variants = generate_variants(name)
+
+        self.assertEqual(set(variants), {"webp", "jpg"})
+        for ext, fmt in (("webp", "WEBP"), ("jpg", "JPEG")):
+            self.assertEqual(list(variants[ext]), [str(w) for w in VARIANT_WIDTHS])
+            for width, variant in variants[ext].items():
+                img = self.open_image(variant)
+                self.assertEqual(img.format, fmt)
+                self.assertEqual(img.size, (int(width), int(width) // 2))
+                self.assertIn("/variants/besar__w", variant)
+        self.assertEqual(self.open_image(variants["jpg"]["320"]).mode, "RGB")
+        self.assertEqual(self.open_image(variants["webp"]["320"]).mode, "RGBA")
+
+    def test_small_image_is_not_upscaled(self):
+        name = default_storage.save("materi/images/kecil.jpg", ContentFile(_image_bytes((500, 250), mode="RGB", fmt="JPEG")))
+        variants = generate_variants(name)
+        self.assertEqual(list(variants["webp"]), ["320", "500"])
+
+    def test_exif_orientation_is_applied(self):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotasi 90 derajat
+        name = default_storage.save(
+            "materi/images/foto.jpg",
+            ContentFile(_image_bytes((800, 400), mode="RGB", fmt="JPEG", exif=exif.tobytes())),
+        )
+        variants = generate_variants(name)
+        img = self.open_image(variants["jpg"]["320"])
+        self.assertEqual(img.size, (320, 640))
+        self.assertNotIn(0x0112, img.getexif())
+
+    def test_srcset_fields_in_serializers(self):
+        materi = MateriUtama.objects.create(judul="Seni", slug="seni")
+        materi.cover_image = default_storage.save("materi/covers/seni.png", ContentFile(_image_bytes((700, 350))))
+        materi.save()
+        sub = SubMateri.objects.create(parent=materi, judul="Lukis", slug="lukis")
+        sub.gambar = default_storage.save("materi/images/lukis.png", ContentFile(_image_bytes((1400, 700))))
+        sub.save()
+
+        data = self.client.get("/api/materi/seni/").json()
+        self.assertEqual(set(data["cover_srcset"]["webp"]), {"320", "640", "700"})
+        self.assertTrue(data["cover_srcset"]["jpg"]["640"].endswith("/variants/seni__w640.jpg"))
+        self.assertEqual(set(data["submateri"][0]["gambar_srcset"]["webp"]), {"320", "640", "1280"})
+
+        summary = self.client.get("/api/materi/", {"view": "summary"}).json()
+        self.assertEqual(summary[0]["cover_srcset"], data["cover_srcset"])
+
+        sub.gambar = None
+        sub.save()
+        self.assertEqual(self.client.get("/api/materi/seni/lukis/").json()["gambar_srcset"], {})
+        self.assertFalse(os.path.exists(os.path.join(self.media, "materi/images/variants/lukis__w320.webp")))
+
+
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        _use_temp_storage(self)
+        materi = MateriUtama.objects.create(judul="Musik", slug="musik")
+        self.sub = SubMateri.objects.create(parent=materi, judul="Nada", slug="nada")
+
+        self.client_s3 = mock.Mock()
+        self.client_s3.generate_presigned_url.return_value = "https://storage.example/presigned"
+        self.client_s3.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+        self.client_s3.head_object.return_value = {"ContentLength": 1000}
+        for name, value in (("_s3", mock.Mock(return_value=(self.client_s3, "bucket"))),
+                            ("_object_key", mock.Mock(side_effect=lambda storage, name: name))):
+            patcher = mock.patch.object(direct_upload, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def init(self, size=1000):
+        response = self.client.post(
+            "/api/upload/init/", {"kind": "file", "filename": "lagu.pdf", "size": size}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def complete(self, token, **extra):
+        body = {"token": token, "submateri": self.sub.pk, "judul": "Partitur", **extra}
+        return self.client.post("/api/upload/complete/", body, content_type="application/json")
+
+    def test_complete_registers_file_and_replay_is_409(self):
+        upload = self.init()
+        self.assertEqual(upload["method"], "PUT")
+        response = self.complete(upload["token"])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(MateriFile.objects.get().file.name, upload["path"])
+
+        self.assertEqual(self.complete(upload["token"]).status_code, 409)
+        self.assertEqual(MateriFile.objects.count(), 1)
+
+    def test_size_mismatch_is_rejected(self):
+        upload = self.init(size=999)
+        response = self.complete(upload["token"])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Ukuran", response.json()["error"])
+        self.assertFalse(MateriFile.objects.exists())
+
+    def test_multipart_needs_parts(self):
+        size = direct_upload.MULTIPART_THRESHOLD
+        upload = self.init(size=size)
+        self.assertEqual(upload["method"], "MULTIPART")
+        self.assertEqual(len(upload["parts"]), -(-size // direct_upload.MULTIPART_PART_SIZE))
+        self.assertEqual(self.complete(upload["token"]).status_code, 400)
+
+        self.client_s3.head_object.return_value = {"ContentLength": size}
+        parts = [{"part_number": 2, "etag": "b"}, {"part_number": 1, "etag": "a"}]
+        self.assertEqual(self.complete(upload["token"], parts=parts).status_code, 201)
+        sent = self.client_s3.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        self.assertEqual([p["PartNumber"] for p in sent], [1, 2])
+
+    def test_invalid_token_and_metadata_are_rejected(self):
+        self.assertEqual(self.complete("bukan-token").status_code, 400)
+        upload = self.init()
+        response = self.client.post("/api/upload/complete/", {"token": upload["token"]}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.client_s3.head_object.assert_not_called()
+
+
+class AnswerCacheTests(TestCase):
+    def setUp(self):
+        # Cache limiter juga dikosongkan supaya token bucket tidak habis antar test
+        for alias in (CHAT_ANSWER_CACHE_ALIAS, CONTEXT_CACHE_ALIAS, chat_limits.CHAT_LIMIT_CACHE_ALIAS):
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+        backend = StubChatBackend()
+        self.create = mock.Mock(wraps=backend.create)
+        backend.create = self.create
+        previous = set_chat_backend(backend)
+        self.addCleanup(set_chat_backend, previous)
+
+        self.materi = MateriUtama.objects.create(judul="Fisika", slug="fisika")
+        self.sub = SubMateri.objects.create(parent=self.materi, judul="Gaya", slug="gaya", isi="<p>Gaya adalah tarikan.</p>")
+
+    def ask(self, message="Apa itu gaya?", headers=None, **body):
+        body = {"message": message, "materi_slug": "fisika", **body}
+        request = RequestFactory().post("/api/chat/", body, content_type="application/json", headers=headers)
+        return chat_gpt(request)
+
+    def test_same_question_is_a_hit(self):
+        first = self.ask()
+        second = self.ask("  apa ITU   gaya? ")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["X-Chat-Cache"], "hit")
+        self.assertEqual(self.create.call_count, 1)
+        stats = answer_cache_stats()
+        self.assertEqual((stats["hit"], stats["miss"]), (1, 1))
+
+    def test_history_and_materi_are_part_of_the_key(self):
+        self.ask()
+        self.ask(history=[{"role": "user", "content": "halo"}])
+        self.ask(materi_slug="kimia")
+        self.assertEqual(self.create.call_count, 3)
+
+    def test_bypass_neither_reads_nor_stores(self):
+        self.ask()
+        self.ask(cache=False)
+        self.ask(headers={"Cache-Control": "no-cache"})
+        self.assertEqual(self.create.call_count, 3)
+
+        caches[CHAT_ANSWER_CACHE_ALIAS].clear()
+        self.ask(cache=False)
+        self.assertFalse(self.ask().has_header("X-Chat-Cache"))
+        self.assertEqual(self.create.call_count, 5)
+        self.assertEqual(answer_cache_stats()["bypass"], 1)
+
+    def test_materi_change_misses(self):
+        self.ask()
+        self.sub.isi = "<p>Gaya adalah dorongan atau tarikan.</p>"
+        self.sub.save()
+        self.assertFalse(self.ask().has_header("X-Chat-Cache"))
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_streamed_answer_is_cached(self):
+        response = self.ask(stream=True)
+        b"".join(response.streaming_content)
+        cached = self.ask(stream=True)
+        self.assertEqual(cached["X-Chat-Cache"], "hit")
+        body = b"".join(cached.streaming_content).decode("utf-8")
+        self.assertIn("Halo dunia", body)
+        self.assertIn('"cached": true', body)
+        self.assertEqual(self.create.call_count, 1)
@@ -1,16 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
-from .views_chat import chat_gpt
+from .views_chat import chat_gpt, chat_gpt_async, chat_limit_stats, chat_answer_cache_stats
 
 urlpatterns = [
     path("materi/", views.materi_list, name="materi-list"),
     path("materi/<slug:materi_slug>/", views.materi_detail, name="materi-detail"),
     path("materi/<slug:materi_slug>/edit/", views.materi_update_delete, name="materi-edit"),
     path("materi/<slug:materi_slug>/sub/", views.submateri_create, name="submateri-create"),
+    path("materi/<slug:materi_slug>/sub/bulk/", views.submateri_bulk_create, name="submateri-bulk-create"),
+    path("materi/<slug:materi_slug>/sub/reorder/", views.submateri_reorder, name="submateri-reorder"),
     path("materi/<slug:materi_slug>/<slug:sub_slug>/", views.submateri_detail, name="submateri-detail"),
     path("upload-image/", views.upload_image, name="upload-image"),
+    path("upload/init/", views.upload_init, name="upload-init"),
+    path("upload/complete/", views.upload_complete, name="upload-complete"),
+    path("upload/abort/", views.upload_abort, name="upload-abort"),
     path("materi-file/", views.materi_file_create, name="materi-file-create"),
     path("materi-file/<int:pk>/", views.materi_file_detail, name="materi-file-detail"),
     path("materi-file/<int:pk>/content/", views.materi_file_content, name="materi-file-content"),
-    path("chat/", chat_gpt, name="chat-gpt"),
+    path("chat/", chat_gpt_async if settings.CHAT_ASYNC else chat_gpt, name="chat-gpt"),
+    path("search/", views.search, name="search"),
+    path("chat/limit-stats/", chat_limit_stats, name="chat-limit-stats"),
+    path("chat/cache-stats/", chat_answer_cache_stats, name="chat-answer-cache-stats"),
+    path("cache-stats/", views.response_cache_stats, name="response-cache-stats"),
 ]
\ No newline at end of file
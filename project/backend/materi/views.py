@@ -1,22 +1,75 @@
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 from .models import MateriUtama, SubMateri, MateriFile
-from .serializers import MateriUtamaSerializer, SubMateriSerializer, MateriFileSerializer
+from .serializers import (
+    MateriUtamaSerializer, SubMateriSerializer, MateriFileSerializer,
+    MateriSummarySerializer, nested_selection,
+)
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.utils.text import slugify
+from django.db.models import Count
+from backend.pagination import paginated_response
+from .conditional import conditional_get, materi_version, submateri_version, materi_file_version
+from .response_cache import cache_api_response, cache_stats
 from django.core.files.storage import default_storage
 from django.core.files.storage import default_storage
 import time
-from .file_utils import extract_file_content
+from .extraction import extract_and_store, get_extracted_content
+from .images import generate_variants
+from .search import search_documents
+from .bulk import BulkError, bulk_create_submateri, reorder_submateri
+from django.conf import settings
+from rest_framework.utils.urls import replace_query_param
+from .direct_upload import DirectUploadError, init_upload, complete_upload, abort_upload, read_token
+
+
+def list_param(request, name):
+    """?name=a,b,c -> ["a", "b", "c"]; None jika parameter tidak dikirim."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def prefetch_materi(queryset, include=None, fields=None):
+    """Prefetch hanya relasi yang ikut diserialisasi (aturan sama dengan SparseFieldsMixin)."""
+    submateri = nested_selection("submateri", fields, include)
+    if submateri is not None:
+        queryset = queryset.prefetch_related("submateri")
+        if nested_selection("files", *submateri) is not None:
+            queryset = queryset.prefetch_related("submateri__files")
+    return queryset
 
 
 @api_view(["GET", "POST"])
+@cache_api_response("materi-list", lambda request: ["list"])
 def materi_list(request):
+    """
+    GET mendukung:
+    - ?view=summary  -> ringkasan + submateri_count, tanpa isi submateri
+    - ?fields=judul,slug,submateri.judul  -> pilih field
+    - ?include=submateri,submateri.files  -> pilih relasi nested
+    - ?search=kata  -> filter judul
+    - ?page_size=20 / ?cursor=...  -> cursor pagination
+    """
     if request.method == "GET":
-        materi = MateriUtama.objects.all()
-        serializer = MateriUtamaSerializer(materi, many=True)
-        return Response(serializer.data)
+        fields = list_param(request, "fields")
+        include = list_param(request, "include")
+        search = request.query_params.get("search", "").strip()
+
+        materi = MateriUtama.objects.order_by("id")
+        if search:
+            materi = materi.filter(judul__icontains=search)
+
+        if request.query_params.get("view") == "summary":
+            materi = materi.annotate(submateri_count=Count("submateri"))
+            serialize = lambda rows: MateriSummarySerializer(rows, many=True, fields=fields).data
+        else:
+            materi = prefetch_materi(materi, include, fields)
+            serialize = lambda rows: MateriUtamaSerializer(rows, many=True, fields=fields, include=include).data
+        return paginated_response(request, materi, serialize)
 
     if request.method == "POST":
         serializer = MateriUtamaSerializer(data=request.data)
@@ -27,18 +80,27 @@ def materi_list(request):
 
 
 @api_view(["GET"])
+@cache_api_response("materi-detail", lambda request, materi_slug: [f"materi:{materi_slug}"])
+@conditional_get(materi_version)
 def materi_detail(request, materi_slug):
     """Ambil detail 1 materi + daftar submaterinya"""
+    fields = list_param(request, "fields")
+    include = list_param(request, "include")
     try:
-        materi = MateriUtama.objects.get(slug=materi_slug)
+        materi = prefetch_materi(MateriUtama.objects.all(), include, fields).get(slug=materi_slug)
     except MateriUtama.DoesNotExist:
         return Response({"error": "Materi tidak ditemukan"}, status=status.HTTP_404_NOT_FOUND)
 
-    serializer = MateriUtamaSerializer(materi)
+    serializer = MateriUtamaSerializer(materi, fields=fields, include=include)
     return Response(serializer.data)
 
 
 @api_view(["GET", "PUT", "DELETE"])
+@cache_api_response(
+    "submateri-detail",
+    lambda request, materi_slug, sub_slug: [f"sub:{materi_slug}:{sub_slug}"],
+)
+@conditional_get(submateri_version)
 def submateri_detail(request, materi_slug, sub_slug):
     """Ambil, update, atau hapus 1 submateri berdasarkan slug"""
     try:
@@ -68,6 +130,35 @@ def submateri_detail(request, materi_slug, sub_slug):
         sub.delete()
         return Response({"message": "Submateri berhasil dihapus"}, status=status.HTTP_204_NO_CONTENT)
 
+SUPABASE_PROJECT_ID = "rktckjwvjwvhywqsubri"
+SUPABASE_BUCKET = "media"
+
+
+def public_url(path):
+    return (
+        f"https://{SUPABASE_PROJECT_ID}.supabase.co"
+        f"/storage/v1/object/public/{SUPABASE_BUCKET}/{path}"
+    )
+
+
+def uploaded_image_data(file_path):
+    """Respons upload gambar: URL publik + URL varian ukuran (materi/images.py)."""
+    try:
+        variants = generate_variants(file_path)
+    except Exception as e:
+        print(f"Error generating variants for {file_path}: {e}")
+        variants = {}
+
+    return {
+        "path": file_path,
+        "url": public_url(file_path),
+        "variants": {
+            ext: {width: public_url(name) for width, name in names.items()}
+            for ext, names in variants.items()
+        },
+    }
+
+
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
 def upload_image(request):
@@ -80,23 +171,80 @@ def upload_image(request):
         filename = f"uploads/{int(time.time())}_{image.name}"
         file_path = default_storage.save(filename, image)
 
-        SUPABASE_PROJECT_ID = "rktckjwvjwvhywqsubri"  
-        SUPABASE_BUCKET = "media" 
-
-        public_url = (
-            f"https://{SUPABASE_PROJECT_ID}.supabase.co"
-            f"/storage/v1/object/public/{SUPABASE_BUCKET}/{file_path}"
-        )
-
-        return Response({
-            "path": file_path,
-            "url": public_url
-        }, status=status.HTTP_201_CREATED)
+        return Response(uploaded_image_data(file_path), status=status.HTTP_201_CREATED)
 
     except Exception as e:
         print(f"❌ Error Upload: {e}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+@api_view(["POST"])
+def upload_init(request):
+    """
+    Mulai upload langsung ke storage (tanpa melewati Django).
+    Body: {"kind": "file"|"image", "filename", "size", "content_type"}
+    """
+    try:
+        size = int(request.data.get("size") or 0)
+        data = init_upload(
+            request.data.get("kind", "file"),
+            request.data.get("filename") or "",
+            size,
+            request.data.get("content_type") or "",
+        )
+    except (ValueError, DirectUploadError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+def upload_complete(request):
+    """
+    Daftarkan objek yang sudah di-upload langsung. Untuk kind "file" body juga
+    berisi field MateriFile (submateri, judul, deskripsi, urutan).
+    """
+    token = request.data.get("token") or ""
+    try:
+        payload = read_token(token)
+    except DirectUploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    kind = payload["kind"]
+
+    # Token berlaku sampai kedaluwarsa: tolak pemakaian ulang untuk objek yang sudah terdaftar
+    if kind == "file" and MateriFile.objects.filter(file=payload["name"]).exists():
+        return Response({"error": "Upload ini sudah didaftarkan"}, status=status.HTTP_409_CONFLICT)
+
+    serializer = None
+    if kind == "file":
+        # Validasi metadata dulu supaya multipart tidak diselesaikan sia-sia
+        serializer = MateriFileSerializer(
+            data=request.data, fields=["judul", "deskripsi", "urutan", "submateri"]
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        file_path = complete_upload(token, request.data.get("parts"), kind=kind)
+    except DirectUploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if kind == "image":
+        return Response(uploaded_image_data(file_path), status=status.HTTP_201_CREATED)
+
+    # Ekstraksi ditunda (get_extracted_content / backfill_extracted_content):
+    # mengekstrak di sini berarti menarik seluruh objek ke worker web
+    materi_file = serializer.save(file=file_path)
+    return Response(MateriFileSerializer(materi_file).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+def upload_abort(request):
+    try:
+        abort_upload(request.data.get("token") or "")
+    except DirectUploadError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"message": "Upload dibatalkan"})
+
 @api_view(["POST"])
 def submateri_create(request, materi_slug):
     try:
@@ -111,6 +259,51 @@ def submateri_create(request, materi_slug):
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(["POST"])
+def submateri_bulk_create(request, materi_slug):
+    """Body: [{"judul": ..., "isi": ...}, ...] -> ditambahkan di akhir materi sesuai urutan list."""
+    try:
+        parent = MateriUtama.objects.get(slug=materi_slug)
+    except MateriUtama.DoesNotExist:
+        return Response({"error": "Materi tidak ditemukan"}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = SubMateriSerializer(data=request.data, many=True, fields=["judul", "isi"], include=[])
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.validated_data:
+        return Response({"error": "Daftar submateri kosong"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        created = bulk_create_submateri(parent, serializer.validated_data)
+    except BulkError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = SubMateriSerializer(
+        created, many=True, fields=["id", "judul", "slug", "urutan", "updated_at"], include=[]
+    ).data
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+def submateri_reorder(request, materi_slug):
+    """Body: {"order": ["slug-a", "slug-b", ...]} berisi semua submateri materi."""
+    try:
+        parent = MateriUtama.objects.get(slug=materi_slug)
+    except MateriUtama.DoesNotExist:
+        return Response({"error": "Materi tidak ditemukan"}, status=status.HTTP_404_NOT_FOUND)
+
+    order = request.data.get("order") if isinstance(request.data, dict) else None
+    if not isinstance(order, list) or not all(isinstance(slug, str) for slug in order):
+        return Response({"error": "order harus berupa list slug"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        submateri = reorder_submateri(parent, order)
+    except BulkError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response([{"id": sub.id, "slug": sub.slug, "urutan": sub.urutan} for sub in submateri])
+
+
 @api_view(["PUT", "DELETE"])
 def materi_update_delete(request, materi_slug):
     try:
@@ -141,11 +334,13 @@ def materi_update_delete(request, materi_slug):
 def materi_file_create(request):
     serializer = MateriFileSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save()
+        materi_file = serializer.save()
+        extract_and_store(materi_file)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(["GET", "PUT", "DELETE"])
+@conditional_get(materi_file_version)
 def materi_file_detail(request, pk):
     try:
         materi_file = MateriFile.objects.get(pk=pk)
@@ -159,7 +354,9 @@ def materi_file_detail(request, pk):
     elif request.method == "PUT":
         serializer = MateriFileSerializer(materi_file, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            materi_file = serializer.save()
+            if "file" in serializer.validated_data:
+                extract_and_store(materi_file)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -170,12 +367,46 @@ def materi_file_detail(request, pk):
 @api_view(["GET"])
 def materi_file_content(request, pk):
     try:
-        materi_file = MateriFile.objects.get(pk=pk)
+        materi_file = MateriFile.objects.select_related("extracted").get(pk=pk)
     except MateriFile.DoesNotExist:
         return Response({"error": "File tidak ditemukan"}, status=status.HTTP_404_NOT_FOUND)
 
     try:
-        content, _ = extract_file_content(materi_file.file)
-        return Response({"content": content})
+        extracted = get_extracted_content(materi_file)
+        if extracted.error:
+            return Response({"error": extracted.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"content": extracted.text, "truncated": extracted.truncated})
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def search(request):
+    """
+    Full-text search materi, submateri dan isi file.
+    ?q=kata kunci&page=1&page_size=20 -> hasil berperingkat dengan snippet <mark>.
+    """
+    query = request.query_params.get("q", "").strip()
+    try:
+        page = max(int(request.query_params.get("page", 1)), 1)
+        page_size = int(request.query_params.get("page_size", settings.API_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "page dan page_size harus angka"}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = min(max(page_size, 1), settings.API_MAX_PAGE_SIZE)
+
+    total, results = search_documents(query, limit=page_size, offset=(page - 1) * page_size)
+
+    url = request.build_absolute_uri()
+    return Response({
+        "count": total,
+        "next": replace_query_param(url, "page", page + 1) if page * page_size < total else None,
+        "previous": replace_query_param(url, "page", page - 1) if page > 1 else None,
+        "results": results,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """Counter hit/miss response cache; {"enabled": false} tanpa RESPONSE_CACHE_URL."""
+    return Response(cache_stats())
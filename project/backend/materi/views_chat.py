@@ -1,24 +1,81 @@
 # backend/materi/views_chat.py
-import os
 import json
-from django.conf import settings
+import asyncio
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from openai import OpenAI
-from .helper import extract_text_and_images
+from django.http import StreamingHttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 from .models import MateriUtama, SubMateri, MateriFile
-from .file_utils import extract_file_content
+from .extraction import extract_many
+from .retrieval import build_bm25_index, load_chunks, select_chunks
+from .context_cache import cached_context
+from .chat_backends import get_chat_backend
+from .chat_limits import (
+    ChatLimited, acquire_chat_slot, aacquire_chat_slot, limited_response,
+    release_after, arelease_after, limiter_stats,
+)
+from .answer_cache import (
+    answer_key, wants_cached_answer, get_answer, store_answer,
+    answer_cache_stats, record_stat as record_answer_stat,
+)
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
 MAX_CHARS_SOURCE = 18_000
+CHAT_TOP_K_CHUNKS = 8
+
+CHAT_MODEL = "gpt-4o-mini"
+CHAT_MAX_TOKENS = 800
+CHAT_TEMPERATURE = 0.2
+
+SYSTEM_PROMPT = (
+    "Anda adalah asisten pembelajaran. Jawablah berdasarkan topik dari materi yang diberikan."
+    "Gunakan bahasa yang mudah dimengerti oleh pelajar."
+    "Jika pertanyaan di luar konteks topik, katakan bahwa Anda hanya dapat menjawab berdasarkan topik materi yang diberikan."
+    "Pastikan jawaban yang anda berikan benar dan akurat."
+    "Jangan mengarang jawaban atau memberikan informasi yang tidak benar."
+    "Setiap akhir jawaban berikan disclaimer bahwa jawaban ada kemungkinan salah, suruh user konsultasi jawaban ke guru."
+    "Kalimat disclaimer dibawah sendiri den menggunkan kalimat tebal"
+)
+
+def load_context_corpus(materi: MateriUtama, sub_slug=None):
+    """Chunk beserta judul/gambar submateri dan info file, siap disimpan di cache."""
+    chunks = load_chunks(materi, sub_slug)
+
+    submateri = {}
+    submateri_rows = SubMateri.objects.filter(pk__in={c["submateri_id"] for c in chunks})
+    for s in submateri_rows.only("id", "judul", "isi_images"):
+        submateri[s.pk] = {"judul": s.judul, "image_urls": s.isi_images}
+
+    files = {}
+    file_ids = {c["materi_file_id"] for c in chunks if c["materi_file_id"]}
+    file_list = list(MateriFile.objects.select_related("extracted").filter(pk__in=file_ids))
+    extracted_map = extract_many(file_list)
+    for f in file_list:
+        files[f.pk] = {
+            "judul": f.judul,
+            "deskripsi": f.deskripsi,
+            "filename": f.file.name.lower(),
+            "image_urls": extracted_map[f.pk].image_urls,
+        }
+
+    return {"chunks": chunks, "submateri": submateri, "files": files, "bm25": build_bm25_index(chunks)}
+
+def build_retrieved_context(materi: MateriUtama, query, sub_slug=None):
+    """
+    Konteks materi untuk prompt: hanya chunk yang paling relevan dengan
+    pertanyaan (BM25) dalam batas MAX_CHARS_SOURCE.
+    """
+    corpus = cached_context(
+        "corpus", materi, sub_slug,
+        lambda: load_context_corpus(materi, sub_slug),
+    )
 
-def build_materi_context(materi: MateriUtama, request, sub_slug=None):
     text_lines = []
     image_urls = []
 
@@ -26,48 +83,38 @@ def build_materi_context(materi: MateriUtama, request, sub_slug=None):
     if materi.deskripsi:
         text_lines.append(f"Deskripsi: {materi.deskripsi}")
 
-    if sub_slug:
-        submateri_list = materi.submateri.filter(slug=sub_slug)
-    else:
-        submateri_list = materi.submateri.all().order_by("urutan")
-
-    for s in submateri_list:
-        text_lines.append(f"\n--- Submateri: {s.judul} ---")
-
-        if s.isi:
-            clean_text, imgs = extract_text_and_images(s.isi)
-            text_lines.append(clean_text) 
-            image_urls.extend(imgs)
-
-        # Proses MateriFile
-        files = s.files.all()
-        for f in files:
-             text_lines.append(f"\n[File: {f.judul}]")
-             if f.deskripsi:
-                 text_lines.append(f"Deskripsi File: {f.deskripsi}")
-             
-             filename = f.file.name.lower()
-             
-             try:
-                 content, imgs = extract_file_content(f.file)
-                 text_lines.append(f"Isi File ({filename}):\n{content}")
-                 image_urls.extend(imgs)
-             except Exception as e:
-                 print(f"Error reading file {filename}: {e}")
-
-    text = "\n".join(text_lines)
-
-    return text, image_urls
+    chunks = select_chunks(
+        corpus["chunks"], query,
+        top_k=CHAT_TOP_K_CHUNKS, max_chars=MAX_CHARS_SOURCE,
+        index=corpus.get("bm25"),
+    )
 
-@api_view(["POST"])
-@permission_classes([AllowAny])
-def chat_gpt(request):
-    data = request.data
-    history = data.get("history", [])
-    message = data.get("message", "").strip()
-    if not message:
-        return Response({"error": "message is required"}, status=400)
+    current_sub = None
+    current_file = None
+    for c in chunks:
+        if c["submateri_id"] != current_sub:
+            current_sub = c["submateri_id"]
+            current_file = None
+            s = corpus["submateri"][current_sub]
+            text_lines.append(f"\n--- Submateri: {s['judul']} ---")
+            image_urls.extend(s["image_urls"])
+
+        if c["materi_file_id"] and c["materi_file_id"] != current_file:
+            current_file = c["materi_file_id"]
+            f = corpus["files"][current_file]
+            text_lines.append(f"\n[File: {f['judul']}]")
+            if f["deskripsi"]:
+                text_lines.append(f"Deskripsi File: {f['deskripsi']}")
+            text_lines.append(f"Isi File ({f['filename']}):")
+            image_urls.extend(f["image_urls"])
 
+        text_lines.append(c["text"])
+
+    return "\n".join(text_lines), image_urls
+
+def build_chat_input(request, data, message):
+    """Susun konten pesan (teks materi, riwayat, gambar, pertanyaan) untuk model."""
+    history = data.get("history", [])
     materi_slug = data.get("materi_slug")
     sub_slug = data.get("sub_slug")
 
@@ -77,26 +124,16 @@ def chat_gpt(request):
     if materi_slug:
         try:
             materi = MateriUtama.objects.get(slug=materi_slug)
-            text_context, image_urls = build_materi_context(
-                materi, request, sub_slug=sub_slug
+            text_context, image_urls = build_retrieved_context(
+                materi, message, sub_slug=sub_slug
             )
         except MateriUtama.DoesNotExist:
             pass
 
-    system_prompt = (
-        "Anda adalah asisten pembelajaran. Jawablah berdasarkan topik dari materi yang diberikan."
-        "Gunakan bahasa yang mudah dimengerti oleh pelajar."
-        "Jika pertanyaan di luar konteks topik, katakan bahwa Anda hanya dapat menjawab berdasarkan topik materi yang diberikan."
-        "Pastikan jawaban yang anda berikan benar dan akurat."
-        "Jangan mengarang jawaban atau memberikan informasi yang tidak benar."
-        "Setiap akhir jawaban berikan disclaimer bahwa jawaban ada kemungkinan salah, suruh user konsultasi jawaban ke guru."
-        "Kalimat disclaimer dibawah sendiri den menggunkan kalimat tebal"
-    )
-
     input_content = [
         {
             "type": "text",
-            "text": system_prompt + "\n\n" + text_context
+            "text": SYSTEM_PROMPT + "\n\n" + text_context
         }
     ]
     
@@ -122,24 +159,271 @@ def chat_gpt(request):
         "text": message
     })
 
+    return input_content
+
+
+def wants_stream(request, data):
+    """Streaming bersifat opt-in: body {"stream": true} atau ?stream=1."""
+    if data.get("stream") in (True, "true", "1", 1):
+        return True
+    return request.GET.get("stream") in ("true", "1")
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def stream_chat_events(stream, on_done=None):
+    """
+    Ubah stream OpenAI menjadi event SSE: "delta" untuk setiap potongan teks,
+    lalu "done" berisi finish_reason dan usage. Jika client memutus koneksi,
+    server memanggil close() pada generator dan stream ke OpenAI ikut ditutup.
+    `on_done(teks)` dipanggil jika jawaban selesai utuh (finish_reason "stop").
+    """
+    finish_reason = None
+    usage = None
+    parts = []
+    try:
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage.model_dump()
+            for choice in chunk.choices:
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield sse_event("delta", {"content": choice.delta.content})
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+
+        if on_done and finish_reason == "stop":
+            on_done("".join(parts))
+        yield sse_event("done", {"finish_reason": finish_reason, "usage": usage})
+
+    except GeneratorExit:
+        print("Chat stream ditutup oleh client")
+        raise
+    except Exception as e:
+        print(f"Error OpenAI stream: {e}")
+        yield sse_event("error", {"error": str(e)})
+    finally:
+        stream.close()
+
+
+async def astream_chat_events(stream, on_done=None):
+    """Versi async dari stream_chat_events untuk mode ASGI."""
+    finish_reason = None
+    usage = None
+    parts = []
+    try:
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage.model_dump()
+            for choice in chunk.choices:
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield sse_event("delta", {"content": choice.delta.content})
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+
+        if on_done and finish_reason == "stop":
+            await sync_to_async(on_done)("".join(parts))
+        yield sse_event("done", {"finish_reason": finish_reason, "usage": usage})
+
+    except (GeneratorExit, asyncio.CancelledError):
+        print("Chat stream ditutup oleh client")
+        raise
+    except Exception as e:
+        print(f"Error OpenAI stream: {e}")
+        yield sse_event("error", {"error": str(e)})
+    finally:
+        await stream.close()
+
+
+def sampling_params():
+    return {
+        "model": CHAT_MODEL,
+        "max_tokens": CHAT_MAX_TOKENS,
+        "temperature": CHAT_TEMPERATURE,
+    }
+
+
+def chat_params(input_content):
+    return {
+        "messages": [
+            {
+                "role": "user",
+                "content": input_content
+            }
+        ],
+        **sampling_params(),
+    }
+
+
+def cached_reply_events(reply):
+    """Jawaban dari cache dikirim dengan format SSE yang sama seperti stream OpenAI."""
+    yield sse_event("delta", {"content": reply})
+    yield sse_event("done", {"finish_reason": "stop", "usage": None, "cached": True})
+
+
+def chat_message(data):
+    """
+    Validasi body chat untuk chat_gpt dan chat_gpt_async.
+    Returns: (message, pesan error); salah satunya None.
+    """
+    if not isinstance(data, dict):
+        return None, "JSON body must be an object"
+    message = data.get("message", "")
+    if not isinstance(message, str) or not message.strip():
+        return None, "message is required"
+    return message.strip(), None
+
+
+def lookup_answer(request, data, message):
+    """
+    Returns: (key cache jawaban, jawaban dari cache atau None). Saat bypass
+    key None sehingga jawaban baru juga tidak disimpan.
+    """
+    if not wants_cached_answer(request, data):
+        record_answer_stat("bypass")
+        return None, None
+    key = answer_key(data, message, sampling_params(), SYSTEM_PROMPT)
+    reply = get_answer(key)
+    record_answer_stat("hit" if reply else "miss")
+    return key, reply
+
+
+def cached_answer_response(request, data, reply, response_class=Response):
+    if wants_stream(request, data):
+        response = event_stream_response(cached_reply_events(reply))
+    else:
+        response = response_class({"reply": reply})
+    response["X-Chat-Cache"] = "hit"
+    return response
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def chat_gpt(request):
+    data = request.data
+    message, error = chat_message(data)
+    if error:
+        return Response({"error": error}, status=400)
+
+    # Jawaban yang sudah ada di cache tidak memakai slot/kuota limiter
+    answer_cache_key, reply = lookup_answer(request, data, message)
+    if reply:
+        return cached_answer_response(request, data, reply)
+
+    try:
+        slot = acquire_chat_slot(request)
+    except ChatLimited as e:
+        return limited_response(e)
+
+    streaming = False
     try:
-        print("==== DEBUG GPT INPUT ====")
-        print(json.dumps(input_content, indent=2, ensure_ascii=False))
-        print("==== END DEBUG ====")
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": input_content
-                }
-            ],
-            max_tokens=800,
-            temperature=0.2
-        )
-
-        return Response({"reply": resp.choices[0].message.content})
+        input_content = build_chat_input(request, data, message)
+        stream = wants_stream(request, data)
+        params = chat_params(input_content)
+
+        if stream:
+            openai_stream = get_chat_backend().create(
+                **params,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            # Slot dilepas oleh generator saat stream selesai
+            streaming = True
+            events = stream_chat_events(openai_stream, on_done=lambda text: store_answer(answer_cache_key, text))
+            return event_stream_response(release_after(events, slot))
+
+        resp = get_chat_backend().create(**params)
+        reply = resp.choices[0].message.content
+        if resp.choices[0].finish_reason == "stop":
+            store_answer(answer_cache_key, reply)
+
+        return Response({"reply": reply})
 
     except Exception as e:
          print(f"Error OpenAI: {e}")
-         return Response({"error": str(e)}, status=500)
\ No newline at end of file
+         return Response({"error": str(e)}, status=500)
+
+    finally:
+        if not streaming:
+            slot.release()
+
+
+@csrf_exempt
+async def chat_gpt_async(request):
+    """
+    Versi async dari chat_gpt untuk deployment ASGI (settings.CHAT_ASYNC).
+    Menunggu OpenAI tidak memakan worker; penyusunan konteks (ORM) dijalankan
+    lewat sync_to_async.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    message, error = chat_message(data)
+    if error:
+        return JsonResponse({"error": error}, status=400)
+
+    answer_cache_key, reply = await sync_to_async(lookup_answer)(request, data, message)
+    if reply:
+        return cached_answer_response(request, data, reply, response_class=JsonResponse)
+
+    try:
+        slot = await aacquire_chat_slot(request)
+    except ChatLimited as e:
+        return limited_response(e)
+
+    streaming = False
+    try:
+        input_content = await sync_to_async(build_chat_input)(request, data, message)
+        params = chat_params(input_content)
+
+        if wants_stream(request, data):
+            openai_stream = await get_chat_backend().acreate(
+                **params,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            streaming = True
+            events = astream_chat_events(openai_stream, on_done=lambda text: store_answer(answer_cache_key, text))
+            return event_stream_response(arelease_after(events, slot))
+
+        resp = await get_chat_backend().acreate(**params)
+        reply = resp.choices[0].message.content
+        if resp.choices[0].finish_reason == "stop":
+            await sync_to_async(store_answer)(answer_cache_key, reply)
+        return JsonResponse({"reply": reply})
+
+    except Exception as e:
+        print(f"Error OpenAI: {e}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+    finally:
+        if not streaming:
+            await sync_to_async(slot.release, thread_sensitive=False)()
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def chat_limit_stats(request):
+    """Counter admitted/queued/shed limiter chat (lihat materi/chat_limits.py)."""
+    return Response(limiter_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def chat_answer_cache_stats(request):
+    """Counter hit/miss/bypass cache jawaban chat (lihat materi/answer_cache.py)."""
+    return Response(answer_cache_stats())